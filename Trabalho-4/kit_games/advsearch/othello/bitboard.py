@@ -0,0 +1,580 @@
+from collections import namedtuple
+
+from . import zobrist
+from . import symmetry
+from .board import Board, UndoRecord
+
+# Bit layout: the tile at column x, row y (i.e. tiles[y][x]) is stored
+# at bit y*8 + x. Bit 0 is the top-left corner and bit 63 the bottom-right.
+FULL = 0xFFFFFFFFFFFFFFFF
+NOT_A_FILE = 0xFEFEFEFEFEFEFEFE  # every tile except column x=0
+NOT_H_FILE = 0x7F7F7F7F7F7F7F7F  # every tile except column x=7
+
+# (shift amount, mask applied after shifting) for each direction
+# that increases the bit index (the shift is a left shift)...
+LSHIFTS = [
+    (1, NOT_A_FILE),  # RIGHT
+    (8, FULL),        # DOWN
+    (9, NOT_A_FILE),  # DOWN_RIGHT
+    (7, NOT_H_FILE),  # DOWN_LEFT
+]
+
+# ...and for each direction that decreases it (the shift is a right shift)
+RSHIFTS = [
+    (1, NOT_H_FILE),  # LEFT
+    (8, FULL),        # UP
+    (9, NOT_H_FILE),  # UP_LEFT
+    (7, NOT_A_FILE),  # UP_RIGHT
+]
+
+# (x, y) coordinates of every square, indexed by y*8 + x
+SQUARE_MOVES = [(sq & 7, sq >> 3) for sq in range(64)]
+
+FLIP_KEYS = zobrist.FLIP_KEYS
+
+try:
+    popcount = int.bit_count  # python >= 3.10
+except AttributeError:  # pragma: no cover
+    def popcount(bits: int) -> int:
+        return bin(bits).count('1')
+
+
+def square_bit(move) -> int:
+    """
+    Returns the single-bit mask of a move given in x,y (col,row) coordinates
+    :param move: (int, int)
+    :return: int
+    """
+    x, y = move
+    return 1 << (y * 8 + x)
+
+
+def bits_to_moves(bits: int) -> set:
+    """
+    Converts a mask of squares into a set of x,y (col,row) coordinates
+    :param bits: int
+    :return: set
+    """
+    moves = set()
+    while bits:
+        low = bits & -bits
+        moves.add(SQUARE_MOVES[low.bit_length() - 1])
+        bits ^= low
+    return moves
+
+
+def move_mask(own: int, opp: int) -> int:
+    """
+    Returns the mask of empty squares where the owner of 'own' can play,
+    propagating along the eight directions with shift-and-mask operations
+    :param own: bitboard of the player to move
+    :param opp: bitboard of the opponent
+    :return: int
+    """
+    empty = ~(own | opp) & FULL
+    moves = 0
+    for shift, mask in LSHIFTS:
+        m_opp = opp & mask
+        x = (own << shift) & m_opp
+        x |= (x << shift) & m_opp
+        x |= (x << shift) & m_opp
+        x |= (x << shift) & m_opp
+        x |= (x << shift) & m_opp
+        x |= (x << shift) & m_opp
+        moves |= (x << shift) & mask & empty
+    for shift, mask in RSHIFTS:
+        m_opp = opp & mask
+        x = (own >> shift) & m_opp
+        x |= (x >> shift) & m_opp
+        x |= (x >> shift) & m_opp
+        x |= (x >> shift) & m_opp
+        x |= (x >> shift) & m_opp
+        x |= (x >> shift) & m_opp
+        moves |= (x >> shift) & mask & empty
+    return moves
+
+
+def _rays(square: int) -> tuple:
+    """
+    Returns the rays (masks of the squares in one direction) leaving the square, as
+    (rays towards higher bit indices, rays towards lower bit indices), skipping the rays
+    shorter than two squares (a flip needs an opponent disc followed by an own disc)
+    """
+    x, y = square & 7, square >> 3
+    increasing, decreasing = [], []
+    for dx, dy in [(1, 0), (0, 1), (1, 1), (-1, 1), (-1, 0), (0, -1), (-1, -1), (1, -1)]:
+        ray, length = 0, 0
+        nx, ny = x + dx, y + dy
+        while 0 <= nx < 8 and 0 <= ny < 8:
+            ray |= 1 << (ny * 8 + nx)
+            length += 1
+            nx, ny = nx + dx, ny + dy
+        if length >= 2:
+            (increasing if dy * 8 + dx > 0 else decreasing).append(ray)
+    return tuple(increasing), tuple(decreasing)
+
+
+# RAYS[square] = (rays towards higher bit indices, rays towards lower bit indices)
+RAYS = [_rays(square) for square in range(64)]
+
+
+def flip_mask(own: int, opp: int, move_bit: int) -> int:
+    """
+    Returns the mask of opponent discs flipped when the owner of 'own'
+    places a disc at move_bit (which is assumed to be empty).
+    Along each ray, the first square that is not an opponent disc is found with a single
+    bit operation (the lowest or highest set bit of ray & ~opp): if it is an own disc,
+    the squares of the ray before it are flipped
+    :param own: bitboard of the player making the move
+    :param opp: bitboard of the opponent
+    :param move_bit: single-bit mask of the square being played
+    :return: int
+    """
+    increasing, decreasing = RAYS[move_bit.bit_length() - 1]
+    not_opp = ~opp
+    flipped = 0
+    for ray in increasing:
+        x = ray & not_opp
+        first = x & -x  # nearest square of the ray that is not an opponent disc
+        if first & own:
+            flipped |= ray & (first - 1)
+    for ray in decreasing:
+        x = ray & not_opp
+        if x:
+            first = 1 << (x.bit_length() - 1)
+            if first & own:
+                flipped |= ray & ~((first << 1) - 1)
+    return flipped
+
+
+def _lines(dx: int, dy: int) -> list:
+    """
+    Returns the masks of the lines (rows, columns or diagonals) of the board in the direction dx, dy
+    """
+    lines = []
+    for square in range(64):
+        x, y = square & 7, square >> 3
+        if 0 <= x - dx < 8 and 0 <= y - dy < 8:
+            continue  # not the first square of its line
+        line = 0
+        while 0 <= x < 8 and 0 <= y < 8:
+            line |= 1 << (y * 8 + x)
+            x, y = x + dx, y + dy
+        lines.append(line)
+    return lines
+
+
+# lines of each axis: horizontal, vertical, diagonal (down-right) and anti-diagonal (down-left)
+LINES = [_lines(1, 0), _lines(0, 1), _lines(1, 1), _lines(-1, 1)]
+
+# squares whose neighbor along the axis is off the board, for the same axes
+EDGES = [0x8181818181818181, 0xFF000000000000FF, 0xFF818181818181FF, 0xFF818181818181FF]
+
+# disc features of both colors: each field is a {color: count} dict, like Board.piece_count
+DiscFeatures = namedtuple('DiscFeatures', ['mobility', 'potential_mobility', 'frontier', 'stable'])
+
+
+def neighbors(bits: int) -> int:
+    """
+    Returns the mask of the squares adjacent (in the eight directions) to any square of bits
+    :param bits: int
+    :return: int
+    """
+    horizontal = ((bits << 1) & NOT_A_FILE) | ((bits >> 1) & NOT_H_FILE)
+    row = horizontal | bits
+    return (horizontal | row << 8 | row >> 8) & FULL
+
+
+def stable_mask(own: int, safe: list) -> int:
+    """
+    Returns the mask of the discs of 'own' that can never be flipped. A disc is stable when, along each of the
+    four axes, its line is full, it is on the edge, or it is next to a stable disc of the same color.
+    This is a lower bound (e.g. a disc bracketed by stable opponent discs is not counted)
+    :param own: bitboard of one color
+    :param safe: masks of the squares that cannot be flipped along each axis (full lines or edges, see disc_features)
+    :return: int
+    """
+    safe_h, safe_v, safe_d, safe_a = safe
+    stable = own & safe_h & safe_v & safe_d & safe_a
+    while stable:
+        grown = own & (
+            (safe_h | ((stable << 1) & NOT_A_FILE) | ((stable >> 1) & NOT_H_FILE))
+            & (safe_v | (stable << 8) | (stable >> 8))
+            & (safe_d | ((stable << 9) & NOT_A_FILE) | ((stable >> 9) & NOT_H_FILE))
+            & (safe_a | ((stable << 7) & NOT_H_FILE) | ((stable >> 7) & NOT_A_FILE))
+        )
+        if grown == stable:
+            break
+        stable = grown
+    return stable
+
+
+def disc_features(black: int, white: int, black_moves: int = None, white_moves: int = None) -> DiscFeatures:
+    """
+    Computes, for both colors at once, the features used by othello evaluation functions:
+    mobility (number of legal moves), potential mobility (empty squares next to opponent discs),
+    frontier discs (own discs next to an empty square) and stable discs (see stable_mask)
+    :param black: bitboard of the black discs
+    :param white: bitboard of the white discs
+    :param black_moves: mask of black's legal moves, if already known (e.g. BitBoard.move_mask)
+    :param white_moves: mask of white's legal moves, if already known
+    :return: DiscFeatures
+    """
+    if black_moves is None:
+        black_moves = move_mask(black, white)
+    if white_moves is None:
+        white_moves = move_mask(white, black)
+    filled = black | white
+    empty = ~filled & FULL
+    next_to_empty = neighbors(empty)
+
+    safe = []
+    for lines, edge in zip(LINES, EDGES):
+        for line in lines:
+            if filled & line == line:
+                edge |= line
+        safe.append(edge)
+
+    B, W = Board.BLACK, Board.WHITE
+    return DiscFeatures(
+        {B: popcount(black_moves), W: popcount(white_moves)},
+        {B: popcount(empty & neighbors(white)), W: popcount(empty & neighbors(black))},
+        {B: popcount(black & next_to_empty), W: popcount(white & next_to_empty)},
+        {B: popcount(stable_mask(black, safe)), W: popcount(stable_mask(white, safe))},
+    )
+
+
+class BitBoard(Board):
+    """
+    Drop-in replacement for board.Board that stores the position as two
+    64-bit integers (one per color) instead of an 8x8 matrix of characters.
+    Legal move generation and flipping are done with shift-and-mask
+    operations over all squares at once, so it can be used wherever a Board is
+    expected, e.g. GameState(BitBoard(), 'B').
+
+    The tiles matrix is still available (read-only) for code that inspects it
+    directly, but it is rebuilt lazily from the bitboards, so prefer
+    num_pieces, legal_moves and bitboards on hot paths.
+    """
+
+    def __init__(self):
+        """
+        Initializes the board with othello's initial position
+        """
+        self.black = square_bit((4, 3)) | square_bit((3, 4))
+        self.white = square_bit((3, 3)) | square_bit((4, 4))
+
+        # cache legal moves (sets and masks) in attempt to reduce function calls
+        self._legal_moves = {self.BLACK: None, self.WHITE: None}
+        self._move_masks = {self.BLACK: None, self.WHITE: None}
+
+        self.piece_count = {self.BLACK: 2, self.WHITE: 2, self.EMPTY: 60}
+
+        # stores the flipped tiles at the last move (as a mask)
+        self._flipped_mask = 0
+
+        # lazily built 8x8 matrix (see the tiles property)
+        self._tiles = None
+
+        # zobrist key of the pieces on the board (see othello.zobrist), updated at each move
+        self.zobrist = zobrist.bits_hash(self.black, self.white)
+
+    @staticmethod
+    def from_string(string: str) -> 'BitBoard':
+        """
+        Generates a board from the string representation
+        :param string:
+        :return:
+        """
+        black = white = 0
+        for lineno, line in enumerate(string.strip().split('\n')):
+            for colno, col in enumerate(line.strip()):
+                if col == BitBoard.BLACK:
+                    black |= 1 << (lineno * 8 + colno)
+                elif col == BitBoard.WHITE:
+                    white |= 1 << (lineno * 8 + colno)
+        return BitBoard.from_bitboards(black, white)
+
+    @staticmethod
+    def from_bitboards(black: int, white: int) -> 'BitBoard':
+        """
+        Generates a board from its (black, white) bitboards (see bitboards())
+        :param black:
+        :param white:
+        :return:
+        """
+        b = BitBoard.__new__(BitBoard)  # without __init__, which would set up (and hash) the initial position
+        b.black, b.white = black, white
+        b._legal_moves = {b.BLACK: None, b.WHITE: None}
+        b._move_masks = {b.BLACK: None, b.WHITE: None}
+        b._count_pieces()
+        b._flipped_mask = 0
+        b._tiles = None
+        b.zobrist = zobrist.bits_hash(black, white)
+        return b
+
+    @staticmethod
+    def from_board(board: Board) -> 'BitBoard':
+        """
+        Converts a (matrix-based) Board into a BitBoard
+        :param board:
+        :return:
+        """
+        if isinstance(board, BitBoard):
+            return board.copy()
+        return BitBoard.from_bitboards(*board.bitboards())
+
+    def _count_pieces(self):
+        """
+        Recomputes piece_count from the bitboards
+        """
+        black, white = popcount(self.black), popcount(self.white)
+        self.piece_count = {self.BLACK: black, self.WHITE: white, self.EMPTY: 64 - black - white}
+
+    def bitboards(self):
+        """
+        Returns the (black, white) bitboards
+        :return: (int, int)
+        """
+        return self.black, self.white
+
+    def canonical_key(self):
+        """
+        Returns the (black, white) bitboards of the canonical form of the board and the symmetry that gives it
+        (see Board.canonical_key)
+        :return: (int, int, int)
+        """
+        return symmetry.canonical(self.black, self.white)
+
+    def _own_opp(self, color):
+        """
+        Returns the (own, opponent) bitboards for the given color
+        """
+        if color == self.BLACK:
+            return self.black, self.white
+        return self.white, self.black
+
+    @property
+    def tiles(self) -> list:
+        """
+        8x8 matrix view of the board (tiles[y][x]), built on demand.
+        Writing to it does not change the board.
+        """
+        if self._tiles is None:
+            black, white = self.black, self.white
+            self._tiles = [
+                [
+                    self.BLACK if black >> (y * 8 + x) & 1 else
+                    self.WHITE if white >> (y * 8 + x) & 1 else self.EMPTY
+                    for x in range(8)
+                ]
+                for y in range(8)
+            ]
+        return self._tiles
+
+    @property
+    def flipped(self) -> set:
+        """
+        Set of (row, col) positions flipped at the last move, for highlighting purposes
+        """
+        return {(y, x) for x, y in bits_to_moves(self._flipped_mask)}
+
+    def move_mask(self, color) -> int:
+        """
+        Returns the mask of legal moves for the given color
+        :param color:
+        :return: int
+        """
+        mask = self._move_masks[color]
+        if mask is None:
+            mask = self._move_masks[color] = move_mask(*self._own_opp(color))
+        return mask
+
+    def features(self) -> DiscFeatures:
+        """
+        Returns the mobility, potential mobility, frontier and stable disc counts of both colors
+        (see disc_features), reusing the cached move masks
+        :return: DiscFeatures
+        """
+        return disc_features(self.black, self.white, self.move_mask(self.BLACK), self.move_mask(self.WHITE))
+
+    def is_legal(self, move, color):
+        """
+        Returns whether the move is legal for the given color
+        :param move: (int,int) tile position (x,y coords) to place the disk
+        :param color: color of the player making the move
+        :return: bool
+        """
+        x, y = move
+        if not (0 <= x < 8 and 0 <= y < 8):
+            return False
+        return bool(self.move_mask(color) >> (y * 8 + x) & 1)
+
+    def is_terminal_state(self):
+        """
+        Returns whether the current state is terminal (game finished) or not
+        :return:
+        """
+        return self.move_mask(self.BLACK) == 0 and self.move_mask(self.WHITE) == 0
+
+    def legal_moves(self, color: str) -> frozenset:
+        """
+        Returns the set of legal moves for the given color (immutable, see Board.legal_moves)
+        :param color:str
+        :return:
+        """
+        if self._legal_moves[color] is None:
+            self._legal_moves[color] = frozenset(bits_to_moves(self.move_mask(color)))
+        return self._legal_moves[color]
+
+    def has_legal_move(self, color):
+        """
+        Returns whether the given color has any legal move
+        :param color:
+        :return:bool
+        """
+        return self.move_mask(color) != 0
+
+    def copy(self) -> 'BitBoard':
+        """
+        Returns a copy of this board object
+        :return:
+        """
+        b = BitBoard.__new__(BitBoard)
+        b.black, b.white = self.black, self.white
+        b._legal_moves = dict(self._legal_moves)  # cached sets are frozensets, sharing is safe
+        b._move_masks = dict(self._move_masks)
+        b.piece_count = dict(self.piece_count)
+        b._flipped_mask = self._flipped_mask
+        b._tiles = None
+        b.zobrist = self.zobrist
+        return b
+
+    def _apply(self, color, placed, flipped):
+        """
+        Places the disc(s) in 'placed' and flips the discs in 'flipped' for the given color,
+        updating piece counts and invalidating caches
+        """
+        n_placed, n_flipped = popcount(placed), popcount(flipped)
+        opp = self.opponent(color)
+        if color == self.BLACK:
+            self.black |= placed | flipped
+            self.white &= ~flipped
+        else:
+            self.white |= placed | flipped
+            self.black &= ~flipped
+        self.piece_count[color] += n_placed + n_flipped
+        self.piece_count[opp] -= n_flipped
+        self.piece_count[self.EMPTY] -= n_placed
+        self._flipped_mask |= flipped
+        self.zobrist ^= zobrist.mask_hash(placed, zobrist.PIECE_KEYS[color]) ^ zobrist.mask_hash(flipped, zobrist.FLIP_KEYS)
+
+        # resets legal moves
+        self._legal_moves[self.BLACK], self._legal_moves[self.WHITE] = None, None
+        self._move_masks[self.BLACK], self._move_masks[self.WHITE] = None, None
+        self._tiles = None
+
+    def process_move(self, move_xy, color) -> bool:
+        """
+        Executes the placement of a tile of a given color
+        in a given position. Note that this is done in-place,
+        changing the current board object! If you want to do lookahead searches,
+        make sure to copy the 'original' board first
+        :param move_xy: position to place the tile in x,y (col,row) coordinates
+        :param color:color of the tile to be placed
+        :return: bool
+        """
+        self._flipped_mask = 0  # resets flipped tiles
+
+        if color not in [self.WHITE, self.BLACK]:
+            raise ValueError("Move must be made by BLACK or WHITE player")
+
+        if self.is_legal(move_xy, color):
+            bit = square_bit(move_xy)
+            self._apply(color, bit, flip_mask(*self._own_opp(color), bit))
+            return True
+
+        return False  # guards against illegal moves
+
+    def make_move(self, move_xy, color) -> UndoRecord:
+        """
+        Plays the given move in-place and returns a record that allows
+        unmake_move to revert it (see Board.make_move)
+        :param move_xy: position to place the tile in x,y (col,row) coordinates
+        :param color: color of the tile to be placed
+        :return: UndoRecord whose 'flipped' is the mask of flipped discs
+        """
+        if color not in [self.WHITE, self.BLACK]:
+            raise ValueError("Move must be made by BLACK or WHITE player")
+
+        x, y = move_xy
+        if not (0 <= x < 8 and 0 <= y < 8 and self.move_mask(color) >> (y * 8 + x) & 1):
+            raise ValueError("Invalid move: %s" % str(move_xy))
+
+        bit = 1 << (y * 8 + x)
+        black, white = self.black, self.white
+        if color == self.BLACK:
+            flipped = flip_mask(black, white, bit)
+            self.black, self.white = black | bit | flipped, white ^ flipped
+        else:
+            flipped = flip_mask(white, black, bit)
+            self.black, self.white = black ^ flipped, white | bit | flipped
+
+        # the caches and piece counts are replaced (not updated) so that the record can keep the old ones
+        undo = UndoRecord(move_xy, color, flipped, (self._legal_moves, self._move_masks, self.piece_count), self.zobrist)
+        key = self.zobrist ^ zobrist.PIECE_KEYS[color][y * 8 + x]
+        bits = flipped
+        while bits:  # inline zobrist.mask_hash(flipped, FLIP_KEYS)
+            low = bits & -bits
+            key ^= FLIP_KEYS[low.bit_length() - 1]
+            bits ^= low
+        self.zobrist = key
+        n_black = popcount(self.black)
+        n_white = popcount(self.white)
+        self.piece_count = {self.BLACK: n_black, self.WHITE: n_white, self.EMPTY: 64 - n_black - n_white}
+        self._legal_moves = {self.BLACK: None, self.WHITE: None}
+        self._move_masks = {self.BLACK: None, self.WHITE: None}
+        self._tiles = None
+        return undo
+
+    def unmake_move(self, undo: UndoRecord):
+        """
+        Reverts a move done with make_move. Moves must be unmade in the
+        reverse order they were made.
+        :param undo: the record returned by make_move
+        """
+        x, y = undo.move
+        placed_flipped = (1 << (y * 8 + x)) | undo.flipped
+        if undo.color == self.BLACK:
+            self.black ^= placed_flipped
+            self.white |= undo.flipped
+        else:
+            self.white ^= placed_flipped
+            self.black |= undo.flipped
+
+        self._legal_moves, self._move_masks, self.piece_count = undo.caches
+        self._tiles = None
+        self.zobrist = undo.zobrist
+
+    def flip_tiles(self, origin, color, direction):
+        """
+        Traverses the board in the given direction,
+        transforming the color of appropriate tiles
+        :param origin: y,x coordinates where the traversal will begin (y,x for matrix indexing)
+        :param color: new color of the pieces
+        :param direction: direction of traversal (see the constants on the beginning of the class)
+        :return:
+        """
+        destination = self.find_bracket(origin, color, direction)
+        if not destination:
+            return
+
+        oy, ox = origin
+        dx, dy = direction  # find_bracket walks (y,x) coordinates with the (dx,dy) offsets
+        ny, nx = oy + dx, ox + dy  # n stands for 'next'
+
+        flipped = 0
+        while (ny, nx) != destination:
+            flipped |= 1 << (ny * 8 + nx)
+            ny, nx = ny + dx, nx + dy
+        self._apply(color, 0, flipped)
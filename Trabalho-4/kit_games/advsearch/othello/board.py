@@ -1,3 +1,18 @@
+from collections import namedtuple
+
+from . import zobrist
+from . import symmetry
+
+# information needed by Board.unmake_move to revert a Board.make_move:
+# the move and color played, the flipped discs, the legal-move caches and the zobrist key before the move
+# (the representation of 'flipped' and 'caches' depends on the board implementation)
+UndoRecord = namedtuple('UndoRecord', ['move', 'color', 'flipped', 'caches', 'zobrist'])
+
+# tiles -> '1' for the pieces of one color, '0' for the rest (see Board.bitboards)
+_BLACK_DIGITS = str.maketrans({'B': '1', 'W': '0', '.': '0'})
+_WHITE_DIGITS = str.maketrans({'B': '0', 'W': '1', '.': '0'})
+
+
 def from_file(path_to_file):
     """
     Generates a board from the string representation
@@ -82,6 +97,9 @@ class Board(object):
         # stores the flipped tiles at each move
         self.flipped = set()
 
+        # zobrist key of the pieces on the board (see othello.zobrist), updated at each move
+        self.zobrist = zobrist.tiles_hash(self.tiles)
+
     @staticmethod
     def from_string(string: str) -> 'Board':
         """
@@ -99,8 +117,48 @@ class Board(object):
                 b.tiles[lineno][colno] = col
                 b.piece_count[col] += 1
 
+        b.zobrist = zobrist.tiles_hash(b.tiles)
         return b
 
+    @staticmethod
+    def from_bitboards(black: int, white: int) -> 'Board':
+        """
+        Generates a board from its (black, white) bitboards (see bitboards())
+        :param black:
+        :param white:
+        :return:
+        """
+        b = Board.__new__(Board)
+        b.tiles = [
+            [Board.BLACK if black >> (y * 8 + x) & 1 else Board.WHITE if white >> (y * 8 + x) & 1 else Board.EMPTY
+             for x in range(8)]
+            for y in range(8)
+        ]
+        n_black, n_white = bin(black).count('1'), bin(white).count('1')
+        b.piece_count = {b.BLACK: n_black, b.WHITE: n_white, b.EMPTY: 64 - n_black - n_white}
+        b._legal_moves = {b.BLACK: None, b.WHITE: None}
+        b.flipped = set()
+        b.zobrist = zobrist.tiles_hash(b.tiles)
+        return b
+
+    def bitboards(self):
+        """
+        Returns the (black, white) bitboards of the board: bit y*8 + x is set for the pieces
+        of each color at x,y (see othello.bitboard)
+        :return: (int, int)
+        """
+        squares = ''.join(map(''.join, self.tiles))[::-1]  # square 63 first, as the most significant digit
+        return int(squares.translate(_BLACK_DIGITS), 2), int(squares.translate(_WHITE_DIGITS), 2)
+
+    def features(self):
+        """
+        Returns the mobility, potential mobility, frontier and stable disc counts of both colors,
+        computed with bit operations over the bitboards (see bitboard.disc_features)
+        :return: bitboard.DiscFeatures
+        """
+        from .bitboard import disc_features  # bitboard imports this module
+        return disc_features(*self.bitboards())
+
     def is_within_bounds(self, move):
         """
         Returns whether the move refers to a valid board position
@@ -150,6 +208,35 @@ class Board(object):
         else:
             return None
 
+    def canonical_key(self):
+        """
+        Returns the (black, white) bitboards of the canonical form of the board (the smallest among its
+        8 symmetric versions, see othello.symmetry) and the symmetry that gives it. Symmetric boards have
+        the same key; moves are mapped with transform_move and back with inverse_transform_move
+        :return: (int, int, int)
+        """
+        return symmetry.canonical(*self.bitboards())
+
+    @staticmethod
+    def transform_move(move, sym: int):
+        """
+        Returns the x,y coordinates of a move in the board transformed by the symmetry (e.g. the canonical one)
+        :param move: (int, int)
+        :param sym: symmetry (0-7) as returned by canonical_key
+        :return: (int, int)
+        """
+        return symmetry.transform_move(move, sym)
+
+    @staticmethod
+    def inverse_transform_move(move, sym: int):
+        """
+        Maps a move of the board transformed by the symmetry back to this board
+        :param move: (int, int)
+        :param sym: symmetry (0-7) as returned by canonical_key
+        :return: (int, int)
+        """
+        return symmetry.inverse_transform_move(move, sym)
+
     def find_bracket(self, move, color, direction):
         """
         Traverses the board in given direction trying to
@@ -159,27 +246,21 @@ class Board(object):
         :param direction: one of eight directions of tile neighborhood
         :return: (int,int)
         """
-        # performing inline boundary check to avoid calls for is_within_bounds
-        # this saves some time
-        dx, dy = direction
-        tx, ty = move
-        tx += dx
-        ty += dy
-
+        # walks the precomputed ray (no bounds checks, see DIRECTION_RAYS)
+        ray = DIRECTION_RAYS[move[0]][move[1]][direction]
+        if ray is None:
+            return False
+        (fx, fy), rest = ray
         opp = self.BLACK if color == self.WHITE else self.WHITE  # inline opponent calc.
-
-        if not (0 <= tx <= 7 and 0 <= ty <= 7) or self.tiles[tx][ty] != opp:
+        tiles = self.tiles
+        if tiles[fx][fy] != opp:
             return False
 
-        while self.tiles[tx][ty] == opp:  # putting is_within_bounds here yields more calls
-            tx += dx
-            ty += dy
-            if not (0 <= tx <= 7 and 0 <= ty <= 7):  # self.is_within_bounds((tx, ty)):
-                return False
-
-        if self.tiles[tx][ty] == self.EMPTY:
-            return False
-        return tx, ty
+        for tx, ty in rest:
+            piece = tiles[tx][ty]
+            if piece != opp:
+                return (tx, ty) if piece == color else False
+        return False
 
     def find_where_to_play_from_owned(self, owned, color, direction):
         """
@@ -192,33 +273,36 @@ class Board(object):
         :param direction: one of eight directions of tile neighborhood
         :return: (int,int) or False if not found
         """
-        # performing inline boundary check to avoid calls for is_within_bounds
-        # this saves some time
-        dx, dy = direction
-        tx, ty = owned
-        tx += dx
-        ty += dy
+        ray = DIRECTION_RAYS[owned[0]][owned[1]][direction]
+        if ray is None:
+            return False
+        (fx, fy), rest = ray
         opp = self.BLACK if color == self.WHITE else self.WHITE  # inline opponent calc.
-
-        if not (0 <= tx <= 7 and 0 <= ty <= 7) or self.tiles[tx][ty] != opp:  # color:
+        tiles = self.tiles
+        if tiles[fx][fy] != opp:
             return False
 
-        while self.tiles[tx][ty] == opp:
-            tx += dx
-            ty += dy
-            if not (0 <= tx <= 7 and 0 <= ty <= 7):
-                return False
-
-        if self.tiles[tx][ty] != self.EMPTY:
-            return False
-        return tx, ty
+        for tx, ty in rest:
+            piece = tiles[tx][ty]
+            if piece != opp:
+                return (tx, ty) if piece == self.EMPTY else False
+        return False
 
     def copy(self) -> 'Board':
         """
-        Returns a copy of this board object
+        Returns a copy of this board object.
+        Tiles, piece counts and the cached legal moves are duplicated
+        directly (no round-trip through the string representation)
         :return:
         """
-        return self.from_string(self.__str__())
+        b = Board.__new__(Board)
+        b.tiles = [row[:] for row in self.tiles]
+        b.piece_count = dict(self.piece_count)
+        # the cached sets are frozensets (see legal_moves), so they can be shared
+        b._legal_moves = dict(self._legal_moves)
+        b.flipped = set()
+        b.zobrist = self.zobrist
+        return b
 
     def process_move(self, move_xy, color) -> bool:
         """
@@ -244,6 +328,7 @@ class Board(object):
             self.tiles[y][x] = color
             self.piece_count[color] += 1
             self.piece_count[self.EMPTY] -= 1
+            self.zobrist ^= zobrist.PIECE_KEYS[color][y * 8 + x]
 
             # TODO put this inside flip_tiles
             for direc in self.DIRECTIONS:
@@ -255,6 +340,69 @@ class Board(object):
 
         return False  # guards against illegal moves
 
+    def make_move(self, move_xy, color) -> UndoRecord:
+        """
+        Plays the given move in-place, like process_move, but returns a record
+        that allows unmake_move to revert it. This lets a search walk a single
+        mutable board instead of copying it at every node.
+        Unlike process_move, the flipped attribute (used for highlighting) is not updated.
+        :param move_xy: position to place the tile in x,y (col,row) coordinates
+        :param color: color of the tile to be placed
+        :return: UndoRecord
+        """
+        if color not in [self.WHITE, self.BLACK]:
+            raise ValueError("Move must be made by BLACK or WHITE player")
+
+        if not self.is_legal(move_xy, color):
+            raise ValueError("Invalid move: %s" % str(move_xy))
+
+        x, y = move_xy
+        flipped = []  # y,x coordinates of the flipped tiles
+        for direction in self.DIRECTIONS:  # find_bracket walks (y,x) coordinates
+            destination = self.find_bracket((y, x), color, direction)
+            if destination:
+                first, rest = DIRECTION_RAYS[y][x][direction]
+                for square in (first,) + rest:
+                    if square == destination:
+                        break
+                    flipped.append(square)
+
+        undo = UndoRecord(
+            move_xy, color, flipped, (self._legal_moves[self.BLACK], self._legal_moves[self.WHITE]), self.zobrist
+        )
+
+        key = self.zobrist ^ zobrist.PIECE_KEYS[color][y * 8 + x]
+        self.tiles[y][x] = color
+        for ny, nx in flipped:
+            self.tiles[ny][nx] = color
+            key ^= zobrist.FLIP_KEYS[ny * 8 + nx]
+        self.zobrist = key
+        self.piece_count[color] += 1 + len(flipped)
+        self.piece_count[self.opponent(color)] -= len(flipped)
+        self.piece_count[self.EMPTY] -= 1
+
+        self._legal_moves[self.BLACK], self._legal_moves[self.WHITE] = None, None
+        return undo
+
+    def unmake_move(self, undo: UndoRecord):
+        """
+        Reverts a move done with make_move. Moves must be unmade in the
+        reverse order they were made.
+        :param undo: the record returned by make_move
+        """
+        x, y = undo.move
+        opp = self.opponent(undo.color)
+
+        self.tiles[y][x] = self.EMPTY
+        for ny, nx in undo.flipped:
+            self.tiles[ny][nx] = opp
+        self.piece_count[undo.color] -= 1 + len(undo.flipped)
+        self.piece_count[opp] += len(undo.flipped)
+        self.piece_count[self.EMPTY] += 1
+
+        self._legal_moves[self.BLACK], self._legal_moves[self.WHITE] = undo.caches
+        self.zobrist = undo.zobrist
+
     def flip_tiles(self, origin, color, direction):
         """
         Traverses the board in the given direction,
@@ -268,24 +416,24 @@ class Board(object):
         if not destination:
             return
         self.flipped.add(destination)  # for highlighting purposes (see decorated_str)
-        ox, oy = origin
-        dx, dy = direction
-
-        nx, ny = ox + dx, oy + dy  # n stands for 'next'
+        first, rest = DIRECTION_RAYS[origin[0]][origin[1]][direction]
 
         opp = self.opponent(color)
 
-        while (nx, ny) != destination:
+        for nx, ny in (first,) + rest:  # n stands for 'next'
+            if (nx, ny) == destination:
+                break
             # flips the tile and updates piece counts
             self.flipped.add((nx, ny))
             self.tiles[nx][ny] = color
             self.piece_count[color] += 1
             self.piece_count[opp] -= 1
-            nx, ny = nx + dx, ny + dy
+            self.zobrist ^= zobrist.FLIP_KEYS[nx * 8 + ny]
 
-    def legal_moves(self, color:str) -> set:
+    def legal_moves(self, color:str) -> frozenset:
         """
-        Returns a set of legal moves for the given color
+        Returns the set of legal moves for the given color. It is the cached set, shared with
+        the copies of this board, so it is immutable: make a set of it to change it
         :param color:str
         :return:
         """
@@ -298,7 +446,8 @@ class Board(object):
                 self.find_legal_moves_dense(color)
             else:
                 self.find_legal_moves_sparse(color)
-               
+            self._legal_moves[color] = frozenset(self._legal_moves[color])
+
         return self._legal_moves[color]
 
     def find_legal_moves_dense(self, color):
@@ -308,16 +457,10 @@ class Board(object):
         :param color:
         """
         # test if every empty tile on the board is a legal move
-        tiles = [(x, y) for x in range(8) for y in range(8) if self.tiles[x][y] == self.EMPTY]
-
-        for x, y in tiles:
-            if self.tiles[x][y] == self.EMPTY:  # and any(map(hasbracket, self.DIRECTIONS)):
-                # performs the 'inline' any:
-                for direc in self.DIRECTIONS:
-                    if self.find_bracket((x, y), color, direc):
-                        # flips x,y because of the way tiles are stored and the x,y coords in real world
-                        self._legal_moves[color].add((y,x))
-                        break
+        legal_moves = self._legal_moves[color]
+        for x, y in self._empty_brackets(color, True):
+            # flips x,y because of the way tiles are stored and the x,y coords in real world
+            legal_moves.add((y, x))
 
     def find_legal_moves_sparse(self, color):
         """
@@ -326,34 +469,68 @@ class Board(object):
         :param color:
         :return:
         """
-        # test if every empty tile on the board is a legal move
-        tiles = [(x, y) for x in range(8) for y in range(8) if self.tiles[x][y] == color]
-
-        for y, x in tiles:
-            if self.tiles[y][x] == color:
-                for direc in self.DIRECTIONS:
-                    move_yx = self.find_where_to_play_from_owned((y, x), color, direc)
-                    if move_yx:
+        # walks the rays from every tile of the given color to the empty tile past the opponent's ones
+        tiles, empty = self.tiles, self.EMPTY
+        opp = self.BLACK if color == self.WHITE else self.WHITE
+        legal_moves = self._legal_moves[color]
+        for y in range(8):
+            row = tiles[y]
+            for x in range(8):
+                if row[x] != color:
+                    continue
+                for (fy, fx), rest in SQUARE_RAYS[y][x]:
+                    if tiles[fy][fx] != opp:
+                        continue
+                    for ty, tx in rest:
+                        piece = tiles[ty][tx]
+                        if piece != opp:
+                            break
+                    else:
+                        continue  # reached the edge
+                    if piece == empty:
                         # flips x,y because of matrix indexing vs board coords
-                        m_y, m_x = move_yx
-                        self._legal_moves[color].add((m_x, m_y))
+                        legal_moves.add((tx, ty))
+
+    def _empty_brackets(self, color, find_all):
+        """
+        Yields the (row, col) of the empty tiles where color can play (stops after the first one if not find_all)
+        """
+        tiles, empty = self.tiles, self.EMPTY
+        opp = self.BLACK if color == self.WHITE else self.WHITE
+        for x in range(8):
+            row = tiles[x]
+            for y in range(8):
+                if row[y] != empty:
+                    continue
+                for (fx, fy), rest in SQUARE_RAYS[x][y]:
+                    if tiles[fx][fy] != opp:
+                        continue
+                    for tx, ty in rest:
+                        piece = tiles[tx][ty]
+                        if piece != opp:
+                            break
+                    else:
+                        continue  # reached the edge
+                    if piece == color:
+                        yield x, y
+                        if not find_all:
+                            return
+                        break
 
     def has_legal_move(self, color):
         """
-        Returns whether the given color has any legal move
+        Returns whether the given color has any legal move.
+        Uses the cached legal moves if they are known; otherwise the scan stops at the first move found
+        (most boards of a search are leaves whose full set of moves is never asked for), and when
+        there is none, the empty set is cached, as it is the complete answer
         :param color:
         :return:bool
         """
-        # test if every empty tile on the board is a legal move
-        tiles = [(x, y) for x in range(8) for y in range(8) if self.tiles[x][y] == self.EMPTY]
-
-        for x, y in tiles:
-            # self._legal_moves[color] = [(y, x) for x, y in tiles if self.is_legal((x, y), color)]
-
-            hasbracket = lambda direction: self.find_bracket((x, y), color, direction)
-
-            if self.tiles[x][y] == self.EMPTY and any(map(hasbracket, self.DIRECTIONS)):
-                return True
+        if self._legal_moves[color] is not None:
+            return bool(self._legal_moves[color])
+        for _ in self._empty_brackets(color, False):
+            return True
+        self._legal_moves[color] = frozenset()
         return False
 
     @staticmethod
@@ -431,3 +608,36 @@ class Board(object):
             string += '%s\n' % ''.join(row)
 
         return string
+
+
+def _ray(i, j, direction):
+    """
+    Returns the tiles (tiles indexes) from (i, j), excluded, to the edge of the board in the given direction
+    """
+    di, dj = direction
+    ray = []
+    i, j = i + di, j + dj
+    while 0 <= i <= 7 and 0 <= j <= 7:
+        ray.append((i, j))
+        i, j = i + di, j + dj
+    return ray
+
+
+# precomputed rays, so that bracket finding and flipping walk flat tuples without bounds checks.
+# DIRECTION_RAYS[i][j][direction] is (first tile, tuple of the next tiles) of the ray from tiles[i][j]
+# to the edge, or None if it has less than two tiles (a bracket needs an opponent tile and one beyond it);
+# SQUARE_RAYS[i][j] is the tuple of the rays from tiles[i][j] that are not None
+DIRECTION_RAYS = [
+    [
+        {
+            direction: (ray[0], tuple(ray[1:])) if len(ray) >= 2 else None
+            for direction, ray in ((direction, _ray(i, j, direction)) for direction in Board.DIRECTIONS)
+        }
+        for j in range(8)
+    ]
+    for i in range(8)
+]
+SQUARE_RAYS = [
+    [tuple(ray for ray in DIRECTION_RAYS[i][j].values() if ray is not None) for j in range(8)]
+    for i in range(8)
+]
@@ -1,5 +1,6 @@
 from typing import Tuple, Union
-from .board import Board
+from .board import Board, UndoRecord
+from .zobrist import SIDE_KEY
 
 class GameState(object):
     """
@@ -47,6 +48,15 @@ class GameState(object):
         """
         return self.board.winner()
 
+    @property
+    def zobrist(self) -> int:
+        """
+        Zobrist key of this state: the board's key combined with the player to move
+        """
+        if self.player == Board.WHITE:
+            return self.board.zobrist ^ SIDE_KEY
+        return self.board.zobrist
+
     def get_board(self) -> Board:
         """
         Returns the board configuration
@@ -70,17 +80,43 @@ class GameState(object):
         if not next_board.process_move(move, self.player):
             raise ValueError("Invalid move: %s" % str(move))
 
-        opponent = Board.opponent(self.player)
+        next_state = GameState(next_board, self._next_player(next_board, self.player))
+
+        return next_state
+
+    @staticmethod
+    def _next_player(board:Board, player:str) -> Union[str,None]:
+        """
+        Returns who plays after 'player' has moved on the given board
+        """
+        opponent = Board.opponent(player)
         
         # alternates the player, but checkes if it has valid moves
         # also, if neither the opponent nor the player have
         # valid moves, then the next player is None
         next_player = None
-        if next_board.has_legal_move(opponent):
+        if board.has_legal_move(opponent):
             next_player = opponent
-        elif next_board.has_legal_move(self.player):
-            next_player = self.player
+        elif board.has_legal_move(player):
+            next_player = player
 
-        next_state = GameState(next_board, next_player)
+        return next_player
 
-        return next_state
+    def make_move(self, move:Tuple[int,int]) -> Tuple[UndoRecord, str]:
+        """
+        Plays the move in-place (on this state's board) and passes the turn
+        to the next player, with the same rules as next_state.
+        Returns a record to be given to unmake_move to revert the move.
+        :param move: move in x,y (col,row) coordinates
+        """
+        undo = self.board.make_move(move, self.player), self.player
+        self.player = self._next_player(self.board, self.player)
+        return undo
+
+    def unmake_move(self, undo:Tuple[UndoRecord, str]) -> None:
+        """
+        Reverts a move done with make_move
+        :param undo: the record returned by make_move
+        """
+        board_undo, self.player = undo
+        self.board.unmake_move(board_undo)
@@ -0,0 +1,49 @@
+"""
+Compact immutable othello position: the (black, white) bitboards and the player to move.
+Unlike a GameState, it has no caches or mutable state, so it is hashable, ordered (as a tuple) and
+pickles to a few dozen bytes, which makes it the form to send positions to other processes
+(parallel search, tournament workers) or to use as a dictionary key.
+"""
+from collections import namedtuple
+
+from .board import Board
+from .bitboard import BitBoard
+from .gamestate import GameState
+
+
+class Position(namedtuple('Position', ['black', 'white', 'player'])):
+    """
+    (black, white, player) of an othello position: bitboards with bit y*8 + x set for the pieces
+    at x,y (see othello.bitboard) and the player to move (None if the game is over)
+    """
+    __slots__ = ()
+
+    @staticmethod
+    def from_board(board: Board, player: str) -> 'Position':
+        """
+        Returns the position of a board (Board or BitBoard) with the given player to move
+        """
+        return Position(*board.bitboards(), player)
+
+    @staticmethod
+    def from_state(state: GameState) -> 'Position':
+        """
+        Returns the position of an othello GameState
+        """
+        return Position(*state.board.bitboards(), state.player)
+
+    def to_board(self, board_class=BitBoard) -> Board:
+        """
+        Returns a new board with this position's pieces
+        :param board_class: BitBoard (the bitboards are used as they are) or Board
+        """
+        return board_class.from_bitboards(self.black, self.white)
+
+    def to_state(self, board_class=BitBoard) -> GameState:
+        """
+        Returns a new GameState with this position (see to_board)
+        """
+        return GameState(self.to_board(board_class), self.player)
+
+    def __repr__(self):
+        return f'Position(black={self.black:#018x}, white={self.white:#018x}, player={self.player!r})'
@@ -0,0 +1,113 @@
+"""
+The 8 symmetries of the othello board (rotations and reflections), on bitboards.
+Squares are indexed by y*8 + x (see bitboard). Symmetry s (0-7) is applied as: if bit 2 is set,
+transpose (x <-> y); then if bit 0 is set, mirror (x -> 7 - x); then if bit 1 is set, flip (y -> 7 - y).
+A position is canonicalized by taking the smallest (black, white) pair among its 8 symmetric versions,
+so symmetric positions share the same key in transposition tables, opening books, etc.
+"""
+from typing import List, Tuple
+
+SYMMETRIES = range(8)
+
+_K1, _K2, _K4 = 0x5555555555555555, 0x3333333333333333, 0x0F0F0F0F0F0F0F0F
+
+
+def mirror(bits: int) -> int:
+    """
+    Reflects a bitboard left-right (x -> 7 - x)
+    """
+    bits = ((bits >> 1) & _K1) | ((bits & _K1) << 1)
+    bits = ((bits >> 2) & _K2) | ((bits & _K2) << 2)
+    return ((bits >> 4) & _K4) | ((bits & _K4) << 4)
+
+
+def flip(bits: int) -> int:
+    """
+    Reflects a bitboard top-bottom (y -> 7 - y)
+    """
+    return int.from_bytes(bits.to_bytes(8, 'little'), 'big')
+
+
+def transpose(bits: int) -> int:
+    """
+    Reflects a bitboard on the main diagonal (x <-> y)
+    """
+    t = 0x0F0F0F0F00000000 & (bits ^ (bits << 28))
+    bits ^= t ^ (t >> 28)
+    t = 0x3333000033330000 & (bits ^ (bits << 14))
+    bits ^= t ^ (t >> 14)
+    t = 0x5500550055005500 & (bits ^ (bits << 7))
+    return bits ^ t ^ (t >> 7)
+
+
+def transform(bits: int, symmetry: int) -> int:
+    """
+    Applies a symmetry to a bitboard
+    """
+    if symmetry & 4:
+        bits = transpose(bits)
+    if symmetry & 1:
+        bits = mirror(bits)
+    if symmetry & 2:
+        bits = flip(bits)
+    return bits
+
+
+def inverse_transform(bits: int, symmetry: int) -> int:
+    """
+    Undoes transform (each reflection is its own inverse, so they are applied in reverse order)
+    """
+    if symmetry & 2:
+        bits = flip(bits)
+    if symmetry & 1:
+        bits = mirror(bits)
+    if symmetry & 4:
+        bits = transpose(bits)
+    return bits
+
+
+def orbit(bits: int) -> List[int]:
+    """
+    Returns the 8 symmetric versions of a bitboard, indexed by symmetry
+    (8 reflections in total instead of the 12 of calling transform for each one)
+    """
+    m = mirror(bits)
+    t = transpose(bits)
+    tm = mirror(t)
+    return [bits, m, flip(bits), flip(m), t, tm, flip(t), flip(tm)]
+
+
+def canonical(black: int, white: int) -> Tuple[int, int, int]:
+    """
+    Returns the smallest (black, white) among the 8 symmetric versions of a position and the symmetry giving it
+    (the smallest symmetry, if several give the same position)
+    """
+    return min(zip(orbit(black), orbit(white), SYMMETRIES))
+
+
+def transform_move(move: Tuple[int, int], symmetry: int) -> Tuple[int, int]:
+    """
+    Returns the (x, y) square a move goes to under a symmetry
+    """
+    x, y = move
+    if symmetry & 4:
+        x, y = y, x
+    if symmetry & 1:
+        x = 7 - x
+    if symmetry & 2:
+        y = 7 - y
+    return x, y
+
+
+def inverse_transform_move(move: Tuple[int, int], symmetry: int) -> Tuple[int, int]:
+    """
+    Inverse of transform_move: maps a move of the transformed position back to the original one
+    """
+    x, y = move
+    if symmetry & 2:
+        y = 7 - y
+    if symmetry & 1:
+        x = 7 - x
+    if symmetry & 4:
+        x, y = y, x
+    return x, y
@@ -0,0 +1,63 @@
+"""
+Zobrist hashing for othello positions.
+A position's key is the XOR of one random 64-bit number per (color, square) occupied,
+XORed with SIDE_KEY when white is to move. The keys are generated from a fixed seed,
+so the same position has the same key in every process (needed to share tables
+between workers or to store them on disk).
+Squares are indexed by y*8 + x, i.e. tiles[y][x] is square y*8 + x.
+"""
+import random
+
+_rng = random.Random(20230401)
+
+# PIECE_KEYS[color][square]
+PIECE_KEYS = {
+    'B': [_rng.getrandbits(64) for _ in range(64)],
+    'W': [_rng.getrandbits(64) for _ in range(64)],
+}
+
+# XOR of both colors' keys: flipping the disc at a square changes the key by FLIP_KEYS[square]
+FLIP_KEYS = [b ^ w for b, w in zip(PIECE_KEYS['B'], PIECE_KEYS['W'])]
+
+# XORed into the key when white is the player to move
+SIDE_KEY = _rng.getrandbits(64)
+
+
+def tiles_hash(tiles) -> int:
+    """
+    Computes from scratch the key of an 8x8 matrix of tiles (tiles[y][x])
+    :param tiles:
+    :return: int
+    """
+    key = 0
+    for y, row in enumerate(tiles):
+        for x, piece in enumerate(row):
+            if piece in PIECE_KEYS:
+                key ^= PIECE_KEYS[piece][y * 8 + x]
+    return key
+
+
+def bits_hash(black: int, white: int) -> int:
+    """
+    Computes from scratch the key of a position given as (black, white) bitboards
+    :param black:
+    :param white:
+    :return: int
+    """
+    return mask_hash(black, PIECE_KEYS['B']) ^ mask_hash(white, PIECE_KEYS['W'])
+
+
+def mask_hash(bits: int, keys: list) -> int:
+    """
+    Returns the XOR of keys[square] for every square set in bits
+    (e.g. mask_hash(flipped, FLIP_KEYS) is the key change caused by flipping those discs)
+    :param bits:
+    :param keys: one of the 64-key lists above
+    :return: int
+    """
+    key = 0
+    while bits:
+        low = bits & -bits
+        key ^= keys[low.bit_length() - 1]
+        bits ^= low
+    return key
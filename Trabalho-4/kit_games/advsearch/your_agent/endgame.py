@@ -0,0 +1,176 @@
+"""
+Exact othello endgame solver, working directly on (own, opp) bitboards.
+Scores are final disc differences from the point of view of the player to move.
+"""
+import time
+from typing import Tuple
+
+from ..othello.board import Board
+from ..othello.bitboard import BitBoard, FULL, SQUARE_MOVES, move_mask, flip_mask, popcount
+from .minimax import SearchTimeout
+
+# the four 4x4 quadrants of the board: the parity ordering plays first in
+# quadrants with an odd number of empty squares (where we are likely to get the last move)
+QUADRANTS = [0x000000000F0F0F0F, 0x00000000F0F0F0F0, 0x0F0F0F0F00000000, 0xF0F0F0F000000000]
+
+# with more empty squares than this, moves are sorted fastest-first (fewest replies for the opponent);
+# below it the sort costs more than it saves and the parity order is used alone
+FASTEST_FIRST_EMPTIES = 5
+
+# the deadline is checked every this many nodes (a power of two minus one, used as a mask)
+_CLOCK_MASK = 1023
+
+
+def _last1(own: int, opp: int, bit: int) -> int:
+    """
+    Final score with a single empty square (bit): whoever can play there does so
+    """
+    diff = popcount(own) - popcount(opp)
+    flipped = flip_mask(own, opp, bit)
+    if flipped:
+        return diff + 2 * popcount(flipped) + 1
+    flipped = flip_mask(opp, own, bit)
+    if flipped:
+        return diff - 2 * popcount(flipped) - 1
+    return diff
+
+
+class EndgameSolver(object):
+    """
+    Alpha-beta negamax to the end of the game, with
+    - fastest-first ordering far from the end and parity (region) ordering near it,
+    - specialized code for the last two empty squares, which avoids generating moves.
+    """
+
+    def __init__(self, deadline: float = None):
+        """
+        :param deadline: optional time.time() value at which the solver raises SearchTimeout
+        """
+        self.deadline = deadline
+        self.nodes = 0
+
+    def solve(self, own: int, opp: int, alpha: int = -64, beta: int = 64) -> int:
+        """
+        Returns the final disc difference with perfect play from the position
+        (or a bound, if it is outside the window (alpha, beta))
+        :param own: bitboard of the player to move
+        :param opp: bitboard of the opponent
+        """
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & _CLOCK_MASK == 0 and time.time() >= self.deadline:
+            raise SearchTimeout()
+
+        empties = ~(own | opp) & FULL
+        n_empties = popcount(empties)
+        if n_empties == 1:
+            return _last1(own, opp, empties)
+        if n_empties == 2:
+            first = empties & -empties
+            return self._last2(own, opp, first, empties ^ first, alpha, beta)
+
+        moves = move_mask(own, opp)
+        if not moves:
+            if move_mask(opp, own):
+                return -self.solve(opp, own, -beta, -alpha)
+            return popcount(own) - popcount(opp)  # nobody can move: game over
+
+        best = -64
+        for bit in self._ordered_moves(own, opp, moves, empties, n_empties):
+            flipped = flip_mask(own, opp, bit)
+            score = -self.solve(opp ^ flipped, own | bit | flipped, -beta, -alpha)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+    def _ordered_moves(self, own: int, opp: int, moves: int, empties: int, n_empties: int) -> list:
+        """
+        Returns the single-bit masks of the moves in the order they should be searched
+        """
+        odd = 0  # empty squares in quadrants with an odd number of empties
+        for quadrant in QUADRANTS:
+            if popcount(empties & quadrant) & 1:
+                odd |= empties & quadrant
+
+        bits = []
+        while moves:
+            bit = moves & -moves
+            bits.append(bit)
+            moves ^= bit
+
+        if n_empties > FASTEST_FIRST_EMPTIES:
+            def replies(bit):
+                flipped = flip_mask(own, opp, bit)
+                return 2 * popcount(move_mask(opp ^ flipped, own | bit | flipped)) + (not bit & odd)
+            bits.sort(key=replies)
+        else:
+            bits.sort(key=lambda bit: not bit & odd)  # stable: odd regions first
+        return bits
+
+    def _last2(self, own: int, opp: int, a: int, b: int, alpha: int, beta: int) -> int:
+        """
+        Final score with two empty squares (a and b)
+        """
+        self.nodes += 1
+        best = None
+        flipped = flip_mask(own, opp, a)
+        if flipped:
+            best = -_last1(opp ^ flipped, own | a | flipped, b)
+        if best is None or best < beta:
+            flipped = flip_mask(own, opp, b)
+            if flipped:
+                score = -_last1(opp ^ flipped, own | b | flipped, a)
+                if best is None or score > best:
+                    best = score
+        if best is not None:
+            return best
+
+        # the player to move passes: the opponent chooses
+        flipped = flip_mask(opp, own, a)
+        if flipped:
+            best = _last1(own ^ flipped, opp | a | flipped, b)
+        flipped = flip_mask(opp, own, b)
+        if flipped:
+            score = _last1(own ^ flipped, opp | b | flipped, a)
+            if best is None or score < best:
+                best = score
+        if best is None:  # nobody can move
+            return popcount(own) - popcount(opp)
+        return best
+
+    def solve_move(self, own: int, opp: int) -> Tuple[int, int]:
+        """
+        Returns the best move (as a single-bit mask) and its exact final disc difference
+        :param own: bitboard of the player to move (must have a legal move)
+        :param opp: bitboard of the opponent
+        """
+        empties = ~(own | opp) & FULL
+        moves = self._ordered_moves(own, opp, move_mask(own, opp), empties, popcount(empties))
+        best_bit, alpha = None, -65
+        for bit in moves:
+            flipped = flip_mask(own, opp, bit)
+            score = -self.solve(opp ^ flipped, own | bit | flipped, -64, -alpha)
+            if score > alpha:
+                best_bit, alpha = bit, score
+        return best_bit, alpha
+
+
+def endgame_move(state, deadline: float = None) -> Tuple[int, int]:
+    """
+    Returns the move with the best final disc difference for the player to move in the othello state,
+    or None if the deadline passes before the game tree is solved
+    :param state: othello GameState (with a Board or a BitBoard), with a legal move
+    :param deadline: optional time.time() value at which to give up
+    :return: (int, int) tuple with x, y coordinates of the move, or None
+    """
+    board = state.board if isinstance(state.board, BitBoard) else BitBoard.from_board(state.board)
+    black, white = board.bitboards()
+    own, opp = (black, white) if state.player == Board.BLACK else (white, black)
+    try:
+        bit, _ = EndgameSolver(deadline).solve_move(own, opp)
+    except SearchTimeout:
+        return None
+    return SQUARE_MOVES[bit.bit_length() - 1]
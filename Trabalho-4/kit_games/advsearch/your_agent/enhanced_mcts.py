@@ -0,0 +1,247 @@
+"""
+MCTS with three enhancements, each one switched on by an argument of EnhancedMCTS:
+- MCTS-Solver: terminal positions are proven, and proofs are propagated up the tree (a node is won
+  for the player to move if one child is, and decided when every child is), so the selection no longer
+  spends playouts in solved subtrees and a proven win at the root is played at once;
+- progressive bias: a heuristic value of the move (EVAL_TEMPLATE of its square, in othello) is added
+  to the selection score, divided by the visits of the child, so it guides the first visits and fades after;
+- RAVE: all-moves-as-first statistics (the results of the playouts in which the player later played
+  the child's move) are blended with the child's own mean, with a weight that decreases with its visits.
+It works with any game with the GameState interface; othello playouts run on bitboards.
+"""
+import time
+import random
+from math import sqrt, log
+from typing import Tuple
+
+from ..othello.board import Board
+from ..othello.bitboard import BitBoard, SQUARE_MOVES, popcount
+from .positional import EVAL_TEMPLATE
+from .playout import random_playout
+
+# proven value of a node not solved yet (a solved node stores its winner: a player, or None for a draw)
+UNPROVEN = 'unproven'
+
+EXPLORATION = sqrt(2)
+
+# mean assumed for a child without visits (above any real mean, so that every child is tried once)
+FIRST_PLAY_URGENCY = 1.1
+
+# EVAL_TEMPLATE normalized to [-1, 1]
+_SQUARE_PRIORS = [[value / 100 for value in row] for row in EVAL_TEMPLATE]
+
+
+class MCTSStats(object):
+    """
+    Counters of the last search of EnhancedMCTS
+    """
+
+    def __init__(self):
+        self.playouts = 0    # iterations (including those that reached a proven node and needed no playout)
+        self.tree_size = 1   # nodes of the tree
+        self.proven = 0      # nodes solved by MCTS-Solver
+        self.elapsed = 0.0   # seconds spent in the search
+
+    def __str__(self):
+        rate = self.playouts / self.elapsed if self.elapsed else 0
+        return (f'{self.playouts} playouts, {self.tree_size} nodes ({self.proven} proven), '
+                f'{self.elapsed:.3f}s ({rate:.0f} playouts/s)')
+
+
+class SolverNode(object):
+    """
+    Node of the enhanced search: all the children are created at the first expansion
+    """
+    __slots__ = ('state', 'parent', 'children', 'last_move', 'visits', 'value',
+                 'amaf_visits', 'amaf_value', 'prior', 'proven')
+
+    def __init__(self, state, parent: 'SolverNode' = None, last_move=None, prior: float = 0.0):
+        self.state = state
+        self.parent = parent
+        self.children = None  # None until expanded
+        self.last_move = last_move
+        self.visits = 0
+        self.value = 0.0         # results from the point of view of the player who made last_move
+        self.amaf_visits = 0
+        self.amaf_value = 0.0
+        self.prior = prior       # heuristic value of last_move for progressive bias
+        self.proven = UNPROVEN
+
+
+class EnhancedMCTS(object):
+    """
+    MCTS with MCTS-Solver, progressive bias and RAVE (see the module docstring)
+    """
+
+    def __init__(self, solver: bool = True, bias: float = 1.0, rave: float = 300.0,
+                 exploration: float = EXPLORATION):
+        """
+        :param solver: whether proven wins and losses are propagated
+        :param bias: weight of the progressive bias (0 disables it)
+        :param rave: RAVE equivalence constant, the number of visits at which a child's own mean
+                     and its AMAF mean weigh about the same (0 disables RAVE)
+        :param exploration: UCB exploration constant
+        """
+        self.solver = solver
+        self.bias = bias
+        self.rave = rave
+        self.exploration = exploration
+        self.stats = MCTSStats()  # statistics of the last search
+
+    def move(self, state, max_time: float) -> Tuple[int, int]:
+        """
+        Searches for max_time seconds (or until the root is solved) and returns the best move
+        :param state: state to make the move (any game with the GameState interface)
+        :param max_time: search time in seconds
+        :return: (int, int) tuple with x, y coordinates of the move
+        """
+        self.stats = MCTSStats()
+        start = time.time()
+        root = SolverNode(state)
+        while time.time() - start < max_time and root.proven == UNPROVEN:
+            self.iterate(root)
+        self.stats.elapsed = time.time() - start
+
+        if not root.children:  # not even one iteration
+            return random.choice(list(state.legal_moves()))
+        return self.best_child(root).last_move
+
+    def best_child(self, node: SolverNode) -> SolverNode:
+        """
+        Returns a proven win for the player to move if there is one, otherwise the most
+        visited child among those not proven lost (among all of them if they all are)
+        """
+        player = node.state.player
+        for child in node.children:
+            if child.proven == player:
+                return child
+        candidates = [child for child in node.children if not self._lost(child, player)] or node.children
+        return max(candidates, key=lambda child: child.visits)
+
+    @staticmethod
+    def _lost(child: SolverNode, player) -> bool:
+        return child.proven not in (UNPROVEN, player, None)
+
+    def iterate(self, root: SolverNode) -> None:
+        """
+        Runs one iteration: selection, expansion, playout (unless a proven node is reached) and backpropagation
+        """
+        node = root
+        while node.children and node.proven == UNPROVEN:
+            node = self.select_child(node)
+
+        trace = []
+        if node.proven != UNPROVEN:
+            winner = node.proven
+        elif node.state.is_terminal():
+            winner = node.state.winner()
+            if self.solver:
+                node.proven = winner
+                self.stats.proven += 1
+        else:
+            self.expand(node)
+            node = random.choice(node.children)
+            winner = self.playout(node.state, trace if self.rave else None)
+
+        self.stats.playouts += 1
+        self.backpropagate(node, winner, trace)
+
+    def expand(self, node: SolverNode) -> None:
+        othello = isinstance(node.state.board, Board) and self.bias
+        node.children = []
+        for move in node.state.legal_moves():
+            prior = _SQUARE_PRIORS[move[1]][move[0]] if othello else 0.0
+            node.children.append(SolverNode(node.state.next_state(move), node, move, prior))
+        self.stats.tree_size += len(node.children)
+
+    def select_child(self, node: SolverNode) -> SolverNode:
+        """
+        Returns the child with the best score: UCB over the RAVE-blended mean, plus the progressive bias.
+        Children proven lost for the player to move are skipped, proven draws count as 0.5
+        """
+        log_visits = log(node.visits + 1)
+        best, best_score = None, float("-inf")
+        for child in node.children:
+            if child.proven != UNPROVEN:
+                if child.proven is not None:  # proven wins make the parent proven, so this is a loss
+                    continue
+                mean = 0.5
+            else:
+                mean = child.value / child.visits if child.visits else FIRST_PLAY_URGENCY
+                if self.rave and child.amaf_visits:
+                    beta = sqrt(self.rave / (3 * child.visits + self.rave))
+                    mean = (1 - beta) * mean + beta * child.amaf_value / child.amaf_visits
+            score = (mean + self.exploration * sqrt(log_visits / (child.visits + 1))
+                     + self.bias * child.prior / (child.visits + 1))
+            if score > best_score:
+                best, best_score = child, score
+        if best is None:  # every child is lost (the node is proven, or about to be)
+            best = max(node.children, key=lambda child: child.visits)
+        return best
+
+    def playout(self, state, trace: list = None):
+        """
+        Plays random moves until the end of the game and returns the winner
+        :param trace: if given, the (player, move) of each move played is appended to it
+        """
+        if isinstance(state.board, Board):
+            board = state.board if isinstance(state.board, BitBoard) else BitBoard.from_board(state.board)
+            squares = [] if trace is not None else None
+            black, white = random_playout(*board.bitboards(), state.player != Board.WHITE, trace=squares)
+            if trace is not None:
+                trace.extend((Board.BLACK if black_to_move else Board.WHITE, SQUARE_MOVES[square])
+                             for square, black_to_move in squares)
+            n_black, n_white = popcount(black), popcount(white)
+            return Board.BLACK if n_black > n_white else Board.WHITE if n_white > n_black else None
+        while not state.is_terminal():
+            move = random.choice(list(state.legal_moves()))
+            if trace is not None:
+                trace.append((state.player, move))
+            state = state.next_state(move)
+        return state.winner()
+
+    def backpropagate(self, node: SolverNode, winner, trace: list) -> None:
+        """
+        Adds the result to the nodes from node up to the root, updates the AMAF statistics of
+        their children and propagates the proofs
+        :param trace: (player, move) of the moves of the playout (the tree moves are added on the way up)
+        """
+        amaf = set(trace)  # moves played from the current node to the end of the game
+        while node is not None:
+            node.visits += 1
+            if node.parent is not None:
+                mover = node.parent.state.player
+                node.value += 1.0 if winner == mover else 0.5 if winner is None else 0.0
+            if self.rave and node.children:
+                player = node.state.player
+                result = 1.0 if winner == player else 0.5 if winner is None else 0.0
+                for child in node.children:
+                    if (player, child.last_move) in amaf:
+                        child.amaf_visits += 1
+                        child.amaf_value += result
+            if self.solver and node.proven == UNPROVEN and node.children:
+                self._prove(node)
+            if node.parent is not None and self.rave:
+                amaf.add((node.parent.state.player, node.last_move))
+            node = node.parent
+
+    def _prove(self, node: SolverNode) -> None:
+        """
+        Marks node as proven if one child is a proven win for the player to move, or if all children are proven
+        """
+        player = node.state.player
+        outcomes = set()
+        for child in node.children:
+            if child.proven == player:
+                outcomes = {player}
+                break
+            if child.proven == UNPROVEN:
+                return
+            outcomes.add(child.proven)
+        if player in outcomes:
+            node.proven = player
+        elif None in outcomes:
+            node.proven = None
+        else:
+            node.proven = outcomes.pop()
+        self.stats.proven += 1
@@ -1,8 +1,14 @@
+import os
 import random
 from typing import Tuple
 from ..othello.gamestate import GameState
 from math import sqrt, log
 import time
+from .playout import random_game
+from .pool_mcts import PoolMCTS, position_key
+from .parallel_mcts import ParallelMCTS
+from .enhanced_mcts import EnhancedMCTS
+from .shared_tree_mcts import SharedTreeMCTS, TREE
 
 # Voce pode criar funcoes auxiliares neste arquivo
 # e tambem modulos auxiliares neste pacote.
@@ -10,75 +16,182 @@ import time
 # Nao esqueca de renomear 'your_agent' com o nome
 # do seu agente.
 
+# tempo de busca por jogada (em segundos)
+TIME_LIMIT = 4
+
+# se a arvore da jogada anterior deve ser reaproveitada
+REUSE_TREE = True
+
+# se a arvore e' guardada em arrays (NodePool, ver pool_mcts) em vez de objetos Node
+NODE_POOL = True
+
+# busca aprimorada (ver enhanced_mcts): MCTS-Solver, vies progressivo pelo EVAL_TEMPLATE e RAVE;
+# as opcoes sao os argumentos de EnhancedMCTS (0 ou False desligam cada melhoria)
+ENHANCED = False
+ENHANCED_OPTIONS = dict(solver=True, bias=1.0, rave=300.0)
+
+# busca paralela em processos (ver parallel_mcts): None (busca sequencial), 'root' (ROOT: uma arvore
+# por processo, visitas da raiz somadas), 'leaf' (LEAF: uma arvore, playouts de cada folha nos processos)
+# ou 'tree' (TREE: uma arvore em memoria compartilhada com perda virtual, so' no othello, ver shared_tree_mcts);
+# WORKERS e' o numero de processos (None: numero de CPUs), que sao mantidos entre as jogadas
+PARALLEL = None
+WORKERS = None
+
+# numero maximo de nos da arvore: acima dele, a busca continua sem expandir novos nos
+MAX_NODES = 200000
+MAX_POOL_NODES = 4000000  # um no' do NodePool ocupa ~27 bytes
+
+# playouts por folha no modo NODE_POOL, jogados juntos em lote (ver batch_playout) no othello,
+# em inteiros do python, sem NumPy (so' a biblioteca padrao); 1: um playout por folha, uniformemente aleatorio
+PLAYOUT_BATCH = 1
+
+# raiz da arvore mantida entre as jogadas (ver make_move)
+_tree = None
+# busca do modo NODE_POOL, com a sua arvore mantida entre as jogadas
+_pool_search = None
+# estatisticas da ultima busca aprimorada (playouts, tamanho da arvore, nos provados)
+last_stats = None
+# busca paralela do modo PARALLEL, com os seus processos (ver parallel_search)
+_parallel = None
+
+
 class Node:
     def __init__(self, state:GameState, parent: 'Node' = None, last_move=None):
         self.state = state
         self.parent = parent
         self.children = []
+        self.untried_moves = None  # legal moves not expanded yet (filled by the first expansion)
         self.visits = 0
-        self.value = 0
+        self.value = 0  # sum of the results from the point of view of the player who made last_move
         self.last_move = last_move
 
+    def is_fully_expanded(self) -> bool:
+        return self.untried_moves is not None and not self.untried_moves
+
+
+def subtree_size(node: Node) -> int:
+    """
+    Returns the number of nodes of the tree rooted at node
+    """
+    size = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        size += 1
+        stack.extend(node.children)
+    return size
+
+
+def find_subtree(root: Node, state: GameState, max_depth: int = 2):
+    """
+    Returns the node of the tree with the position of the state, searching the
+    first max_depth levels below root (our move and the opponent's reply), or None
+    """
+    key = position_key(state)
+    level = [root]
+    for _ in range(max_depth + 1):
+        for node in level:
+            if position_key(node.state) == key:
+                return node
+        level = [child for node in level for child in node.children]
+    return None
+
+
 def selection(node: Node):
-    while node.children:
-        node = max(node.children, key=lambda child: child.value / child.visits + sqrt(2 * log(node.visits) / child.visits))
+    while node.children and node.is_fully_expanded():
+        log_visits = log(node.visits)
+        node = max(node.children, key=lambda child: child.value / child.visits + sqrt(2 * log_visits / child.visits))
     return node
 
 def expansion(node: Node):
-    legal_moves = node.state.legal_moves()
-    move = random.choice(list(legal_moves))
+    if node.untried_moves is None:
+        node.untried_moves = list(node.state.legal_moves())
+        random.shuffle(node.untried_moves)
+    move = node.untried_moves.pop()
     next_state = node.state.next_state(move)
     child = Node(next_state, parent=node, last_move=move)  # Assign last_move during expansion
     node.children.append(child)
     return child
 
 def simulation(node: Node):
-    state = node.state.copy()
-    while not state.is_terminal():
-        legal_moves = state.legal_moves()
-        move = random.choice(list(legal_moves))
-        state = state.next_state(move)
-    return 1 if state.winner() == node.state.player else 0
-
-def backpropagation(node: Node, result: int):
+    """
+    Plays random moves from the node's state until the end of the game and returns the winner
+    """
+    return random_game(node.state)
+
+def backpropagation(node: Node, winner, n: int = 1):
+    """
+    Updates the statistics from node up to the root with the winner of n playouts
+    (1 for the player who made the move into each node, 0.5 for a draw)
+    """
     while node:
-        node.visits += 1
-        node.value += result
+        node.visits += n
+        if node.parent is not None:
+            mover = node.parent.state.player
+            node.value += n if winner == mover else 0.5 * n if winner is None else 0
         node = node.parent
 
 def monte_carlo_tree_search(root, max_time):
     start_time = time.time()
-    iteration = 0
-    
+    size = subtree_size(root)
+
     while time.time() - start_time < max_time:
-        selected_node = selection(root)
-        if not selected_node.state.is_terminal():
-            if not selected_node.children:
-                expanded_node = expansion(selected_node)
-                result = simulation(expanded_node)
-            else:
-                expanded_node = random.choice(selected_node.children)
-                result = simulation(expanded_node)
-        else:
-            result = 1 if selected_node.state.winner() == selected_node.state.player else 0
-        backpropagation(expanded_node, result)
-        
-        iteration += 1
-    
+        node = selection(root)
+        if not node.state.is_terminal() and size < MAX_NODES:
+            node = expansion(node)
+            size += 1
+        backpropagation(node, simulation(node))
+
+    if not root.children:  # not even one iteration
+        return random.choice(list(root.state.legal_moves()))
     best_child = max(root.children, key=lambda child: child.visits)
     return best_child.last_move
 
+def parallel_search():
+    """
+    Returns the search of the PARALLEL mode with WORKERS processes. It is kept between moves, so the
+    processes are started once; a new one replaces it if PARALLEL or WORKERS changed
+    """
+    global _parallel
+    if _parallel is None or (_parallel.mode, _parallel.workers) != (PARALLEL, WORKERS or os.cpu_count()):
+        if _parallel is not None:
+            _parallel.close()
+        _parallel = SharedTreeMCTS(WORKERS) if PARALLEL == TREE else ParallelMCTS(WORKERS, PARALLEL)
+    return _parallel
+
 def make_move(state:GameState) -> Tuple[int, int]:
     """
     Returns a move for the given game state.
     The game is not specified, but this is MCTS and should handle any game, since
     their implementation has the same interface.
+    The search continues from the tree of the previous call if it contains the state.
 
     :param state: state to make the move
     :return: (int, int) tuple with x, y coordinates of the move (remember: 0 is the first row/column)
     """
-    
-    root = Node(state)
+    global _tree, _pool_search, last_stats
+
+    if ENHANCED:
+        search = EnhancedMCTS(**ENHANCED_OPTIONS)
+        move = search.move(state, TIME_LIMIT)
+        last_stats = search.stats
+        return move
+
+    if PARALLEL is not None:
+        return parallel_search().move(state, TIME_LIMIT)
+
+    if NODE_POOL:
+        if _pool_search is None or not REUSE_TREE:
+            _pool_search = PoolMCTS(MAX_POOL_NODES, PLAYOUT_BATCH)
+        return _pool_search.move(state, TIME_LIMIT)
+
+    root = None
+    if REUSE_TREE and _tree is not None:
+        root = find_subtree(_tree, state)
+    if root is None:
+        root = Node(state)
+    root.parent = None  # the rest of the previous tree is unreachable now (and freed)
 
-    timeout = 4
-    return monte_carlo_tree_search(root, timeout)
\ No newline at end of file
+    move = monte_carlo_tree_search(root, TIME_LIMIT)
+    _tree = root
+    return move
@@ -1,47 +1,398 @@
+import time
 from typing import Tuple, Callable
 from ..tttm.gamestate import GameState
+from .transposition import TranspositionTable, EXACT, LOWER, UPPER
+from .move_ordering import MoveOrderer
+
+# search time per move of the othello minimax agents: iterative deepening up to this limit
+# (the server grants 5s per move by default)
+TIME_LIMIT = 4.5
+
+# bound type of a score seen from the other player's point of view
+_OPPOSITE_BOUND = {EXACT: EXACT, LOWER: UPPER, UPPER: LOWER}
+
+# depth stored in the transposition table for positions whose subtree was searched to the end of the game
+# (no node was cut by the depth limit): their scores are valid for any depth
+_SOLVED = float("inf")
+
+# width of the windows used by principal variation search to test moves after the first one
+# (any positive width is correct; scores closer than it to alpha are just searched exactly)
+_NULL_WINDOW = 1e-6
+
+
+class SearchStats(object):
+    """
+    Counters filled by minimax_move when given a stats object
+    """
+
+    def __init__(self):
+        self.nodes = 0          # positions visited (including the root and the leaves)
+        self.cutoffs = 0        # alpha-beta cutoffs
+        self.first_cutoffs = 0  # cutoffs caused by the first move searched at the node
+        self.researches = 0     # nodes searched again after a null window or aspiration window failed
+        self.max_ply = 0        # deepest ply visited
+        self.elapsed = 0.0      # seconds spent in minimax_move
+        self.score = None       # value of the move returned by the last search (a bound if it failed low)
+
+    @property
+    def first_cutoff_rate(self) -> float:
+        """
+        Fraction of the cutoffs caused by the first move (a measure of the move ordering quality)
+        """
+        return self.first_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def __str__(self):
+        rate = self.nodes / self.elapsed if self.elapsed else 0
+        return (f'{self.nodes} nodes, {self.cutoffs} cutoffs ({self.first_cutoff_rate:.0%} on the first move), '
+                f'{self.researches} re-searches, ply {self.max_ply}, {self.elapsed:.3f}s ({rate:.0f} nodes/s)')
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the deadline of an iterative deepening search has passed
+    """
+
+
+def _hash_move_first(moves, hash_move):
+    """
+    Returns the moves with the one suggested by the transposition table (if legal) first
+    """
+    if hash_move is None or hash_move not in moves:
+        return moves
+    return [hash_move] + [move for move in moves if move != hash_move]
+
 
 def minimax_move(
-    state: GameState, max_depth: int, eval_func: Callable
+    state: GameState, max_depth: int, eval_func: Callable, tt: TranspositionTable = None,
+    deadline: float = None, ordering: MoveOrderer = None, stats: SearchStats = None,
+    negamax: bool = False, aspiration: float = None, moves: list = None, alpha: float = float("-inf")
 ) -> Tuple[int, int]:
-    def minimax(node, depth, maximizing_player, alpha, beta):
-        if depth == 0 or node.is_terminal():
-            return eval_func(node, state.player)
+    """
+    Returns the best move for the player to move in state, according to
+    minimax search with alpha-beta pruning.
+    If a deadline is given, does iterative deepening instead: searches with depth 0, 1, 2...
+    up to max_depth and returns the best move of the deepest iteration completed before the deadline.
+    Each iteration starts with the previous best move (and, with a transposition table,
+    the previous best move of every position).
+    With negamax=True the search uses a single negamax core with principal variation search
+    (moves after the first are tested with a null window and searched again only if they may be better).
+    It returns the same move up to ties between equally valued moves.
+    :param state: state to make the move (any game with the GameState interface)
+    :param max_depth: depth limit of the search below the root's children (-1 for unlimited)
+    :param eval_func: function (state, player) -> float evaluating states from the player's point of view
+    :param tt: optional transposition table, needs states with a zobrist key (othello's GameState)
+    :param deadline: optional time.time() value at which an iterative deepening search must stop
+    :param ordering: optional MoveOrderer (otherwise moves are searched in legal_moves order,
+                     except for the transposition table's move)
+    :param stats: optional SearchStats, updated with the search counters
+    :param negamax: whether to use the negamax/PVS core instead of the minimax one
+    :param aspiration: half-width of the aspiration window of iterative deepening with negamax:
+                       each iteration first searches the root in (previous score - aspiration,
+                       previous score + aspiration), and again with a full window if the score falls outside
+    :param moves: optional list of root moves to search, in this order (default: all legal moves)
+    :param alpha: lower bound of the root window: if no move is better than alpha, the move
+                  returned is arbitrary and its score (see SearchStats.score) is only an upper bound
+    :return: (int, int) tuple with x, y coordinates of the move
+    """
+    if max_depth < 0:
+        max_depth = float("inf")
+
+    # states that support make_move/unmake_move (othello) are searched in-place on a
+    # private copy, instead of allocating a new state with next_state at every node
+    in_place = hasattr(state, "make_move")
+    if in_place:
+        state = state.copy()
+    player = state.player  # the state's player changes during an in-place search
+
+    if tt is not None and not hasattr(state, "zobrist"):
+        raise ValueError("A transposition table requires states with a zobrist key")
+    if tt is None and deadline is not None and hasattr(state, "zobrist"):
+        tt = TranspositionTable()  # carries the best moves from one iteration to the next
+
+    # whether some node was evaluated because of the depth limit (if not, deeper searches are pointless)
+    depth_limited = False
+
+    def play(node, move):
+        """
+        Returns the child of node after the move and the record to undo it
+        (None if the child is a new object)
+        """
+        if in_place:
+            return node, node.make_move(move)
+        return node.next_state(move), None
+
+    def ordered_moves(node, ply, hash_move):
+        """
+        Returns the legal moves of node in the order they should be searched
+        """
+        if ordering is not None:
+            return ordering.order(node.legal_moves(), ply, node.player, hash_move)
+        return _hash_move_first(node.legal_moves(), hash_move)
+
+    def cutoff(node, move, ply, depth, first):
+        """
+        Records a cutoff caused by the move (first: whether it was the first move searched)
+        """
+        if stats is not None:
+            stats.cutoffs += 1
+            stats.first_cutoffs += first
+        if ordering is not None:
+            ordering.cutoff(move, ply, node.player, depth)
+
+    def minimax(node, depth, alpha, beta, ply):
+        nonlocal depth_limited
+        if deadline is not None and time.time() >= deadline:
+            raise SearchTimeout()
+        if stats is not None:
+            stats.nodes += 1
+            if ply > stats.max_ply:
+                stats.max_ply = ply
+
+        if depth == 0:
+            depth_limited = True
+            return eval_func(node, player)
+        if node.is_terminal():
+            return eval_func(node, player)
+
+        # the player may move twice in a row if the opponent has to pass
+        maximizing_player = node.player == player
+
+        hash_move = None
+        bounded = False
+        if tt is not None:
+            key = node.zobrist
+            entry = tt.lookup(key)
+            if entry is not None:
+                hash_move = entry.move
+                if entry.depth >= depth:
+                    if entry.depth != _SOLVED:
+                        depth_limited = bounded = True  # the entry's score comes from a depth-limited search
+                    # entries are stored from the point of view of the player to move
+                    score, flag = entry.score, entry.flag
+                    if not maximizing_player:
+                        score, flag = -score, _OPPOSITE_BOUND[flag]
+                    if flag == EXACT:
+                        return score
+                    elif flag == LOWER:
+                        alpha = max(alpha, score)
+                    else:
+                        beta = min(beta, score)
+                    if beta <= alpha:
+                        return score
+        window = alpha, beta
+        best_move = None
+        # whether this node's subtree (or the entry that narrowed its window) met the depth limit
+        outer_limited, depth_limited = depth_limited, bounded
 
         if maximizing_player:
             max_eval = float("-inf")
-            for move in node.legal_moves():
-                child = node.next_state(move)
-                eval = minimax(child, depth - 1, False, alpha, beta)
-                max_eval = max(max_eval, eval)
+            for i, move in enumerate(ordered_moves(node, ply, hash_move)):
+                child, undo = play(node, move)
+                eval = minimax(child, depth - 1, alpha, beta, ply + 1)
+                if undo is not None:
+                    node.unmake_move(undo)
+                if eval > max_eval:
+                    max_eval, best_move = eval, move
                 alpha = max(alpha, eval)
                 if beta <= alpha:
+                    cutoff(node, move, ply, depth, i == 0)
                     break
-            return max_eval
+            value = max_eval
         else:
             min_eval = float("inf")
-            for move in node.legal_moves():
-                child = node.next_state(move)
-                eval = minimax(child, depth - 1, True, alpha, beta)
-                min_eval = min(min_eval, eval)
+            for i, move in enumerate(ordered_moves(node, ply, hash_move)):
+                child, undo = play(node, move)
+                eval = minimax(child, depth - 1, alpha, beta, ply + 1)
+                if undo is not None:
+                    node.unmake_move(undo)
+                if eval < min_eval:
+                    min_eval, best_move = eval, move
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    cutoff(node, move, ply, depth, i == 0)
                     break
-            return min_eval
-
-    best_move = None
-    best_eval = float("-inf")
-    alpha = float("-inf")
-    beta = float("inf")
-
-    for move in state.legal_moves():
-        child = state.next_state(move)
-        eval = minimax(child, max_depth, False, alpha, beta)
-        if eval > best_eval:
-            best_eval = eval
+            value = min_eval
+
+        if tt is not None:
+            flag = UPPER if value <= window[0] else LOWER if value >= window[1] else EXACT
+            stored_depth = depth if depth_limited else _SOLVED
+            if maximizing_player:
+                tt.store(key, stored_depth, value, flag, best_move)
+            else:
+                tt.store(key, stored_depth, -value, _OPPOSITE_BOUND[flag], best_move)
+        depth_limited = depth_limited or outer_limited
+        return value
+
+    def search_child(child, maximizing, depth, alpha, beta, ply, first):
+        """
+        Negamax value of child from the point of view of its parent's side (maximizing: whether
+        the parent's side is the root player), searched with principal variation search
+        """
+        # the player may move twice in a row if the opponent has to pass; a terminal
+        # child has no player to move, its side is the opponent's as usual
+        child_maximizing = child.player == player if child.player is not None else not maximizing
+        same_side = child_maximizing == maximizing
+
+        def search(alpha, beta):
+            if same_side:
+                return negamax_search(child, depth, alpha, beta, ply, child_maximizing)
+            return -negamax_search(child, depth, -beta, -alpha, ply, child_maximizing)
+
+        if first or alpha == float("-inf"):
+            return search(alpha, beta)
+        value = search(alpha, alpha + _NULL_WINDOW)  # can the move be better than the best so far?
+        if alpha < value < beta:
+            if stats is not None:
+                stats.researches += 1
+            value = search(alpha, beta)
+        return value
+
+    def negamax_search(node, depth, alpha, beta, ply, maximizing):
+        """
+        Returns the value of node from the point of view of its side: the root player's
+        if maximizing, the opponent's otherwise
+        """
+        nonlocal depth_limited
+        if deadline is not None and time.time() >= deadline:
+            raise SearchTimeout()
+        if stats is not None:
+            stats.nodes += 1
+            if ply > stats.max_ply:
+                stats.max_ply = ply
+
+        if depth == 0:
+            depth_limited = True
+            return eval_func(node, player) if maximizing else -eval_func(node, player)
+        if node.is_terminal():
+            return eval_func(node, player) if maximizing else -eval_func(node, player)
+
+        # the side of a non-terminal node is its player to move, as in the transposition table
+        hash_move = None
+        bounded = False
+        if tt is not None:
+            key = node.zobrist
+            entry = tt.lookup(key)
+            if entry is not None:
+                hash_move = entry.move
+                if entry.depth >= depth:
+                    if entry.depth != _SOLVED:
+                        depth_limited = bounded = True  # the entry's score comes from a depth-limited search
+                    if entry.flag == EXACT:
+                        return entry.score
+                    elif entry.flag == LOWER:
+                        alpha = max(alpha, entry.score)
+                    else:
+                        beta = min(beta, entry.score)
+                    if beta <= alpha:
+                        return entry.score
+        alpha_orig = alpha
+        # whether this node's subtree (or the entry that narrowed its window) met the depth limit
+        outer_limited, depth_limited = depth_limited, bounded
+
+        best_eval = float("-inf")
+        best_move = None
+        for i, move in enumerate(ordered_moves(node, ply, hash_move)):
+            child, undo = play(node, move)
+            eval = search_child(child, maximizing, depth - 1, alpha, beta, ply + 1, i == 0)
+            if undo is not None:
+                node.unmake_move(undo)
+            if eval > best_eval:
+                best_eval, best_move = eval, move
+            alpha = max(alpha, eval)
+            if beta <= alpha:
+                cutoff(node, move, ply, depth, i == 0)
+                break
+
+        if tt is not None:
+            flag = UPPER if best_eval <= alpha_orig else LOWER if best_eval >= beta else EXACT
+            tt.store(key, depth if depth_limited else _SOLVED, best_eval, flag, best_move)
+        depth_limited = depth_limited or outer_limited
+        return best_eval
+
+    root_alpha = alpha
+
+    def search_root(depth, first_move=None, alpha=root_alpha, beta=float("inf")):
+        """
+        Searches the root's children with the given depth and window
+        and returns the best move and its value
+        """
+        best_move = None
+        best_eval = float("-inf")
+        alpha_orig = alpha
+        if stats is not None:
+            stats.nodes += 1
+
+        hash_move = first_move
+        if hash_move is None and tt is not None:
+            entry = tt.lookup(state.zobrist)
+            if entry is not None:
+                hash_move = entry.move
+
+        root_moves = ordered_moves(state, 0, hash_move) if moves is None else moves
+        for i, move in enumerate(root_moves):
+            child, undo = play(state, move)
+            if negamax:
+                eval = search_child(child, True, depth, alpha, beta, 1, i == 0)
+            else:
+                eval = minimax(child, depth, alpha, beta, 1)
+            if undo is not None:
+                state.unmake_move(undo)
+            if eval > best_eval:
+                best_eval = eval
+                best_move = move
+            alpha = max(alpha, eval)
+            if beta <= alpha:
+                break
+
+        if stats is not None:
+            stats.score = best_eval
+        if tt is not None and best_move is not None and moves is None:  # not a full search otherwise
+            flag = UPPER if best_eval <= alpha_orig else LOWER if best_eval >= beta else EXACT
+            tt.store(state.zobrist, depth + 1 if depth_limited else _SOLVED, best_eval, flag, best_move)
+
+        return best_move, best_eval
+
+    def search():
+        """
+        Runs the fixed depth or the iterative deepening search and returns the best move
+        """
+        nonlocal depth_limited
+        if deadline is None:
+            return search_root(max_depth)[0]
+
+        # iterative deepening: keeps the move of the deepest completed iteration
+        best_move = next(iter(state.legal_moves() if moves is None else moves), None)
+        score = None
+        depth = 0
+        while depth <= max_depth:
+            depth_limited = False
+            try:
+                if negamax and aspiration is not None and score is not None:
+                    alpha, beta = max(root_alpha, score - aspiration), score + aspiration
+                    move, score = search_root(depth, best_move, alpha, beta)
+                    if not alpha < score < beta:  # outside the window: the value is just a bound
+                        if stats is not None:
+                            stats.researches += 1
+                        move, score = search_root(depth, move)
+                else:
+                    move, score = search_root(depth, best_move)
+            except SearchTimeout:
+                break
             best_move = move
-        alpha = max(alpha, eval)
-        if beta <= alpha:
-            break
+            if not depth_limited:  # the whole game tree was searched
+                break
+            depth += 1
+
+        return best_move
+
+    if ordering is not None:
+        ordering.new_search()
+    if tt is not None:
+        tt.new_search()
 
-    return best_move
+    start = time.time()
+    try:
+        return search()
+    finally:
+        if stats is not None:
+            stats.elapsed += time.time() - start
@@ -0,0 +1,74 @@
+class MoveOrderer(object):
+    """
+    Move ordering for alpha-beta search. Moves are tried in this order:
+    1. the hash move (best move stored in the transposition table, or the previous iteration's best move);
+    2. the killer moves of the ply (moves that recently caused a cutoff at the same depth of the tree);
+    3. the remaining moves, by history score (how often and how deep the move caused cutoffs)
+       plus a static square priority (e.g. EVAL_TEMPLATE), highest first.
+    The killers and history are learned during the search through cutoff(); an orderer
+    can be kept between searches (new_search ages what was learned).
+    """
+
+    def __init__(self, square_priority: list = None, n_killers: int = 2):
+        """
+        :param square_priority: optional matrix of static move priorities indexed as
+                                square_priority[y][x] for move (x, y) (e.g. EVAL_TEMPLATE)
+        :param n_killers: number of killer moves kept per ply
+        """
+        self.static = {}
+        if square_priority is not None:
+            self.static = {
+                (x, y): value for y, row in enumerate(square_priority) for x, value in enumerate(row)
+            }
+        self.n_killers = n_killers
+        self.killers = {}  # ply -> list of killer moves, most recent first
+        self.history = {}  # (player, move) -> history score
+
+    def new_search(self) -> None:
+        """
+        Prepares for a new search: forgets the killers (the plies refer to
+        another root) and halves the history scores, so recent cutoffs weigh more
+        """
+        self.killers = {}
+        self.history = {key: score >> 1 for key, score in self.history.items() if score > 1}
+
+    def order(self, moves, ply: int, player: str, hash_move=None) -> list:
+        """
+        Returns the moves in the order they should be searched
+        :param moves: legal moves of the node
+        :param ply: distance from the root
+        :param player: player to move at the node
+        :param hash_move: move to search first, if legal
+        :return: list
+        """
+        history, static = self.history, self.static
+        first = []
+        if hash_move is not None and hash_move in moves:
+            first.append(hash_move)
+        for killer in self.killers.get(ply, ()):
+            if killer in moves and killer not in first:
+                first.append(killer)
+
+        rest = sorted(
+            (move for move in moves if move not in first),
+            key=lambda move: history.get((player, move), 0) + static.get(move, 0),
+            reverse=True,
+        )
+        return first + rest
+
+    def cutoff(self, move, ply: int, player: str, depth) -> None:
+        """
+        Records that the move caused a beta cutoff
+        :param move: the move that caused the cutoff
+        :param ply: distance from the root
+        :param player: player that made the move
+        :param depth: remaining depth of the node (deeper cutoffs weigh more)
+        """
+        killers = self.killers.setdefault(ply, [])
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.n_killers:]
+
+        bonus = depth * depth if depth < 64 else 4096  # depth may be infinite
+        self.history[(player, move)] = self.history.get((player, move), 0) + bonus
@@ -0,0 +1,131 @@
+from array import array
+from math import sqrt, log
+from typing import Tuple
+
+NO_NODE = -1
+
+
+def encode_move(move: Tuple[int, int]) -> int:
+    """
+    Packs a (x, y) move into an int (coordinates up to 255)
+    """
+    x, y = move
+    return (x << 8) | y
+
+
+def decode_move(code: int) -> Tuple[int, int]:
+    """
+    Inverse of encode_move
+    """
+    return code >> 8, code & 0xFF
+
+
+class NodePool(object):
+    """
+    MCTS tree stored as a struct of arrays: a node is an index, and each field is an
+    array with one entry per node. Node 0 is the root, and the children of a node are
+    created together and occupy consecutive indices (first_child[node] ... + n_children[node] - 1).
+    Nodes store no game state: the state of a node is obtained by playing the moves
+    of its path from the root state. This takes ~27 bytes per node instead of a Node
+    object with its own GameState.
+    The fields are arrays of the standard array module, not NumPy arrays: numpy is in environment.yml,
+    but it is not installed where the kit is tested, and the Readme asks only for the standard library.
+    """
+
+    def __init__(self):
+        self.parent = array('i', [NO_NODE])
+        self.first_child = array('i', [NO_NODE])
+        self.n_children = array('H', [0])
+        self.move = array('i', [0])       # encoded move into the node (see encode_move)
+        self.mover = array('B', [0])      # ord() of the player who made that move (0 for the root)
+        self.visits = array('i', [0])
+        self.value = array('d', [0.0])    # results from the point of view of the mover (draws count half)
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def memory(self) -> int:
+        """
+        Returns the number of bytes used by the arrays
+        """
+        arrays = (self.parent, self.first_child, self.n_children, self.move, self.mover, self.visits, self.value)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def add_children(self, node: int, moves: list, mover: str) -> int:
+        """
+        Creates one child of node per move and returns the index of the first one
+        :param moves: moves of the children, in the order they will be tried
+        :param mover: player to move at node
+        """
+        first, n = len(self.parent), len(moves)
+        self.parent.extend([node] * n)
+        self.first_child.extend([NO_NODE] * n)
+        self.n_children.extend([0] * n)
+        self.move.extend([encode_move(move) for move in moves])
+        self.mover.extend([ord(mover)] * n)
+        self.visits.extend([0] * n)
+        self.value.extend([0.0] * n)
+        self.first_child[node], self.n_children[node] = first, n
+        return first
+
+    def children(self, node: int) -> range:
+        first = self.first_child[node]
+        return range(first, first + self.n_children[node])
+
+    def select_child(self, node: int) -> int:
+        """
+        Returns the child of node with the best UCB score (an unvisited child, if any),
+        computed over slices of the arrays instead of walking objects
+        """
+        first = self.first_child[node]
+        end = first + self.n_children[node]
+        visits = self.visits[first:end]
+        if 0 in visits:
+            return first + visits.index(0)
+        c = 2 * log(self.visits[node])
+        scores = [w / v + sqrt(c / v) for w, v in zip(self.value[first:end], visits)]
+        return first + scores.index(max(scores))
+
+    def best_child(self, node: int) -> int:
+        """
+        Returns the most visited child of node
+        """
+        first = self.first_child[node]
+        visits = self.visits[first:first + self.n_children[node]]
+        return first + visits.index(max(visits))
+
+    def backpropagate(self, node: int, winner, n: int = 1) -> None:
+        """
+        Adds the winner of n playouts to the statistics from node up to the root
+        """
+        winner = ord(winner) if winner is not None else 0
+        parent, mover, visits, value = self.parent, self.mover, self.visits, self.value
+        while node != NO_NODE:
+            visits[node] += n
+            if mover[node]:
+                value[node] += n if mover[node] == winner else 0.5 * n if winner == 0 else 0
+            node = parent[node]
+
+    def subtree(self, node: int) -> 'NodePool':
+        """
+        Returns a new pool with the subtree of node (its root becomes node 0);
+        the other nodes, unreachable from it, are dropped
+        """
+        pool = NodePool()
+        pool.visits[0], pool.value[0] = self.visits[node], self.value[node]
+        queue = [(node, 0)]  # (index here, index in the new pool)
+        for old, new in queue:
+            if not self.n_children[old]:
+                continue
+            first = len(pool)
+            for child in self.children(old):
+                pool.parent.append(new)
+                pool.first_child.append(NO_NODE)
+                pool.n_children.append(0)
+                pool.move.append(self.move[child])
+                pool.mover.append(self.mover[child])
+                pool.visits.append(self.visits[child])
+                pool.value.append(self.value[child])
+                queue.append((child, len(pool) - 1))
+            pool.first_child[new], pool.n_children[new] = first, self.n_children[old]
+        return pool
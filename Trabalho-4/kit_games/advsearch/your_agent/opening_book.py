@@ -0,0 +1,226 @@
+"""
+Othello opening book: positions met in self-play games, each one with the move that scored best in them
+(ranked by a lower confidence bound of its mean result, so a move is not trusted on a couple of lucky games).
+Positions are folded by the 8 symmetries of the board (a position and its rotations/reflections share an
+entry, see Board.canonical_key) and stored in a file of fixed-size records sorted by key, which is
+memory-mapped and binary-searched, so a lookup reads a few records instead of loading the book.
+Build it with: python -m advsearch.your_agent.opening_book (python -m advsearch.your_agent.opening_book -h for options)
+"""
+import os
+import math
+import mmap
+import time
+import random
+import struct
+import argparse
+from collections import defaultdict
+from typing import Tuple
+
+from ..othello.board import Board
+from ..othello.bitboard import BitBoard, SQUARE_MOVES
+from ..othello.symmetry import SYMMETRIES, orbit, transform
+from ..othello.gamestate import GameState
+from .minimax import minimax_move
+from .endgame import endgame_move
+from .othello_minimax_mask import evaluate_mask_bitwise
+
+# own, opp (canonical bitboards of the player to move and of the opponent), move square (in the canonical
+# orientation), number of games and mean result of the move for the player to move (1 win, 0.5 draw, 0 loss)
+RECORD = struct.Struct('<QQBxHf')
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening_book.bin')
+
+# games needed to write a move to the book (BookBuilder.write) and to play it (OpeningBook.lookup)
+MIN_GAMES = 8
+
+# mean result below which the book move is not written or played (the agent searches instead)
+MIN_SCORE = 0.5
+
+# z-score of the lower confidence bound used to rank the moves of a position (one-sided 95%)
+CONFIDENCE_Z = 1.645
+
+
+def lower_bound(points: float, games: int, z: float = CONFIDENCE_Z) -> float:
+    """
+    Returns the Wilson score lower bound of the mean result of a move (results in [0, 1], draws count 0.5)
+    :param points: sum of the results
+    :param games: number of games
+    :param z: z-score of the bound
+    :return: float
+    """
+    mean, z2 = points / games, z * z / games
+    spread = z * math.sqrt(mean * (1 - mean) / games + z2 / (4 * games))
+    return (mean + z2 / 2 - spread) / (1 + z2)
+
+
+def _book_key(state) -> Tuple[int, int, int]:
+    """
+    Returns the canonical (own, opp) of an othello state (own: discs of the player to move,
+    in the canonical orientation of Board.canonical_key) and the symmetry that gives it
+    """
+    black, white, symmetry = state.board.canonical_key()
+    if state.player == Board.BLACK:
+        return black, white, symmetry
+    return white, black, symmetry
+
+
+def _canonical_move(state, move: Tuple[int, int]) -> Tuple[int, int, int]:
+    """
+    Returns the canonical (own, opp) of a state and the square of a move in that orientation
+    (the smallest one among the moves equivalent to it, if the canonical position is itself symmetric)
+    """
+    own, opp, symmetry = _book_key(state)
+    x, y = state.board.transform_move(move, symmetry)
+    own_orbit, opp_orbit = orbit(own), orbit(opp)
+    square = min(
+        transform(1 << (y * 8 + x), s) for s in SYMMETRIES if own_orbit[s] == own and opp_orbit[s] == opp
+    )
+    return own, opp, square.bit_length() - 1
+
+
+class OpeningBook(object):
+    """
+    Read-only view of a book file (an empty book if the file does not exist).
+    Entries with fewer than min_games games or a mean result below min_score are ignored by lookup
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, min_games: int = MIN_GAMES, min_score: float = MIN_SCORE):
+        self.path = path
+        self.min_games, self.min_score = min_games, min_score
+        self._data = None
+        self.size = 0  # number of positions
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb') as book_file:
+                self._data = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.size = len(self._data) // RECORD.size
+
+    def _find(self, own: int, opp: int):
+        """
+        Binary search for a canonical position: returns its (move square, games, mean result) or None
+        """
+        data, low, high = self._data, 0, self.size
+        while low < high:
+            mid = (low + high) // 2
+            key_own, key_opp, square, games, value = RECORD.unpack_from(data, mid * RECORD.size)
+            if (key_own, key_opp) < (own, opp):
+                low = mid + 1
+            elif (key_own, key_opp) > (own, opp):
+                high = mid
+            else:
+                return square, games, value
+        return None
+
+    def lookup(self, state) -> Tuple[int, int]:
+        """
+        Returns the book move for an othello state, or None if the position is not in the book
+        or its move is not reliable enough (see min_games and min_score)
+        :param state: othello GameState (with a Board or a BitBoard)
+        :return: (int, int) tuple with x, y coordinates of the move, or None
+        """
+        if not self.size or state.player is None:
+            return None
+        own, opp, symmetry = _book_key(state)
+        entry = self._find(own, opp)
+        if entry is None or entry[1] < self.min_games or entry[2] < self.min_score:
+            return None
+        move = state.board.inverse_transform_move(SQUARE_MOVES[entry[0]], symmetry)
+        return move if state.is_legal_move(move) else None
+
+    def close(self) -> None:
+        if self._data is not None:
+            self._data.close()
+            self._data, self.size = None, 0
+
+
+class BookBuilder(object):
+    """
+    Plays self-play games and aggregates the results of the moves of their first plies by canonical position
+    """
+
+    def __init__(self, plies: int = 12, depth: int = 3, finish_depth: int = 1, epsilon: float = 0.25,
+                 endgame_empties: int = 12, rng: random.Random = None):
+        """
+        :param plies: moves of each game recorded in the book
+        :param depth: minimax depth of the book moves
+        :param finish_depth: minimax depth of the rest of the game
+        :param epsilon: probability of a random book move (so the games differ)
+        :param endgame_empties: empty squares from which the rest of the game is played perfectly
+        """
+        self.plies, self.depth, self.finish_depth = plies, depth, finish_depth
+        self.epsilon, self.endgame_empties = epsilon, endgame_empties
+        self.rng = rng or random.Random()
+        self.stats = defaultdict(lambda: [0, 0.0])  # (own, opp, canonical square) -> [games, points]
+
+    def _choose(self, state, depth: int) -> Tuple[int, int]:
+        if state.board.piece_count[Board.EMPTY] <= self.endgame_empties:
+            return endgame_move(state)
+        return minimax_move(state, depth, evaluate_mask_bitwise)
+
+    def play_game(self) -> None:
+        """
+        Plays one game and adds the results of its first plies to the statistics
+        """
+        state = GameState(BitBoard(), Board.BLACK)
+        recorded = []  # (canonical key and square, player) of the book plies
+        for _ in range(self.plies):
+            if state.is_terminal():
+                break
+            if self.rng.random() < self.epsilon:
+                move = self.rng.choice(sorted(state.legal_moves()))
+            else:
+                move = self._choose(state, self.depth)
+            recorded.append((_canonical_move(state, move), state.player))
+            state = state.next_state(move)
+        while not state.is_terminal():
+            state = state.next_state(self._choose(state, self.finish_depth))
+
+        winner = state.winner()
+        for key, player in recorded:
+            entry = self.stats[key]
+            entry[0] += 1
+            entry[1] += 1.0 if winner == player else 0.5 if winner is None else 0.0
+
+    def write(self, path: str, min_games: int = MIN_GAMES, min_score: float = MIN_SCORE) -> int:
+        """
+        Writes the best move of each position (highest lower confidence bound of the mean result,
+        ties broken by games) among its moves played at least min_games times, with its games and mean result.
+        Positions whose best move has a mean result below min_score are left out
+        :return: number of positions written
+        """
+        best = {}
+        for (own, opp, square), (games, points) in self.stats.items():
+            if games < min_games:
+                continue
+            candidate = (lower_bound(points, games), games, square, points / games)
+            if (own, opp) not in best or candidate > best[own, opp]:
+                best[own, opp] = candidate
+        best = {key: candidate for key, candidate in best.items() if candidate[3] >= min_score}
+        with open(path, 'wb') as book_file:
+            for (own, opp), (_, games, square, value) in sorted(best.items()):
+                book_file.write(RECORD.pack(own, opp, square, min(games, 0xFFFF), value))
+        return len(best)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Builds the othello opening book from self-play games.')
+    parser.add_argument('-g', '--games', type=int, default=200, help='Number of self-play games.')
+    parser.add_argument('-p', '--plies', type=int, default=12, help='Moves of each game recorded in the book.')
+    parser.add_argument('-d', '--depth', type=int, default=3, help='Minimax depth of the book moves.')
+    parser.add_argument('-e', '--epsilon', type=float, default=0.25, help='Probability of a random book move.')
+    parser.add_argument('-m', '--min-games', type=int, default=MIN_GAMES, help='Games needed to keep a move.')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Random seed.')
+    parser.add_argument('-o', '--output', default=DEFAULT_PATH, help='Book file.')
+    args = parser.parse_args()
+
+    builder = BookBuilder(args.plies, args.depth, epsilon=args.epsilon, rng=random.Random(args.seed))
+    start = time.time()
+    for game in range(args.games):
+        builder.play_game()
+        if (game + 1) % 50 == 0:
+            print(f'{game + 1} games, {len(builder.stats)} position-moves, {time.time() - start:.0f}s')
+    positions = builder.write(args.output, args.min_games)
+    print(f'{positions} positions written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,12 @@
+import time
 import random
 from typing import Tuple
 from ..othello.gamestate import GameState
 from ..othello.board import Board
-from .minimax import minimax_move  # Certifique-se de ter o módulo minimax definido e importado corretamente.
+from .minimax import minimax_move, TIME_LIMIT  # Certifique-se de ter o módulo minimax definido e importado corretamente.
+from .positional import othello_orderer
+
+MOVE_ORDERING = othello_orderer()
 
 def make_move(state) -> Tuple[int, int]:
     """
@@ -10,7 +14,8 @@ def make_move(state) -> Tuple[int, int]:
     :param state: state to make the move
     :return: (int, int) tuple with x, y coordinates of the move (remember: 0 is the first row/column)
     """
-    return minimax_move(state, 4, evaluate_count)  # Chamando o algoritmo Minimax com a função de avaliação
+    return minimax_move(state, -1, evaluate_count, deadline=time.time() + TIME_LIMIT,
+                        ordering=MOVE_ORDERING)  # Chamando o algoritmo Minimax com a função de avaliação
 
 def evaluate_count(state, player: str) -> float:
     """
@@ -1,8 +1,26 @@
+import time
 import random
 from typing import Tuple
 from ..othello.gamestate import GameState
 from ..othello.board import Board
-from .minimax import minimax_move
+from .minimax import minimax_move, TIME_LIMIT
+from .transposition import TranspositionTable
+from .positional import othello_orderer
+
+# uma tabela de transposicao por cor, mantida entre as jogadas
+# (os valores do minimax dependem do jogador na raiz)
+TRANSPOSITION_TABLES = {Board.BLACK: TranspositionTable(), Board.WHITE: TranspositionTable()}
+
+MOVE_ORDERING = othello_orderer()
+
+# pesos das diferencas (jogador - oponente) de cada caracteristica do tabuleiro em evaluate_custom
+MOBILITY_WEIGHT = 10
+POTENTIAL_MOBILITY_WEIGHT = 4
+FRONTIER_WEIGHT = -4
+STABLE_WEIGHT = 25
+
+# valor de uma vitoria, acima de qualquer estimativa de estado nao terminal
+WIN_SCORE = 10000.0
 
 def make_move(state) -> Tuple[int, int]:
     """
@@ -11,7 +29,8 @@ def make_move(state) -> Tuple[int, int]:
     :return: (int, int) tuple with x, y coordinates of the move (remember: 0 is the first row/column)
     """
     player_color = state.player
-    return minimax_move(state, 4, evaluate_custom)
+    return minimax_move(state, -1, evaluate_custom, TRANSPOSITION_TABLES[player_color], deadline=time.time() + TIME_LIMIT,
+                        ordering=MOVE_ORDERING)
 
 def heuristic_move_ordering(game_state: GameState, color: str) -> list:
     legal_moves = game_state.legal_moves()
@@ -46,21 +65,31 @@ def evaluate_move(game_state: GameState, move: Tuple[int, int], color: str) -> f
 def evaluate_custom(state: GameState, player: str) -> float:
     """
     Evaluates an Othello state from the point of view of the given player.
-    If the state is terminal, returns its utility.
-    If non-terminal, returns an estimate of its value based on the difference in the number of pieces.
+    If the state is terminal, returns its utility (WIN_SCORE for a win).
+    If non-terminal, returns a weighted sum of the differences in mobility, potential mobility,
+    frontier discs, stable discs and pieces, all computed in one bitwise pass (see Board.features).
     :param state: state to evaluate (instance of GameState)
     :param player: player to evaluate the state for (B or W)
     :return: a float representing the estimated value of the state (higher is better for the player)
     """
-    player_pieces = state.get_board().num_pieces(player)
-    opponent_pieces = state.get_board().num_pieces(Board.opponent(player))
+    board = state.get_board()
+    opponent = Board.opponent(player)
+    player_pieces = board.num_pieces(player)
+    opponent_pieces = board.num_pieces(opponent)
 
     if state.is_terminal():
         if player_pieces > opponent_pieces:
-            return 1.0  # Player wins
+            return WIN_SCORE  # Player wins
         elif player_pieces < opponent_pieces:
-            return -1.0  # Player loses
+            return -WIN_SCORE  # Player loses
         else:
             return 0.0  # It's a draw
-    else:
-        return player_pieces - opponent_pieces  # Simple difference in piece count
+
+    features = board.features()
+    return (
+        MOBILITY_WEIGHT * (features.mobility[player] - features.mobility[opponent])
+        + POTENTIAL_MOBILITY_WEIGHT * (features.potential_mobility[player] - features.potential_mobility[opponent])
+        + FRONTIER_WEIGHT * (features.frontier[player] - features.frontier[opponent])
+        + STABLE_WEIGHT * (features.stable[player] - features.stable[opponent])
+        + player_pieces - opponent_pieces
+    )
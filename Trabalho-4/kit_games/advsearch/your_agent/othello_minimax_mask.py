@@ -1,37 +1,41 @@
+import time
 import random
 from typing import Tuple
 from ..othello.gamestate import GameState
 from ..othello.board import Board
-from .minimax import minimax_move  # Certifique-se de ter o módulo minimax definido e importado corretamente.
-
-# mask template adjusted from https://web.fe.up.pt/~eol/IA/MIA0203/trabalhos/Damas_Othelo/Docs/Eval.html
-# could optimize for symmetries but just put all values here for coding speed :P
-# DO NOT CHANGE!
-EVAL_TEMPLATE = [
-    [100, -30, 6, 2, 2, 6, -30, 100],
-    [-30, -50, 1, 1, 1, 1, -50, -30],
-    [  6,   1, 1, 1, 1, 1,   1,   6],
-    [  2,   1, 1, 3, 3, 1,   1,   2],
-    [  2,   1, 1, 3, 3, 1,   1,   2],
-    [  6,   1, 1, 1, 1, 1,   1,   6],
-    [-30, -50, 1, 1, 1, 1, -50, -30],
-    [100, -30, 6, 2, 2, 6, -30, 100]
+from ..othello.bitboard import popcount
+from .minimax import minimax_move, TIME_LIMIT  # Certifique-se de ter o módulo minimax definido e importado corretamente.
+from .transposition import TranspositionTable
+from .positional import EVAL_TEMPLATE, othello_orderer
+
+# uma tabela de transposicao por cor, mantida entre as jogadas
+# (os valores do minimax dependem do jogador na raiz)
+TRANSPOSITION_TABLES = {Board.BLACK: TranspositionTable(), Board.WHITE: TranspositionTable()}
+
+# casas de cada peso do EVAL_TEMPLATE, como mascaras de bits (casa y*8 + x), para evaluate_mask_bitwise
+WEIGHT_MASKS = [
+    (weight, sum(1 << (y * 8 + x) for y in range(8) for x in range(8) if EVAL_TEMPLATE[y][x] == weight))
+    for weight in sorted({value for row in EVAL_TEMPLATE for value in row})
 ]
 
+MOVE_ORDERING = othello_orderer()
+
 def make_move(state) -> Tuple[int, int]:
     """
     Returns a move for the given game state
     :param state: state to make the move
     :return: (int, int) tuple with x, y coordinates of the move (remember: 0 is the first row/column)
     """
-    return minimax_move(state, 4, evaluate_mask)  # Chamando o algoritmo Minimax com a função de avaliação
+    tt = TRANSPOSITION_TABLES[state.player]
+    return minimax_move(state, -1, evaluate_mask_bitwise, tt, deadline=time.time() + TIME_LIMIT,
+                        ordering=MOVE_ORDERING)  # Chamando o algoritmo Minimax com a função de avaliação
 
 def evaluate_mask(state, player: str) -> float:
     """
     Evaluates an othello state from the point of view of the given player. 
     If the state is terminal, returns its utility. 
     If non-terminal, returns an estimate of its value based on the positional value of the pieces.
-    You must use the EVAL_TEMPLATE above to compute the positional value of the pieces.
+    You must use the EVAL_TEMPLATE (see positional) to compute the positional value of the pieces.
     :param state: state to evaluate (instance of GameState)
     :param player: player to evaluate the state for (B or W)
     """
@@ -48,3 +52,14 @@ def evaluate_mask(state, player: str) -> float:
                 opponent_value += EVAL_TEMPLATE[row][col]
 
     return player_value - opponent_value
+
+def evaluate_mask_bitwise(state, player: str) -> float:
+    """
+    Same value as evaluate_mask, computed with one mask per weight of EVAL_TEMPLATE and popcounts
+    instead of a loop over the 64 squares (drop-in eval_func for minimax_move)
+    :param state: state to evaluate (instance of GameState)
+    :param player: player to evaluate the state for (B or W)
+    """
+    black, white = state.get_board().bitboards()
+    own, opp = (black, white) if player == Board.BLACK else (white, black)
+    return sum(weight * (popcount(own & mask) - popcount(opp & mask)) for weight, mask in WEIGHT_MASKS)
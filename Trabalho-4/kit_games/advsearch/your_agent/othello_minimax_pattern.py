@@ -0,0 +1,23 @@
+import time
+from typing import Tuple
+from ..othello.board import Board
+from .minimax import minimax_move, TIME_LIMIT
+from .transposition import TranspositionTable
+from .positional import othello_orderer
+from .pattern_eval import evaluate_pattern
+
+# uma tabela de transposicao por cor, mantida entre as jogadas
+# (os valores do minimax dependem do jogador na raiz)
+TRANSPOSITION_TABLES = {Board.BLACK: TranspositionTable(), Board.WHITE: TranspositionTable()}
+
+MOVE_ORDERING = othello_orderer()
+
+def make_move(state) -> Tuple[int, int]:
+    """
+    Returns a move for the given game state, searched with the pattern evaluation (see pattern_eval)
+    :param state: state to make the move
+    :return: (int, int) tuple with x, y coordinates of the move (remember: 0 is the first row/column)
+    """
+    tt = TRANSPOSITION_TABLES[state.player]
+    return minimax_move(state, -1, evaluate_pattern, tt, deadline=time.time() + TIME_LIMIT,
+                        ordering=MOVE_ORDERING)
@@ -0,0 +1,135 @@
+import time
+import multiprocessing as mp
+from typing import Tuple, Callable
+from concurrent.futures import ProcessPoolExecutor
+
+from ..othello.gamestate import GameState
+from ..othello.position import Position
+from .minimax import minimax_move, SearchStats
+
+# the workers search with alpha lowered by this amount, so a move exactly as good as the
+# best one so far gets its exact value (and ties are resolved in move order, as sequentially)
+_TIE_MARGIN = 1e-6
+
+# best root score found so far by any process of the search (set in the workers by _init_worker)
+_shared_alpha = None
+
+
+def _init_worker(shared_alpha) -> None:
+    """
+    Pool initializer: keeps the shared alpha bound (it can only be passed to processes at creation)
+    """
+    global _shared_alpha
+    _shared_alpha = shared_alpha
+
+
+def _search_root_move(position: Position, move, max_depth: int, eval_func: Callable, deadline: float = None):
+    """
+    Worker task: searches a single root move of the position and raises the shared alpha if it is better
+    :param position: the root, cheaper to send than a GameState
+    :param move: root move to search
+    :param deadline: optional time.time() value at which the search is abandoned
+    :return: (move, score), where a score below the alpha read at the start is only an upper bound
+             (score is None if the deadline passed before the search reached max_depth)
+    """
+    state = position.to_state()
+
+    alpha = _shared_alpha.value
+    stats = SearchStats()
+    minimax_move(state, max_depth, eval_func, stats=stats, moves=[move], alpha=alpha - _TIE_MARGIN,
+                 deadline=deadline)
+    if deadline is not None and time.time() >= deadline:
+        return move, None
+    if stats.score > alpha:
+        with _shared_alpha.get_lock():
+            if stats.score > _shared_alpha.value:
+                _shared_alpha.value = stats.score
+    return move, stats.score
+
+
+class ParallelSearch(object):
+    """
+    Othello minimax split at the root across a pool of processes, young brothers wait style:
+    the first root move is searched in this process to get a good alpha bound, then the remaining
+    moves are searched by the workers, which share the best score found so far.
+    With a fixed depth, the returned move is the one minimax_move returns with the same depth and move order;
+    with a deadline, each depth of an iterative deepening is split this way.
+    The evaluation function must be picklable (i.e. defined at the top level of a module).
+    Use it as a context manager or call close() to stop the workers.
+    """
+
+    def __init__(self, workers: int = None):
+        """
+        :param workers: number of worker processes (default: number of CPUs)
+        """
+        self.shared_alpha = mp.Value('d', float("-inf"))
+        self.executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self.shared_alpha,))
+
+    def move(self, state: GameState, max_depth: int, eval_func: Callable, deadline: float = None) -> Tuple[int, int]:
+        """
+        Returns the best move for the player to move in state (see minimax_move)
+        :param state: othello state (with a Board or a BitBoard)
+        :param max_depth: depth limit of the search below the root's children (-1 for unlimited, with a deadline)
+        :param eval_func: function (state, player) -> float evaluating states from the player's point of view
+        :param deadline: optional time.time() value: searches with depth 0, 1, 2... up to max_depth and
+                         returns the best move of the deepest depth completed before it
+        :return: (int, int) tuple with x, y coordinates of the move
+        """
+        moves = list(state.legal_moves())
+        if len(moves) <= 1:
+            return moves[0] if moves else None
+        if deadline is None:
+            return self._split(state, moves, max_depth, eval_func)
+
+        # no game lasts more plies than there are empty squares, so deeper searches are pointless
+        empties = state.board.piece_count[state.board.EMPTY]
+        max_depth = empties if max_depth < 0 else min(max_depth, empties)
+        best_move = moves[0]
+        for depth in range(max_depth + 1):
+            move = self._split(state, moves, depth, eval_func, deadline)
+            if move is None:
+                break
+            best_move = move
+        return best_move
+
+    def _split(self, state: GameState, moves: list, max_depth: int, eval_func: Callable, deadline: float = None):
+        """
+        Searches the root moves with the given depth, the first one here and the others in the workers,
+        and returns the best one (None if the deadline passed before the search finished)
+        """
+        # the eldest brother is searched sequentially
+        stats = SearchStats()
+        minimax_move(state, max_depth, eval_func, stats=stats, moves=moves[:1], deadline=deadline)
+        if deadline is not None and time.time() >= deadline:
+            return None
+        best_move, best_score = moves[0], stats.score
+
+        position = Position.from_state(state)
+        self.shared_alpha.value = best_score
+        futures = [
+            self.executor.submit(_search_root_move, position, move, max_depth, eval_func, deadline)
+            for move in moves[1:]
+        ]
+
+        # first best move in the root order; the scores that are only bounds are below the best one
+        for future in futures:
+            move, score = future.result()
+            if score is None:
+                for pending in futures:
+                    pending.cancel()
+                return None
+            if score > best_score:
+                best_move, best_score = move, score
+        return best_move
+
+    def close(self) -> None:
+        """
+        Stops the worker processes
+        """
+        self.executor.shutdown()
+
+    def __enter__(self) -> 'ParallelSearch':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,144 @@
+import os
+import time
+import random
+from collections import Counter
+from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor
+
+from ..othello.board import Board
+from ..othello.position import Position
+from .node_pool import decode_move
+from .playout import random_game
+from .pool_mcts import PoolMCTS
+
+ROOT = 'root'  # each worker grows its own tree, the root visit counts are summed
+LEAF = 'leaf'  # a single tree, each leaf is evaluated by a batch of playouts spread over the workers
+
+
+def _pack(state):
+    """
+    Returns a compact picklable form of the state: a Position for othello, the state itself otherwise
+    """
+    if isinstance(state.board, Board):
+        return Position.from_state(state)
+    return state
+
+
+def _unpack(packed):
+    """
+    Inverse of _pack (othello states are rebuilt on a BitBoard)
+    """
+    if isinstance(packed, Position):
+        return packed.to_state()
+    return packed
+
+
+def _init_worker() -> None:
+    """
+    Pool initializer: forked workers would otherwise inherit the same random generator state
+    """
+    random.seed(os.urandom(16))
+
+
+def _root_search(packed, max_time: float) -> list:
+    """
+    Worker task of root parallelism: runs a whole MCTS from the state
+    :return: list of (move, visits, value) of the root's children
+    """
+    search = PoolMCTS()
+    search.move(_unpack(packed), max_time)
+    pool = search.pool
+    return [(decode_move(pool.move[child]), pool.visits[child], pool.value[child]) for child in pool.children(0)]
+
+
+def _playouts(packed, n: int) -> Counter:
+    """
+    Worker task of leaf parallelism: runs n random playouts from the state
+    :return: Counter of the winners
+    """
+    state = _unpack(packed)
+    return Counter(random_game(state) for _ in range(n))
+
+
+class ParallelMCTS(object):
+    """
+    MCTS over a pool of processes, with root parallelism (independent trees whose root
+    statistics are merged) or leaf parallelism (one tree, with the playouts of each new leaf
+    run in parallel). Use it as a context manager or call close() to stop the workers.
+    """
+
+    def __init__(self, workers: int = None, mode: str = ROOT, leaf_batch: int = 1):
+        """
+        :param workers: number of worker processes (default: number of CPUs)
+        :param mode: ROOT or LEAF
+        :param leaf_batch: playouts per worker for each leaf in LEAF mode
+        """
+        if mode not in (ROOT, LEAF):
+            raise ValueError(f"Unknown parallel MCTS mode: {mode}")
+        self.workers = workers or os.cpu_count()
+        self.mode = mode
+        self.leaf_batch = leaf_batch
+        self.playouts = 0  # playouts of the last search
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+
+    def move(self, state, max_time: float) -> Tuple[int, int]:
+        """
+        Returns the move with the most visits at the root after searching for max_time seconds
+        :param state: state to make the move (any game with the GameState interface)
+        :param max_time: search time in seconds
+        :return: (int, int) tuple with x, y coordinates of the move
+        """
+        if self.mode == ROOT:
+            visits = self._root_parallel(state, max_time)
+        else:
+            visits = self._leaf_parallel(state, max_time)
+        if not visits:  # not even one iteration
+            return random.choice(list(state.legal_moves()))
+        return max(visits, key=visits.get)
+
+    def _root_parallel(self, state, max_time: float) -> Counter:
+        """
+        Runs one search per worker and returns the summed visits of each root move
+        """
+        packed = _pack(state)
+        futures = [self.executor.submit(_root_search, packed, max_time) for _ in range(self.workers)]
+        visits = Counter()
+        for future in futures:
+            for move, n, _ in future.result():
+                visits[move] += n
+        self.playouts = sum(visits.values())
+        return visits
+
+    def _leaf_parallel(self, state, max_time: float) -> Counter:
+        """
+        Grows a single tree, evaluating each expanded leaf with workers * leaf_batch playouts,
+        and returns the visits of each root move
+        """
+        start_time = time.time()
+        search = PoolMCTS()
+        search.set_root(state)
+        pool = search.pool
+        while time.time() - start_time < max_time:
+            node, leaf_state = search.descend()
+            if leaf_state.is_terminal():
+                pool.backpropagate(node, leaf_state.winner())
+                continue
+            packed = _pack(leaf_state)
+            futures = [self.executor.submit(_playouts, packed, self.leaf_batch) for _ in range(self.workers)]
+            for future in futures:
+                for winner, n in future.result().items():
+                    pool.backpropagate(node, winner, n)
+        self.playouts = pool.visits[0]
+        return Counter({decode_move(pool.move[child]): pool.visits[child] for child in pool.children(0)})
+
+    def close(self) -> None:
+        """
+        Stops the worker processes
+        """
+        self.executor.shutdown()
+
+    def __enter__(self) -> 'ParallelMCTS':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
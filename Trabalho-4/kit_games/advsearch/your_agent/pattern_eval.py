@@ -0,0 +1,383 @@
+"""
+Pattern-based othello evaluation, with weights fitted offline.
+The board is split into patterns (edge + X-squares, 3x3 and 2x5 corners, diagonals), each one read in all
+its symmetric orientations. The contents of a pattern instance (empty, own or opponent disc per square)
+give a base-3 index into a table of weights of that pattern, and the value of a position is the sum
+of the weights of its instances: an estimate of the final disc difference for the player to move.
+There is one set of tables per game stage (by number of discs), stored in pattern_weights.bin and
+loaded at import time.
+The weights are fitted by least squares (stochastic gradient descent on the squared error) to the
+final results of recorded games: history files written by server.py (or the xml output files).
+Train with: python -m advsearch.your_agent.pattern_eval <game files or directories>
+(python -m advsearch.your_agent.pattern_eval -h for options, e.g. generating self-play games first)
+"""
+import os
+import sys
+import time
+import zlib
+import random
+import struct
+import argparse
+import xml.etree.ElementTree as ET
+from array import array
+from typing import List, Tuple
+
+from ..othello.board import Board
+from ..othello.bitboard import BitBoard, popcount
+from ..othello.symmetry import SYMMETRIES, transform_move, inverse_transform_move
+from ..othello.gamestate import GameState
+from .minimax import minimax_move
+from .endgame import endgame_move
+from .othello_minimax_mask import evaluate_mask_bitwise
+
+# squares (x, y) of each pattern in its canonical orientation, in the order of the base-3 digits
+PATTERNS = [
+    ('edge+2x', [(x, 0) for x in range(8)] + [(1, 1), (6, 1)]),
+    ('corner 3x3', [(x, y) for y in range(3) for x in range(3)]),
+    ('corner 2x5', [(x, y) for y in range(2) for x in range(5)]),
+    ('diagonal 8', [(k, k) for k in range(8)]),
+    ('diagonal 7', [(k, k + 1) for k in range(7)]),
+    ('diagonal 6', [(k, k + 2) for k in range(6)]),
+    ('diagonal 5', [(k, k + 3) for k in range(5)]),
+    ('diagonal 4', [(k, k + 4) for k in range(4)]),
+]
+
+# game stages, by number of discs on the board (4 to 64)
+N_STAGES = 4
+STAGE_OF_DISCS = [min((discs - 4) * N_STAGES // 61, N_STAGES - 1) if discs >= 4 else 0 for discs in range(65)]
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pattern_weights.bin')
+
+# header of the weights file: magic, number of stages and number of weights per stage
+_HEADER = struct.Struct('<4sHI')
+_MAGIC = b'PTW1'
+
+# each instance's index is summed in its own field of a packed integer (3 ** 10 < 2 ** 16)
+_FIELD_BITS = 16
+
+
+def _instances(squares) -> List[int]:
+    """
+    Returns the symmetries that give the distinct instances of a pattern: reading the canonical squares
+    on the board transformed by each of them covers the pattern everywhere on the board
+    """
+    symmetries, seen = [], set()
+    for sym in SYMMETRIES:
+        # the squares of the original board read at the canonical ones of the transformed board
+        covered = frozenset(inverse_transform_move(square, sym) for square in squares)
+        if covered not in seen:
+            seen.add(covered)
+            symmetries.append(sym)
+    return symmetries
+
+
+# offset of each pattern's table within a stage (in the order of PATTERNS) and, for each pattern instance,
+# the offset of its table and the squares of the original board it reads, in the order of its digits
+_PATTERN_OFFSETS = []
+_INSTANCES = []
+STAGE_SIZE = 1  # weights per stage: a bias, then the tables of the patterns
+for _name, _squares in PATTERNS:
+    _PATTERN_OFFSETS.append(STAGE_SIZE)
+    for _sym in _instances(_squares):
+        _INSTANCES.append((STAGE_SIZE, [inverse_transform_move(square, _sym) for square in _squares]))
+    STAGE_SIZE += 3 ** len(_squares)
+_OFFSETS = [offset for offset, _ in _INSTANCES]
+_PACKED_BYTES = len(_INSTANCES) * _FIELD_BITS // 8
+
+
+def _row_tables(digit: int) -> List[List[int]]:
+    """
+    Returns, for each row y and each byte of discs on it, the packed contributions of those discs to the
+    indexes of all instances (digit 1 for own discs, 2 for the opponent's), so that the indexes of a
+    position are the sum of the entries of its 8 rows, read on the board as it is (no symmetric copies)
+    """
+    tables = []
+    for y in range(8):
+        square_values = [
+            sum(digit * 3 ** j << (_FIELD_BITS * i)
+                for i, (_, squares) in enumerate(_INSTANCES) for j, square in enumerate(squares) if square == (x, y))
+            for x in range(8)
+        ]
+        table = [0] * 256
+        for row in range(1, 256):
+            low = row & -row
+            table[row] = table[row ^ low] + square_values[low.bit_length() - 1]
+        tables.append(table)
+    return tables
+
+
+_OWN_ROWS, _OPP_ROWS = _row_tables(1), _row_tables(2)
+
+
+def features(own: int, opp: int) -> List[int]:
+    """
+    Returns the indexes of the weights of a position (its stage's bias, then one per pattern instance)
+    :param own: bitboard of the player to move
+    :param opp: bitboard of the opponent
+    """
+    base = STAGE_OF_DISCS[popcount(own | opp)] * STAGE_SIZE
+    packed = 0
+    for own_table, opp_table, own_row, opp_row in zip(
+        _OWN_ROWS, _OPP_ROWS, own.to_bytes(8, 'little'), opp.to_bytes(8, 'little')
+    ):
+        packed += own_table[own_row] + opp_table[opp_row]
+    indexes = array('H')
+    indexes.frombytes(packed.to_bytes(_PACKED_BYTES, 'little'))
+    if sys.byteorder != 'little':
+        indexes.byteswap()
+    return [base] + [base + offset + index for offset, index in zip(_OFFSETS, indexes)]
+
+
+class PatternWeights(object):
+    """
+    The weights of all stages, as one flat array (all zero if the file does not exist)
+    """
+
+    def __init__(self, weights: array = None):
+        self.weights = weights if weights is not None else array('f', bytes(4 * N_STAGES * STAGE_SIZE))
+
+    @staticmethod
+    def load(path: str = DEFAULT_PATH) -> 'PatternWeights':
+        """
+        Reads a weights file (see save); returns zero weights if it does not exist
+        """
+        if not os.path.exists(path):
+            return PatternWeights()
+        with open(path, 'rb') as weights_file:
+            data = zlib.decompress(weights_file.read())
+        magic, stages, stage_size = _HEADER.unpack_from(data)
+        if magic != _MAGIC or (stages, stage_size) != (N_STAGES, STAGE_SIZE):
+            raise ValueError(f'{path} does not match the patterns of this version')
+        weights = array('f')
+        weights.frombytes(data[_HEADER.size:])
+        if sys.byteorder != 'little':
+            weights.byteswap()
+        return PatternWeights(weights)
+
+    def save(self, path: str = DEFAULT_PATH) -> None:
+        """
+        Writes the weights as little-endian floats after a header, compressed (most table entries are
+        never seen in games and stay zero)
+        """
+        weights = array('f', self.weights)
+        if sys.byteorder != 'little':
+            weights.byteswap()
+        with open(path, 'wb') as weights_file:
+            weights_file.write(zlib.compress(_HEADER.pack(_MAGIC, N_STAGES, STAGE_SIZE) + weights.tobytes(), 9))
+
+    def value(self, own: int, opp: int) -> float:
+        """
+        Estimated final disc difference for the player to move (own)
+        """
+        weights = self.weights
+        return sum(weights[index] for index in features(own, opp))
+
+
+WEIGHTS = PatternWeights.load()
+
+
+def evaluate_pattern(state, player: str) -> float:
+    """
+    Evaluates an othello state from the point of view of the given player with the pattern tables
+    (the final disc difference, if the state is terminal). Drop-in eval_func for minimax_move
+    :param state: state to evaluate (instance of GameState)
+    :param player: player to evaluate the state for (B or W)
+    """
+    black, white = state.get_board().bitboards()
+    if state.player is None:
+        value = popcount(black) - popcount(white)
+        return value if player == Board.BLACK else -value
+    own, opp = (black, white) if state.player == Board.BLACK else (white, black)
+    value = WEIGHTS.value(own, opp)
+    return value if state.player == player else -value
+
+
+def read_game(path: str) -> List[Tuple[Tuple[int, int], str]]:
+    """
+    Reads the moves of a game recorded by server.py: a history file (x,y,color per line)
+    or an xml output file
+    :return: list of ((x, y), color), including any illegal move attempt the server recorded
+    """
+    if path.endswith('.xml'):
+        moves = ET.parse(path).getroot().find('moves')
+        return [(tuple(int(c) for c in move.get('coord').split(',')), move.get('color')) for move in moves]
+    with open(path) as history_file:
+        lines = [line.strip().split(',') for line in history_file if line.strip()]
+    return [((int(x), int(y)), color) for x, y, color in lines]
+
+
+def replay(moves) -> List[Tuple[int, int, int]]:
+    """
+    Replays a game, skipping the moves the server refused, and returns its positions
+    labeled with the final result, as (own, opp, final disc difference for own);
+    an empty list if the game did not reach its end (e.g. a disqualification)
+    """
+    state = GameState(BitBoard(), Board.BLACK)
+    positions = []
+    for move, color in moves:
+        if color != state.player or not state.is_legal_move(move):
+            continue
+        positions.append((state.player,) + state.board.bitboards())
+        state = state.next_state(move)
+    if not state.is_terminal():
+        return []
+    result = state.board.num_pieces(Board.BLACK) - state.board.num_pieces(Board.WHITE)
+    return [
+        (black, white, result) if player == Board.BLACK else (white, black, -result)
+        for player, black, white in positions
+    ]
+
+
+def game_files(paths) -> List[str]:
+    """
+    Expands directories into the game files (.txt and .xml) they contain
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.endswith(('.txt', '.xml'))
+            ))
+        else:
+            files.append(path)
+    return files
+
+
+class PatternTrainer(object):
+    """
+    Fits the weights by least squares: stochastic gradient descent on the squared error between
+    the value of each recorded position and the final result of its game.
+    The instances of a pattern read the same board squares in different orders when the pattern
+    is symmetric (e.g. the 3x3 corner, along its diagonal); such indexes share one trained weight
+    """
+
+    def __init__(self, learning_rate: float = 0.001, regularization: float = 1e-4, rng: random.Random = None):
+        """
+        :param learning_rate: step size of each weight, as a fraction of the error
+        :param regularization: L2 weight decay applied to the weights of each update
+        """
+        self.learning_rate = learning_rate
+        self.regularization = regularization
+        self.rng = rng or random.Random()
+        self.samples = []  # (weight indexes, result)
+        self._shared = self._shared_indexes()
+
+    @staticmethod
+    def _shared_indexes() -> List[int]:
+        """
+        Returns, for each weight of a stage, the weight it is trained as (the smallest index among
+        the readings of the same contents of a symmetric pattern)
+        """
+        shared = list(range(STAGE_SIZE))
+        for offset, (_, squares) in zip(_PATTERN_OFFSETS, PATTERNS):
+            permutations = []
+            for sym in SYMMETRIES:
+                mapped = [transform_move(square, sym) for square in squares]
+                if sym and set(mapped) == set(squares):
+                    permutations.append([squares.index(square) for square in mapped])
+            if not permutations:
+                continue
+            n = len(squares)
+            for index in range(3 ** n):
+                digits = [index // 3 ** j % 3 for j in range(n)]
+                for permutation in permutations:
+                    other = sum(digit * 3 ** permutation[j] for j, digit in enumerate(digits))
+                    shared[offset + index] = min(shared[offset + index], offset + other)
+        return shared
+
+    def add_game(self, moves) -> int:
+        """
+        Adds the positions of a recorded game (see read_game)
+        :return: number of positions added
+        """
+        shared = self._shared
+        positions = replay(moves)
+        for own, opp, result in positions:
+            indexes = features(own, opp)
+            base = indexes[0]
+            self.samples.append((array('i', [base + shared[index - base] for index in indexes]), result))
+        return len(positions)
+
+    def fit(self, epochs: int, weights: PatternWeights = None, verbose: bool = False) -> PatternWeights:
+        """
+        Runs epochs of stochastic gradient descent over the samples
+        :param weights: initial weights (default: zero)
+        :return: the fitted weights (every index set to the weight it is trained as)
+        """
+        weights = list(weights.weights) if weights is not None else [0.0] * (N_STAGES * STAGE_SIZE)
+        decay = 1 - self.regularization
+        for epoch in range(epochs):
+            self.rng.shuffle(self.samples)
+            squared_error = 0.0
+            for indexes, result in self.samples:
+                error = result - sum(weights[index] for index in indexes)
+                squared_error += error * error
+                step = self.learning_rate * error
+                for index in indexes:
+                    weights[index] = weights[index] * decay + step
+            if verbose:
+                rms = (squared_error / len(self.samples)) ** 0.5 if self.samples else 0.0
+                print(f'epoch {epoch + 1}: rms error {rms:.2f} discs')
+
+        shared = self._shared
+        for stage in range(N_STAGES):
+            base = stage * STAGE_SIZE
+            for index in range(STAGE_SIZE):
+                weights[base + index] = weights[base + shared[index]]
+        return PatternWeights(array('f', weights))
+
+
+def record_games(directory: str, games: int, depth: int = 1, epsilon: float = 0.1,
+                 endgame_empties: int = 12, rng: random.Random = None) -> None:
+    """
+    Plays self-play games (minimax with evaluate_mask_bitwise, random moves with probability epsilon,
+    perfect play near the end) and writes them in the history format of server.py
+    """
+    rng = rng or random.Random()
+    os.makedirs(directory, exist_ok=True)
+    for game in range(games):
+        state = GameState(BitBoard(), Board.BLACK)
+        lines = []
+        while not state.is_terminal():
+            if state.board.piece_count[Board.EMPTY] <= endgame_empties:
+                move = endgame_move(state)
+            elif rng.random() < epsilon:
+                move = rng.choice(sorted(state.legal_moves()))
+            else:
+                move = minimax_move(state, depth, evaluate_mask_bitwise)
+            lines.append('%d,%d,%s\n' % (move[0], move[1], state.player))
+            state = state.next_state(move)
+        with open(os.path.join(directory, f'selfplay_{game:05d}.txt'), 'w') as history_file:
+            history_file.writelines(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fits the othello pattern evaluation to recorded games.')
+    parser.add_argument('games', nargs='*', help='Game files written by server.py (history or xml) or directories.')
+    parser.add_argument('--self-play', type=int, default=0, metavar='N',
+                        help='First record N self-play games in --games-dir (and train on them too).')
+    parser.add_argument('--games-dir', default='selfplay_games', help='Directory of the self-play games.')
+    parser.add_argument('-e', '--epochs', type=int, default=8, help='Epochs of gradient descent.')
+    parser.add_argument('-l', '--learning-rate', type=float, default=0.001, help='Gradient descent step.')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Random seed.')
+    parser.add_argument('-o', '--output', default=DEFAULT_PATH, help='Weights file.')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    paths = list(args.games)
+    start = time.time()
+    if args.self_play:
+        record_games(args.games_dir, args.self_play, rng=rng)
+        print(f'{args.self_play} self-play games recorded in {args.games_dir}, {time.time() - start:.0f}s')
+        paths.append(args.games_dir)
+
+    trainer = PatternTrainer(args.learning_rate, rng=rng)
+    files = game_files(paths)
+    positions = sum(trainer.add_game(read_game(path)) for path in files)
+    print(f'{positions} positions from {len(files)} games, {time.time() - start:.0f}s')
+    trainer.fit(args.epochs, verbose=True).save(args.output)
+    print(f'weights written to {args.output}, {time.time() - start:.0f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Fast random playouts for othello, run on a pair of bitboards instead of GameState objects
+(random_game also plays out the states of other games, through the GameState interface).
+"""
+import random
+from typing import Tuple
+
+from ..othello.board import Board
+from ..othello.bitboard import BitBoard, FULL, move_mask, flip_mask, popcount
+
+# random empty squares tried before generating the legal moves (see random_playout)
+PROBES = 6
+
+
+def random_playout(
+    black: int, white: int, black_to_move: bool, rand=random.random, trace: list = None
+) -> Tuple[int, int]:
+    """
+    Plays uniformly random legal moves until the end of the game and returns the final (black, white).
+    A move is chosen by probing random empty squares: the first one that flips something is
+    uniformly distributed among the legal moves. Only after PROBES misses are the legal
+    moves generated (to pick one of them, or to detect a pass).
+    :param black: black bitboard
+    :param white: white bitboard
+    :param black_to_move: whether black is the player to move
+    :param rand: random.random-like function
+    :param trace: if given, (square, black_to_move) of each move played is appended to it
+    :return: (int, int)
+    """
+    own, opp = (black, white) if black_to_move else (white, black)
+    empty = ~(own | opp) & FULL
+    empties = [square for square in range(64) if empty >> square & 1]
+    passes = 0
+    while empties:
+        n = len(empties)
+        for _ in range(PROBES):
+            i = int(rand() * n)
+            bit = 1 << empties[i]
+            flipped = flip_mask(own, opp, bit)
+            if flipped:
+                break
+        else:
+            moves = move_mask(own, opp)
+            if not moves:
+                passes += 1
+                if passes == 2:  # nobody can move
+                    break
+                own, opp, black_to_move = opp, own, not black_to_move
+                continue
+            for _ in range(int(rand() * popcount(moves))):
+                moves &= moves - 1  # drops the lowest move
+            bit = moves & -moves
+            i = empties.index(bit.bit_length() - 1)
+            flipped = flip_mask(own, opp, bit)
+
+        passes = 0
+        if trace is not None:
+            trace.append((empties[i], black_to_move))
+        empties[i] = empties[-1]
+        empties.pop()
+        own, opp, black_to_move = opp ^ flipped, own | bit | flipped, not black_to_move
+
+    return (own, opp) if black_to_move else (opp, own)
+
+
+def state_playout(state) -> str:
+    """
+    Runs a random playout from an othello state (with a Board or a BitBoard) and returns
+    the winner, like state.winner() at the end of the game (None for a draw)
+    """
+    board = state.board if isinstance(state.board, BitBoard) else BitBoard.from_board(state.board)
+    black, white = random_playout(*board.bitboards(), state.player != Board.WHITE)
+    n_black, n_white = popcount(black), popcount(white)
+    if n_black > n_white:
+        return Board.BLACK
+    elif n_white > n_black:
+        return Board.WHITE
+    return None
+
+
+def random_game(state, fast: bool = True):
+    """
+    Plays random moves from the state until the end of the game and returns the winner
+    (othello states are played out on bitboards, unless fast is False; other games move by move)
+    """
+    if fast and isinstance(state.board, Board):
+        return state_playout(state)
+    while not state.is_terminal():
+        legal_moves = state.legal_moves()
+        move = random.choice(list(legal_moves))
+        state = state.next_state(move)
+    return state.winner()
@@ -0,0 +1,120 @@
+"""
+MCTS on an array-backed tree (see node_pool): nodes store no game state, so each iteration replays
+the moves of the selected path on a copy of the root state. The tree is kept between moves:
+the subtree of the new position is copied into a fresh pool and the search continues from it.
+It works with any game with the GameState interface; othello playouts run on bitboards.
+"""
+import time
+import random
+from typing import Tuple
+
+from ..othello.board import Board
+from .node_pool import NodePool, decode_move
+from .playout import random_game
+from .batch_playout import batch_winners
+
+# maximum number of nodes of the pool: above it, the search goes on without expanding new nodes
+MAX_NODES = 4000000
+
+
+def position_key(state):
+    """
+    Returns a key identifying the position of the state (board and player to move)
+    """
+    if hasattr(state, "zobrist"):
+        return state.zobrist
+    return str(state.board), state.player
+
+
+class PoolMCTS(object):
+    """
+    UCT search whose tree is a NodePool, reused from one move to the next
+    """
+
+    def __init__(self, max_nodes: int = MAX_NODES, playout_batch: int = 1):
+        """
+        :param max_nodes: maximum number of nodes of the tree
+        :param playout_batch: playouts per leaf, played together in a batch (see batch_playout) in othello;
+                              1: one uniformly random playout per leaf
+        """
+        self.max_nodes = max_nodes
+        self.playout_batch = playout_batch
+        self.pool = NodePool()
+        self.root_state = None
+
+    def move(self, state, max_time: float) -> Tuple[int, int]:
+        """
+        Returns the most visited move at the root after searching for max_time seconds,
+        starting from the subtree of the state in the tree of the previous move, if it is there
+        :param state: state to make the move
+        :param max_time: search time in seconds
+        :return: (int, int) tuple with x, y coordinates of the move
+        """
+        self.set_root(state)
+        start_time = time.time()
+        while time.time() - start_time < max_time:
+            self.iterate()
+
+        if not self.pool.n_children[0]:  # not even one iteration
+            return random.choice(list(state.legal_moves()))
+        return decode_move(self.pool.move[self.pool.best_child(0)])
+
+    def set_root(self, state) -> None:
+        """
+        Makes the state the root of the tree, keeping its subtree (the rest of the tree is dropped)
+        """
+        node = self.find_subtree(state) if self.root_state is not None else None
+        self.pool = self.pool.subtree(node) if node is not None else NodePool()
+        self.root_state = state.copy()
+
+    def find_subtree(self, state, max_depth: int = 2):
+        """
+        Returns the index of the node with the position of the state, searching the first
+        max_depth levels below the root (our move and the opponent's reply), or None
+        """
+        key = position_key(state)
+        level = [(0, self.root_state)]
+        for _ in range(max_depth + 1):
+            for node, node_state in level:
+                if position_key(node_state) == key:
+                    return node
+            level = [
+                (child, node_state.next_state(decode_move(self.pool.move[child])))
+                for node, node_state in level for child in self.pool.children(node)
+            ]
+        return None
+
+    def descend(self):
+        """
+        Selects a leaf by UCB from the root and expands it (unless it is terminal or the pool is full)
+        :return: (node, state): the first new child (or the leaf) and its state
+        """
+        pool = self.pool
+        state = self.root_state.copy()
+        in_place = hasattr(state, "make_move")
+        node = 0
+        while pool.n_children[node]:
+            node = pool.select_child(node)
+            move = decode_move(pool.move[node])
+            if in_place:
+                state.make_move(move)
+            else:
+                state = state.next_state(move)
+
+        if not state.is_terminal() and len(pool) < self.max_nodes:
+            moves = list(state.legal_moves())
+            random.shuffle(moves)
+            node = pool.add_children(node, moves, state.player)
+            state = state.next_state(moves[0])
+        return node, state
+
+    def iterate(self) -> None:
+        """
+        Runs one MCTS iteration: selection, expansion, playout(s) and backpropagation
+        """
+        node, state = self.descend()
+        if self.playout_batch > 1 and isinstance(state.board, Board) and not state.is_terminal():
+            for winner, n in batch_winners(state, self.playout_batch).items():
+                self.pool.backpropagate(node, winner, n)
+        else:
+            self.pool.backpropagate(node, random_game(state))
@@ -0,0 +1,27 @@
+"""
+Static values of the othello squares, shared by the agents: the positional evaluation
+(othello_minimax_mask), the move ordering of the minimax agents and the progressive bias of the MCTS.
+"""
+from .move_ordering import MoveOrderer
+
+# mask template adjusted from https://web.fe.up.pt/~eol/IA/MIA0203/trabalhos/Damas_Othelo/Docs/Eval.html
+# could optimize for symmetries but just put all values here for coding speed :P
+# DO NOT CHANGE!
+EVAL_TEMPLATE = [
+    [100, -30, 6, 2, 2, 6, -30, 100],
+    [-30, -50, 1, 1, 1, 1, -50, -30],
+    [  6,   1, 1, 1, 1, 1,   1,   6],
+    [  2,   1, 1, 3, 3, 1,   1,   2],
+    [  2,   1, 1, 3, 3, 1,   1,   2],
+    [  6,   1, 1, 1, 1, 1,   1,   6],
+    [-30, -50, 1, 1, 1, 1, -50, -30],
+    [100, -30, 6, 2, 2, 6, -30, 100]
+]
+
+
+def othello_orderer() -> MoveOrderer:
+    """
+    Returns a move orderer for othello (killers + history + EVAL_TEMPLATE as the static square priority).
+    Each agent keeps its own between moves, so what it learned in one search orders the next one
+    """
+    return MoveOrderer(EVAL_TEMPLATE)
@@ -0,0 +1,270 @@
+"""
+Tree-parallel MCTS for othello: several worker processes descend and grow a single tree
+kept in shared memory as a struct of arrays (one array per node field, nodes are indices).
+Each worker adds a virtual loss to the nodes it descends through, so the others tend to
+choose different paths, and removes it when backpropagating the playout result.
+Updates of a node are protected by one of N_LOCKS locks (lock striping: node i uses lock i % N_LOCKS);
+reads during the selection are done without locks.
+"""
+import os
+import time
+import random
+from math import sqrt, log
+import multiprocessing as mp
+from multiprocessing.sharedctypes import RawArray, RawValue
+from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor
+
+from ..othello.board import Board
+from ..othello.bitboard import BitBoard, SQUARE_MOVES, move_mask, flip_mask, popcount
+from . import playout
+
+# player codes stored in the tree (NOBODY: terminal position, or draw as a winner)
+BLACK, WHITE, NOBODY = 0, 1, -1
+
+# node status: the first worker that selects an unexpanded node expands it,
+# the others just run a playout from it meanwhile
+UNEXPANDED, EXPANDING, EXPANDED = 0, 1, 2
+
+# losses added to a node's visits while a worker is below it
+VIRTUAL_LOSS = 1
+
+EXPLORATION = sqrt(2)
+
+N_LOCKS = 64
+
+# mode of mcts.make_move that uses this search (next to parallel_mcts.ROOT and LEAF)
+TREE = 'tree'
+
+# the shared tree, set in the workers by _init_worker
+_tree = None
+
+
+class SharedTree(object):
+    """
+    Fixed-capacity tree stored in shared arrays. Node 0 is the root; the children of
+    a node occupy the consecutive indices first_child[node] ... first_child[node] + n_children[node] - 1
+    """
+
+    def __init__(self, capacity: int):
+        """
+        :param capacity: maximum number of nodes (when full, leaves are no longer expanded)
+        """
+        self.capacity = capacity
+        self.black = RawArray('Q', capacity)       # position after the move into the node
+        self.white = RawArray('Q', capacity)
+        self.player = RawArray('b', capacity)      # player to move (NOBODY if terminal)
+        self.mover = RawArray('b', capacity)       # player who made the move into the node
+        self.move = RawArray('b', capacity)        # square of that move (y*8 + x)
+        self.parent = RawArray('i', capacity)
+        self.first_child = RawArray('i', capacity)
+        self.n_children = RawArray('b', capacity)
+        self.status = RawArray('b', capacity)
+        self.visits = RawArray('i', capacity)
+        self.wins = RawArray('d', capacity)        # from the point of view of the mover (draws count half)
+        self.virtual = RawArray('i', capacity)     # virtual losses currently applied
+        self.size = RawValue('i', 0)
+        self.alloc_lock = mp.Lock()
+        self.locks = [mp.Lock() for _ in range(N_LOCKS)]
+
+    def reset(self, black: int, white: int, player: int) -> None:
+        """
+        Discards the tree and stores the root position
+        """
+        self.size.value = 0
+        self._init_node(self.allocate(1), black, white, player, NOBODY, -1, -1)
+
+    def allocate(self, n: int) -> int:
+        """
+        Reserves n consecutive nodes and returns the first index (-1 if the tree is full)
+        """
+        with self.alloc_lock:
+            first = self.size.value
+            if first + n > self.capacity:
+                return -1
+            self.size.value = first + n
+        return first
+
+    def _init_node(self, node, black, white, player, mover, move, parent) -> None:
+        self.black[node], self.white[node] = black, white
+        self.player[node], self.mover[node], self.move[node] = player, mover, move
+        self.parent[node] = parent
+        self.first_child[node], self.n_children[node] = -1, 0
+        self.status[node] = UNEXPANDED
+        self.visits[node], self.wins[node], self.virtual[node] = 0, 0.0, 0
+
+    def expand(self, node: int) -> bool:
+        """
+        Creates the children of node, unless another worker is doing it or the tree is full
+        :return: whether the node was expanded
+        """
+        with self.locks[node % N_LOCKS]:
+            if self.status[node] != UNEXPANDED:
+                return False
+            self.status[node] = EXPANDING
+
+        player, black, white = self.player[node], self.black[node], self.white[node]
+        own, opp = (black, white) if player == BLACK else (white, black)
+        moves = move_mask(own, opp)
+        first = self.allocate(popcount(moves))
+        if first < 0:
+            self.status[node] = UNEXPANDED
+            return False
+
+        child = first
+        while moves:
+            bit = moves & -moves
+            moves ^= bit
+            flipped = flip_mask(own, opp, bit)
+            child_own, child_opp = own | bit | flipped, opp ^ flipped
+            child_black, child_white = (child_own, child_opp) if player == BLACK else (child_opp, child_own)
+            self._init_node(child, child_black, child_white, _next_player(child_own, child_opp, player),
+                            player, bit.bit_length() - 1, node)
+            child += 1
+        self.first_child[node], self.n_children[node] = first, child - first
+        self.status[node] = EXPANDED
+        return True
+
+    def select_child(self, node: int) -> int:
+        """
+        Returns the child of node with the best UCB score, counting virtual losses as lost visits
+        """
+        first = self.first_child[node]
+        visits, wins, virtual = self.visits, self.wins, self.virtual
+        log_visits = log(max(visits[node] + virtual[node], 1))
+        best, best_score = first, float("-inf")
+        for child in range(first, first + self.n_children[node]):
+            n = visits[child] + virtual[child]
+            if n == 0:
+                return child
+            score = wins[child] / n + EXPLORATION * sqrt(log_visits / n)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def add_virtual_loss(self, node: int) -> None:
+        with self.locks[node % N_LOCKS]:
+            self.virtual[node] += VIRTUAL_LOSS
+
+    def backpropagate(self, path: list, winner: int) -> None:
+        """
+        Adds the playout result to the nodes of the path and removes their virtual losses
+        """
+        for i, node in enumerate(path):
+            with self.locks[node % N_LOCKS]:
+                self.visits[node] += 1
+                if i > 0:  # the root has no virtual loss (nor a mover)
+                    self.virtual[node] -= VIRTUAL_LOSS
+                    self.wins[node] += 1.0 if winner == self.mover[node] else 0.5 if winner == NOBODY else 0.0
+
+    def iterate(self) -> None:
+        """
+        Runs one MCTS iteration: selection with virtual loss, expansion, playout and backpropagation
+        """
+        node, path = 0, [0]
+        while self.status[node] == EXPANDED and self.n_children[node]:
+            node = self.select_child(node)
+            self.add_virtual_loss(node)
+            path.append(node)
+
+        if self.player[node] != NOBODY and self.status[node] == UNEXPANDED and self.expand(node):
+            node = self.first_child[node] + random.randrange(self.n_children[node])
+            self.add_virtual_loss(node)
+            path.append(node)
+
+        self.backpropagate(path, random_playout(self.black[node], self.white[node], self.player[node]))
+
+
+def _next_player(own: int, opp: int, player: int) -> int:
+    """
+    Returns the player to move after 'player' (owner of 'own') has moved: the opponent,
+    the same player if the opponent has to pass, or NOBODY if the game is over
+    """
+    if move_mask(opp, own):
+        return 1 - player
+    if move_mask(own, opp):
+        return player
+    return NOBODY
+
+
+def random_playout(black: int, white: int, player: int) -> int:
+    """
+    Plays random moves until the end of the game and returns the winner (NOBODY for a draw)
+    """
+    black, white = playout.random_playout(black, white, player == BLACK)
+    n_black, n_white = popcount(black), popcount(white)
+    return BLACK if n_black > n_white else WHITE if n_white > n_black else NOBODY
+
+
+def _init_worker(tree: SharedTree) -> None:
+    """
+    Pool initializer: keeps the shared tree (it can only be passed to processes at creation)
+    and reseeds the random generator, which forked workers would otherwise share
+    """
+    global _tree
+    _tree = tree
+    random.seed(os.urandom(16))
+
+
+def _search(deadline: float) -> int:
+    """
+    Worker task: runs iterations on the shared tree until the deadline
+    :return: number of playouts
+    """
+    playouts = 0
+    while time.time() < deadline:
+        _tree.iterate()
+        playouts += 1
+    return playouts
+
+
+class SharedTreeMCTS(object):
+    """
+    Tree-parallel othello MCTS: the workers grow a single tree in shared memory
+    (see the module docstring). Use it as a context manager or call close() to stop the workers.
+    """
+    mode = TREE
+
+    def __init__(self, workers: int = None, capacity: int = 1 << 20):
+        """
+        :param workers: number of worker processes (default: number of CPUs)
+        :param capacity: maximum number of nodes of the tree
+        """
+        self.workers = workers or os.cpu_count()
+        self.tree = SharedTree(capacity)
+        self.playouts = 0  # playouts of the last search
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.tree,))
+
+    def move(self, state, max_time: float) -> Tuple[int, int]:
+        """
+        Returns the most visited move at the root after searching for max_time seconds
+        :param state: othello state (with a Board or a BitBoard)
+        :param max_time: search time in seconds
+        :return: (int, int) tuple with x, y coordinates of the move
+        """
+        board = state.board if isinstance(state.board, BitBoard) else BitBoard.from_board(state.board)
+        black, white = board.bitboards()
+        tree = self.tree
+        tree.reset(black, white, BLACK if state.player == Board.BLACK else WHITE)
+
+        deadline = time.time() + max_time
+        futures = [self.executor.submit(_search, deadline) for _ in range(self.workers)]
+        self.playouts = sum(future.result() for future in futures)
+
+        if tree.status[0] != EXPANDED:  # not even one iteration
+            return random.choice(list(state.legal_moves()))
+        first = tree.first_child[0]
+        best = max(range(first, first + tree.n_children[0]), key=lambda child: tree.visits[child])
+        return SQUARE_MOVES[tree.move[best]]
+
+    def close(self) -> None:
+        """
+        Stops the worker processes
+        """
+        self.executor.shutdown()
+
+    def __enter__(self) -> 'SharedTreeMCTS':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
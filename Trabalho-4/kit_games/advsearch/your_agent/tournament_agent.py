@@ -1,8 +1,29 @@
+import time
 import random
 from typing import Tuple
 from ..othello.gamestate import GameState
 from ..othello.board import Board
-from .minimax import minimax_move  # Certifique-se de ter o módulo minimax definido e importado corretamente.
+from .minimax import minimax_move, TIME_LIMIT  # Certifique-se de ter o módulo minimax definido e importado corretamente.
+from .endgame import endgame_move
+from .opening_book import OpeningBook
+from .parallel import ParallelSearch
+from .positional import othello_orderer
+
+MOVE_ORDERING = othello_orderer()
+
+# com ate essa quantidade de casas vazias o final do jogo e' resolvido exatamente
+# (python benchmark.py endgame mostra o tempo de solucao por numero de casas vazias)
+ENDGAME_EMPTIES = 12
+
+# livro de aberturas (opening_book.bin, gerado por python -m advsearch.your_agent.opening_book):
+# nas posicoes que estao nele com partidas suficientes e resultado medio de pelo menos 0.5 (MIN_GAMES,
+# MIN_SCORE), a jogada e' respondida sem busca; nas demais, o agente busca normalmente
+OPENING_BOOK = OpeningBook()
+
+# numero de processos da busca paralela dividida na raiz (ver parallel.ParallelSearch), ou None para o
+# minimax sequencial com ordenacao de jogadas; os processos sao criados na primeira jogada e mantidos
+PARALLEL_WORKERS = None
+_parallel_search = None
 
 def make_move(state) -> Tuple[int, int]:
     """
@@ -10,7 +31,22 @@ def make_move(state) -> Tuple[int, int]:
     :param state: state to make the move
     :return: (int, int) tuple with x, y coordinates of the move (remember: 0 is the first row/column)
     """
-    return minimax_move(state, 4, evaluate_count)  # Chamando o algoritmo Minimax com a função de avaliação
+    global _parallel_search
+    start = time.time()
+    move = OPENING_BOOK.lookup(state)
+    if move is not None:
+        return move
+    if state.board.piece_count[Board.EMPTY] <= ENDGAME_EMPTIES:
+        # se o solver nao terminar na metade do tempo, o minimax usa o resto
+        move = endgame_move(state, deadline=start + TIME_LIMIT / 2)
+        if move is not None:
+            return move
+    if PARALLEL_WORKERS is not None:
+        if _parallel_search is None:
+            _parallel_search = ParallelSearch(PARALLEL_WORKERS)
+        return _parallel_search.move(state, -1, evaluate_count, deadline=start + TIME_LIMIT)
+    return minimax_move(state, -1, evaluate_count, deadline=start + TIME_LIMIT,
+                        ordering=MOVE_ORDERING)  # Chamando o algoritmo Minimax com a função de avaliação
 
 def evaluate_count(state, player: str) -> float:
     """
@@ -0,0 +1,99 @@
+from collections import namedtuple
+
+# bound types of a stored score
+EXACT = 0  # the score is the exact minimax value
+LOWER = 1  # the search failed high: the value is >= score
+UPPER = 2  # the search failed low: the value is <= score
+
+# score is from the point of view of the player to move at the position
+# (the key must include the player to move, e.g. GameState.zobrist)
+# (generation is the search that stored the entry, see TranspositionTable.new_search)
+TTEntry = namedtuple('TTEntry', ['key', 'depth', 'score', 'flag', 'move', 'generation'])
+
+
+class TranspositionTable(object):
+    """
+    Fixed-size transposition table for alpha-beta search, keyed by position hash.
+    The table is split in buckets of two slots:
+    - a depth-preferred slot, which is only overwritten by searches at least as deep or by
+      any entry of a newer search (its previous content is moved to the other slot), and
+    - an always-replace slot, which keeps the most recent entry otherwise.
+    So the memory used never exceeds max_entries entries. A table kept between moves must be
+    told of each new search (new_search), so deep entries of old positions age out.
+    """
+
+    def __init__(self, max_entries: int = 1 << 18):
+        """
+        :param max_entries: maximum number of entries kept in the table
+        """
+        self.n_buckets = max(1, max_entries // 2)
+        self.deep = [None] * self.n_buckets
+        self.recent = [None] * self.n_buckets
+        self.generation = 0
+
+        # statistics
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def new_search(self) -> None:
+        """
+        Starts a new search: the entries stored until now can be replaced whatever their depth
+        """
+        self.generation += 1
+
+    def lookup(self, key: int):
+        """
+        Returns the entry stored for the given key, or None
+        :param key: position hash
+        :return: TTEntry or None
+        """
+        bucket = key % self.n_buckets
+        entry = self.deep[bucket]
+        if entry is None or entry.key != key:
+            entry = self.recent[bucket]
+            if entry is None or entry.key != key:
+                self.misses += 1
+                return None
+        self.hits += 1
+        return entry
+
+    def store(self, key: int, depth, score: float, flag: int, move) -> None:
+        """
+        Stores the result of a search
+        :param key: position hash
+        :param depth: remaining depth the position was searched with
+        :param score: score from the point of view of the player to move
+        :param flag: EXACT, LOWER or UPPER
+        :param move: best move found (or None)
+        """
+        self.stores += 1
+        bucket = key % self.n_buckets
+        entry = TTEntry(key, depth, score, flag, move, self.generation)
+        deep = self.deep[bucket]
+        if deep is None or deep.key == key or depth >= deep.depth or deep.generation != self.generation:
+            if deep is not None and deep.key != key:
+                self.recent[bucket] = deep
+            self.deep[bucket] = entry
+        else:
+            self.recent[bucket] = entry
+
+    def clear(self) -> None:
+        """
+        Removes all entries and resets the statistics
+        """
+        self.__init__(self.n_buckets * 2)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of entries currently stored
+        """
+        return sum(e is not None for e in self.deep) + sum(e is not None for e in self.recent)
+
+    def stats(self) -> str:
+        """
+        Returns a one-line summary of the table usage
+        """
+        probes = self.hits + self.misses
+        rate = self.hits / probes if probes else 0
+        return f'{len(self)} entries, {self.stores} stores, {self.hits}/{probes} hits ({rate:.1%})'
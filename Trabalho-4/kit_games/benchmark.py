@@ -0,0 +1,615 @@
+"""
+Micro-benchmarks for the othello engine and the search agents.
+Usage (from this directory): python benchmark.py <benchmark> [options]
+Run python benchmark.py -h to list the available benchmarks.
+"""
+import time
+import pickle
+import random
+import argparse
+import tracemalloc
+from contextlib import contextmanager
+
+from advsearch.othello.board import Board
+from advsearch.othello.bitboard import BitBoard, square_bit, flip_mask
+from advsearch.othello.gamestate import GameState
+from advsearch.othello.position import Position
+from advsearch.othello import symmetry
+from advsearch.your_agent.minimax import minimax_move, SearchStats
+from advsearch.your_agent.move_ordering import MoveOrderer
+from advsearch.your_agent.parallel import ParallelSearch
+from advsearch.your_agent.endgame import EndgameSolver
+from advsearch.your_agent import mcts
+from advsearch.your_agent.parallel_mcts import ParallelMCTS, ROOT, LEAF
+from advsearch.your_agent.shared_tree_mcts import SharedTreeMCTS
+from advsearch.your_agent.pool_mcts import PoolMCTS
+from advsearch.your_agent.playout import random_playout
+from advsearch.your_agent.batch_playout import BatchSimulator
+from advsearch.your_agent.opening_book import OpeningBook
+from advsearch.your_agent.enhanced_mcts import EnhancedMCTS, SolverNode, UNPROVEN
+from advsearch.your_agent.othello_minimax_count import evaluate_count
+from advsearch.your_agent.othello_minimax_mask import evaluate_mask, evaluate_mask_bitwise
+from advsearch.your_agent.positional import EVAL_TEMPLATE
+from advsearch.your_agent.othello_minimax_custom import evaluate_custom
+from advsearch.your_agent.pattern_eval import evaluate_pattern
+from advsearch.your_agent.transposition import TranspositionTable
+from samples import random_game, sample_states
+
+
+BENCHMARKS = {}
+
+
+def benchmark(function):
+    """
+    Registers a benchmark function under its name (without the 'bench_' prefix)
+    """
+    BENCHMARKS[function.__name__[len('bench_'):]] = function
+    return function
+
+
+def count_nodes(function, *args, repeat=1):
+    """
+    Runs function(*args) counting the number of GameState.next_state and
+    GameState.make_move calls (i.e. search nodes)
+    :param repeat: number of runs; the fastest one is reported
+    :return: (result, nodes per run, elapsed seconds)
+    """
+    originals = {name: GameState.__dict__[name] for name in ('next_state', 'make_move') if name in GameState.__dict__}
+    nodes = 0
+
+    def counting(method):
+        def counting_method(self, move):
+            nonlocal nodes
+            nodes += 1
+            return method(self, move)
+        return counting_method
+
+    for name, method in originals.items():
+        setattr(GameState, name, counting(method))
+    elapsed = float('inf')
+    try:
+        for _ in range(repeat):
+            nodes = 0
+            start = time.perf_counter()
+            result = function(*args)
+            elapsed = min(elapsed, time.perf_counter() - start)
+    finally:
+        for name, method in originals.items():
+            setattr(GameState, name, method)
+    return result, nodes, elapsed
+
+
+def sample_game(plies, seed=0, board=Board):
+    """
+    Returns the first states of a random game (at most 'plies' of them) with a fixed seed,
+    used as a reproducible set of opening-to-midgame positions
+    """
+    return random_game(random.Random(seed), board)[:plies]
+
+
+@contextmanager
+def copying_search():
+    """
+    Within this context GameState has no make_move, so minimax_move
+    falls back to allocating a new state with next_state at every node
+    """
+    make_move = GameState.make_move
+    del GameState.make_move
+    try:
+        yield
+    finally:
+        GameState.make_move = make_move
+
+
+def report(label, nodes, elapsed, unit='nodes'):
+    print(f'{label:<28} {nodes:>10} {unit} {elapsed:>8.3f}s {nodes / elapsed:>12.0f} {unit}/s')
+
+
+@benchmark
+def bench_copy(args):
+    """
+    minimax_move from the initial position with the string round-trip copy vs. the structural Board.copy
+    """
+    structural_copy = Board.copy
+    copies = [
+        ('string round-trip copy', lambda self: self.from_string(self.__str__())),
+        ('structural copy', structural_copy),
+    ]
+    try:
+        for label, copy in copies:
+            Board.copy = copy
+            with copying_search():
+                _, nodes, elapsed = count_nodes(minimax_move, GameState(Board(), 'B'), args.depth, evaluate_count,
+                                                repeat=args.repeat)
+            report(label, nodes, elapsed)
+    finally:
+        Board.copy = structural_copy
+
+
+@benchmark
+def bench_inplace(args):
+    """
+    minimax_move from the initial position allocating states with next_state vs. make/unmake on one board
+    """
+    for label, board in [('Board', Board), ('BitBoard', BitBoard)]:
+        with copying_search():
+            _, nodes, elapsed = count_nodes(minimax_move, GameState(board(), 'B'), args.depth, evaluate_count,
+                                            repeat=args.repeat)
+        report(f'{label} next_state', nodes, elapsed)
+        _, nodes, elapsed = count_nodes(minimax_move, GameState(board(), 'B'), args.depth, evaluate_count,
+                                        repeat=args.repeat)
+        report(f'{label} make/unmake', nodes, elapsed)
+
+
+@benchmark
+def bench_tt(args):
+    """
+    minimax_move along a game with and without a transposition table kept between moves
+    """
+    states = [st for st in sample_game(args.plies, args.seed) if not st.is_terminal()]
+
+    def play_game(eval_func, tables):
+        for st in states:
+            minimax_move(st, args.depth, eval_func, tables[st.player] if tables else None)
+
+    for name, eval_func in [('mask', evaluate_mask), ('custom', evaluate_custom)]:
+        _, nodes, elapsed = count_nodes(play_game, eval_func, None)
+        report(f'{name} without table', nodes, elapsed)
+        tables = {Board.BLACK: TranspositionTable(), Board.WHITE: TranspositionTable()}
+        _, nodes, elapsed = count_nodes(play_game, eval_func, tables)
+        report(f'{name} with table', nodes, elapsed)
+        for color, table in tables.items():
+            print(f'  table {color}: {table.stats()}')
+
+
+@benchmark
+def bench_ordering(args):
+    """
+    alpha-beta node counts with no ordering, static square priority, killers+history and a transposition table
+    """
+    import test_pruning  # the Russel & Norvig tree of the pruning test
+
+    stats = SearchStats()
+    minimax_move(test_pruning.GameState(test_pruning.Board(), 'B'), -1, test_pruning.utility, stats=stats)
+    print(f'{"pruning test tree":<28} {stats}')
+    stats = SearchStats()
+    minimax_move(test_pruning.GameState(test_pruning.Board(), 'B'), -1, test_pruning.utility,
+                 ordering=MoveOrderer(), stats=stats)  # the static priority only makes sense for othello
+    print(f'{"pruning test tree, ordered":<28} {stats}')
+
+    states = [st for st in sample_game(args.plies, args.seed, BitBoard) if not st.is_terminal()]
+    configurations = [
+        ('unordered', lambda: None, lambda: None),
+        ('square priority', lambda: MoveOrderer(EVAL_TEMPLATE, n_killers=0), lambda: None),
+        ('killers+history+priority', lambda: MoveOrderer(EVAL_TEMPLATE), lambda: None),
+        ('all + transposition table', lambda: MoveOrderer(EVAL_TEMPLATE), TranspositionTable),
+    ]
+    for label, orderer, table in configurations:
+        stats = SearchStats()
+        ordering, tt = orderer(), table()
+        start = time.perf_counter()
+        for st in states:
+            minimax_move(st, args.depth, evaluate_mask, tt, ordering=ordering, stats=stats)
+        print(f'{label:<28} {stats} {time.perf_counter() - start:8.3f}s')
+
+
+@benchmark
+def bench_negamax(args):
+    """
+    minimax vs. negamax/PVS (with and without aspiration windows) along a game, with ordering and a table
+    """
+    states = [st for st in sample_game(args.plies, args.seed, BitBoard) if not st.is_terminal()]
+    configurations = [
+        ('minimax', dict()),
+        ('negamax/PVS', dict(negamax=True)),
+        ('negamax/PVS + aspiration', dict(negamax=True, aspiration=25)),
+    ]
+    for label, options in configurations:
+        stats = SearchStats()
+        ordering, tt = MoveOrderer(EVAL_TEMPLATE), TranspositionTable()
+        for st in states:
+            # the far deadline makes every search iterative deepening up to args.depth
+            minimax_move(st, args.depth, evaluate_mask, tt, deadline=time.time() + 3600,
+                         ordering=ordering, stats=stats, **options)
+        print(f'{label:<28} {stats}')
+
+
+@benchmark
+def bench_parallel(args):
+    """
+    fixed-depth minimax_move along a game, sequential vs. split at the root across a process pool
+    """
+    states = [st for st in sample_game(args.plies, args.seed, BitBoard) if not st.is_terminal()]
+    start = time.perf_counter()
+    expected = [minimax_move(st, args.depth, evaluate_mask) for st in states]
+    print(f'{"sequential":<28} {time.perf_counter() - start:8.3f}s')
+    for workers in (2, 4, 8):
+        with ParallelSearch(workers) as search:
+            search.move(states[0], 0, evaluate_mask)  # starts the workers
+            start = time.perf_counter()
+            moves = [search.move(st, args.depth, evaluate_mask) for st in states]
+            elapsed = time.perf_counter() - start
+        same = 'same moves' if moves == expected else 'DIFFERENT MOVES'
+        print(f'{f"{workers} workers":<28} {elapsed:8.3f}s ({same})')
+
+
+@benchmark
+def bench_endgame(args):
+    """
+    exact endgame solver by number of empty squares (to choose the cutover point, e.g. ENDGAME_EMPTIES)
+    """
+    for empties in range(8, 16, 2):
+        nodes, elapsed, slowest = 0, 0, 0
+        for state in sample_states(args.repeat, args.seed, empties=empties):
+            black, white = state.board.bitboards()
+            own, opp = (black, white) if state.player == Board.BLACK else (white, black)
+            solver = EndgameSolver()
+            start = time.perf_counter()
+            solver.solve_move(own, opp)
+            solve_time = time.perf_counter() - start
+            nodes, elapsed, slowest = nodes + solver.nodes, elapsed + solve_time, max(slowest, solve_time)
+        report(f'{empties} empties (slowest {slowest:.2f}s)', nodes, elapsed)
+
+
+@benchmark
+def bench_mcts_reuse(args):
+    """
+    MCTS playing against itself, with and without reusing the tree between moves
+    """
+    time_limit, reuse = mcts.TIME_LIMIT, mcts.REUSE_TREE
+    mcts.TIME_LIMIT = args.time
+    try:
+        for reuse_tree in (False, True):
+            mcts.REUSE_TREE, mcts._tree = reuse_tree, None
+            random.seed(args.seed)
+            state = GameState(BitBoard(), 'B')
+            decisions = reused = playouts = 0
+            while decisions < args.plies and not state.is_terminal():
+                subtree = mcts.find_subtree(mcts._tree, state) if reuse_tree and mcts._tree else None
+                reused += subtree.visits if subtree else 0
+                state = state.next_state(mcts.make_move(state))
+                playouts += mcts._tree.visits  # root visits: playouts behind the decision
+                decisions += 1
+            label = 'tree reuse' if reuse_tree else 'fresh tree'
+            print(f'{label:<28} {playouts / decisions:8.0f} playouts per decision ({reused / decisions:.0f} reused)')
+    finally:
+        mcts.TIME_LIMIT, mcts.REUSE_TREE, mcts._tree = time_limit, reuse, None
+
+
+@benchmark
+def bench_parallel_mcts(args):
+    """
+    MCTS playouts per second from a midgame position, sequential vs. root, leaf and tree parallelism
+    """
+    state = sample_game(args.plies, args.seed, BitBoard)[-1]
+    search = PoolMCTS()
+    search.move(state, args.time)
+    report('sequential', search.pool.visits[0], args.time, 'playouts')
+    for mode, leaf_batch in [(ROOT, 1), (LEAF, 4)]:
+        for workers in (1, 2, 4, 8):
+            with ParallelMCTS(workers, mode, leaf_batch) as search:
+                search.move(state, 0.01)  # starts the workers
+                start = time.perf_counter()
+                search.move(state, args.time)
+                report(f'{mode}, {workers} workers', search.playouts, time.perf_counter() - start, 'playouts')
+    for workers in (1, 2, 4, 8):
+        with SharedTreeMCTS(workers) as search:
+            search.move(state, 0.01)
+            start = time.perf_counter()
+            search.move(state, args.time)
+            report(f'shared tree, {workers} workers', search.playouts, time.perf_counter() - start, 'playouts')
+
+
+@benchmark
+def bench_node_pool(args):
+    """
+    MCTS tree of Node objects vs. the array-backed NodePool: playouts per second and memory per node
+    """
+    for board in (Board, BitBoard):
+        state = sample_game(args.plies, args.seed, board)[-1]
+        random.seed(args.seed)
+        root = mcts.Node(state)
+        mcts.monte_carlo_tree_search(root, args.time)
+        report(f'{board.__name__} Node objects', root.visits, args.time, 'playouts')
+
+        tracemalloc.start()  # (in a second run: tracing slows the search down)
+        root = mcts.Node(state)
+        mcts.monte_carlo_tree_search(root, args.time)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f'  {memory / mcts.subtree_size(root):.0f} bytes per node')
+
+        random.seed(args.seed)
+        search = PoolMCTS()
+        search.move(state, args.time)
+        pool = search.pool
+        report(f'{board.__name__} NodePool', pool.visits[0], args.time, 'playouts')
+        print(f'  {pool.memory() / len(pool):.0f} bytes per node')
+
+
+@benchmark
+def bench_playout(args):
+    """
+    random playouts per second: GameState.next_state loop vs. the bitboard playout engine
+    """
+    def run(playout):
+        count, start = 0, time.perf_counter()
+        while time.perf_counter() - start < args.time:
+            playout()
+            count += 1
+        return count, time.perf_counter() - start
+
+    random.seed(args.seed)
+    for board in (Board, BitBoard):
+        state = sample_game(args.plies, args.seed, board)[-1]
+        report(f'{board.__name__} next_state loop', *run(lambda: mcts.random_game(state, fast=False)), 'playouts')
+        report(f'{board.__name__} random_game', *run(lambda: mcts.random_game(state)), 'playouts')
+    black, white = state.board.bitboards()
+    report('bitboard random_playout', *run(lambda: random_playout(black, white, state.player == Board.BLACK)),
+           'playouts')
+
+
+@benchmark
+def bench_batch_playout(args):
+    """
+    playouts per second of the scalar bitboard engine vs. batches of lanes played together
+    """
+    state = sample_game(args.plies, args.seed, BitBoard)[-1]
+    position = state.board.bitboards() + (state.player == Board.BLACK,)
+    rng = random.Random(args.seed)
+
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < args.time:
+        random_playout(*position)
+        count += 1
+    report('random_playout', count, time.perf_counter() - start, 'playouts')
+    for size in (1, 16, 64, 256, 1024):
+        simulator, positions = BatchSimulator(size), [position] * size
+        count, start = 0, time.perf_counter()
+        while time.perf_counter() - start < args.time:
+            simulator.play(positions, rng)
+            count += size
+        report(f'batch of {size}', count, time.perf_counter() - start, 'playouts')
+
+
+@benchmark
+def bench_enhanced_mcts(args):
+    """
+    critical endgame positions (10 empties, not all moves with the same outcome): how often MCTS variants
+    choose a move with the optimal outcome after a number of playouts, and how many roots MCTS-Solver proves
+    """
+    def sign(score):
+        return (score > 0) - (score < 0)
+
+    positions = []
+    for state in sample_states(20 * args.repeat, args.seed, empties=10):
+        black, white = state.board.bitboards()
+        own, opp = (black, white) if state.player == Board.BLACK else (white, black)
+        outcomes = {}
+        for move in state.legal_moves():
+            bit = square_bit(move)
+            flipped = flip_mask(own, opp, bit)
+            outcomes[move] = sign(-EndgameSolver().solve(opp ^ flipped, own | bit | flipped))
+        if len(set(outcomes.values())) > 1:
+            positions.append((state, outcomes))
+
+    variants = [
+        ('plain UCT', dict(solver=False, bias=0, rave=0)),
+        ('solver', dict(solver=True, bias=0, rave=0)),
+        ('progressive bias', dict(solver=False, bias=1.0, rave=0)),
+        ('RAVE', dict(solver=False, bias=0, rave=300.0)),
+        ('all', dict()),
+    ]
+    for playouts in (100, 300, 1000, 3000):
+        for label, options in variants:
+            random.seed(args.seed)
+            optimal = solved = 0
+            for state, outcomes in positions:
+                search, root = EnhancedMCTS(**options), SolverNode(state)
+                for _ in range(playouts):
+                    if root.proven != UNPROVEN:
+                        break
+                    search.iterate(root)
+                optimal += outcomes[search.best_child(root).last_move] == max(outcomes.values())
+                solved += root.proven != UNPROVEN
+            print(f'{playouts:>5} playouts, {label:<18} {optimal:>3}/{len(positions)} optimal moves, '
+                  f'{solved:>3} roots proven')
+
+
+@benchmark
+def bench_opening_book(args):
+    """
+    opening book lookups per second (hits and misses) on the positions of random games
+    """
+    book = OpeningBook()
+    print(f'{book.size} positions in {book.path}')
+    states = [state for seed in range(args.repeat) for state in sample_game(args.plies, args.seed + seed, BitBoard)]
+    start = time.perf_counter()
+    hits = sum(book.lookup(state) is not None for state in states)
+    report(f'lookups ({hits} hits)', len(states), time.perf_counter() - start, 'lookups')
+
+
+@benchmark
+def bench_symmetry(args):
+    """
+    canonical_key per second on the positions of a game: Board, BitBoard and calling transform per symmetry
+    """
+    states = sample_game(60, args.seed, BitBoard)
+    boards = [Board.from_string(str(state.board)) for state in states]
+    positions = [state.board.bitboards() for state in states]
+
+    def run(function, items):
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for item in items:
+                function(item)
+            best = min(best, time.perf_counter() - start)
+        return len(items), best
+
+    report('Board.canonical_key', *run(Board.canonical_key, boards), 'keys')
+    report('BitBoard.canonical_key', *run(BitBoard.canonical_key, [state.board for state in states]), 'keys')
+    report('transform per symmetry', *run(
+        lambda bits: min((symmetry.transform(bits[0], s), symmetry.transform(bits[1], s), s)
+                         for s in symmetry.SYMMETRIES), positions), 'keys')
+
+
+@benchmark
+def bench_evaluation(args):
+    """
+    leaf evaluations per second of evaluate_mask vs. evaluate_mask_bitwise, on both board types
+    """
+    states = sample_game(60, args.seed, BitBoard)
+    for board in (Board, BitBoard):
+        board_states = [GameState(board.from_string(str(state.board)), state.player) for state in states]
+        for eval_func in (evaluate_mask, evaluate_mask_bitwise):
+            best = float('inf')
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                for state in board_states:
+                    eval_func(state, Board.BLACK)
+                best = min(best, time.perf_counter() - start)
+            report(f'{board.__name__} {eval_func.__name__}', len(board_states), best, 'evals')
+    for label, eval_func in (('mask', evaluate_mask), ('mask_bitwise', evaluate_mask_bitwise)):
+        for board in (Board, BitBoard):
+            stats = SearchStats()
+            minimax_move(GameState(board(), 'B'), args.depth, eval_func, stats=stats)
+            report(f'minimax {board.__name__} {label}', stats.nodes, stats.elapsed)
+
+
+@benchmark
+def bench_features(args):
+    """
+    mobility of both colors through two legal_moves scans vs. Board.features (mobility, potential mobility,
+    frontier and stable discs in one bitwise pass), on fresh boards of both types; then minimax with evaluate_custom
+    """
+    positions = [state.board.bitboards() for state in sample_game(60, args.seed, BitBoard)]
+    for board in (Board, BitBoard):
+        measures = (
+            ('legal_moves x2', lambda b: (len(b.legal_moves(Board.BLACK)), len(b.legal_moves(Board.WHITE)))),
+            ('features', lambda b: b.features()),
+        )
+        for label, function in measures:
+            best = float('inf')
+            for _ in range(args.repeat):
+                boards = [board.from_bitboards(black, white) for black, white in positions]  # empty caches
+                start = time.perf_counter()
+                for b in boards:
+                    function(b)
+                best = min(best, time.perf_counter() - start)
+            report(f'{board.__name__} {label}', len(boards), best, 'boards')
+    for board in (Board, BitBoard):
+        stats = SearchStats()
+        minimax_move(GameState(board(), 'B'), args.depth, evaluate_custom, stats=stats)
+        report(f'minimax {board.__name__} custom', stats.nodes, stats.elapsed)
+
+
+@benchmark
+def bench_movegen(args):
+    """
+    matrix Board move generation on the positions of random games: dense and sparse legal-move scans,
+    has_legal_move and next_state
+    """
+    states = [state for seed in range(args.repeat) for state in sample_game(60, args.seed + seed)
+              if not state.is_terminal()]
+    moves = [min(state.legal_moves()) for state in states]
+
+    def run(label, function, empty_cache=None):
+        best = float('inf')
+        for _ in range(3):
+            for state in states:  # the find_* methods fill an existing set, the others rebuild the cache
+                state.board._legal_moves = {Board.BLACK: empty_cache and set(), Board.WHITE: empty_cache and set()}
+            start = time.perf_counter()
+            for state, move in zip(states, moves):
+                function(state, move)
+            best = min(best, time.perf_counter() - start)
+        report(label, len(states), best, 'calls')
+
+    run('find_legal_moves_dense', lambda state, move: state.board.find_legal_moves_dense(state.player), True)
+    run('find_legal_moves_sparse', lambda state, move: state.board.find_legal_moves_sparse(state.player), True)
+    run('has_legal_move', lambda state, move: state.board.has_legal_move(state.player))
+    run('legal_moves + next_state', lambda state, move: state.next_state(move))
+
+    # whole games, with the caches kept from ply to ply (as in a search or a playout)
+    best, plies = float('inf'), 0
+    for _ in range(3):
+        rng, plies = random.Random(args.seed), 0
+        start = time.perf_counter()
+        for _ in range(4 * args.repeat):
+            plies += len(random_game(rng, Board)) - 1
+        best = min(best, time.perf_counter() - start)
+    report('random game plies', plies, best, 'plies')
+
+
+@benchmark
+def bench_position(args):
+    """
+    pickle round-trips per second (as when sending a position to a worker process) and pickled size of a
+    GameState on each board type vs. a Position (rebuilt into a GameState on a BitBoard after loading)
+    """
+    states = sample_game(60, args.seed)
+    candidates = [
+        ('GameState (Board)', states, lambda state: state),
+        ('GameState (BitBoard)', [GameState(BitBoard.from_board(st.board), st.player) for st in states],
+         lambda state: state),
+        ('Position', [Position.from_state(st) for st in states], Position.to_state),
+    ]
+    for label, items, restore in candidates:
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for item in items:
+                restore(pickle.loads(pickle.dumps(item, pickle.HIGHEST_PROTOCOL)))
+            best = min(best, time.perf_counter() - start)
+        size = sum(len(pickle.dumps(item, pickle.HIGHEST_PROTOCOL)) for item in items) / len(items)
+        report(f'{label}, {size:.0f} bytes', len(items), best, 'positions')
+
+
+@benchmark
+def bench_pattern(args):
+    """
+    evaluate_pattern vs. evaluate_mask_bitwise: leaf evaluations per second, then fixed-depth minimax games
+    between them from random 4-move openings, each opening played with both colors
+    """
+    states = sample_game(60, args.seed, BitBoard)
+    for eval_func in (evaluate_mask_bitwise, evaluate_pattern):
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for state in states:
+                eval_func(state, Board.BLACK)
+            best = min(best, time.perf_counter() - start)
+        report(eval_func.__name__, len(states), best, 'evals')
+
+    wins, discs = {'pattern': 0, 'mask': 0, 'draw': 0}, 0
+    for game in range(args.repeat):
+        opening = sample_game(4, args.seed + game, BitBoard)[-1]
+        for pattern_color in (Board.BLACK, Board.WHITE):
+            state = opening
+            while not state.is_terminal():
+                eval_func = evaluate_pattern if state.player == pattern_color else evaluate_mask_bitwise
+                state = state.next_state(minimax_move(state, args.depth, eval_func))
+            diff = state.board.num_pieces(pattern_color) - state.board.num_pieces(Board.opponent(pattern_color))
+            wins['pattern' if diff > 0 else 'mask' if diff < 0 else 'draw'] += 1
+            discs += diff
+    print(f'depth {args.depth}, {2 * args.repeat} games: pattern {wins["pattern"]} wins, mask {wins["mask"]} wins, '
+          f'{wins["draw"]} draws, mean disc difference {discs / (2 * args.repeat):+.1f} for pattern')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Othello engine and agent benchmarks.')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS),
+                        help='; '.join(f'{name}: {func.__doc__.strip()}' for name, func in sorted(BENCHMARKS.items())))
+    parser.add_argument('-d', '--depth', type=int, default=4,
+                        help='Search depth passed to minimax_move.')
+    parser.add_argument('-p', '--plies', type=int, default=20,
+                        help='Number of moves of the sampled game (for benchmarks that play along a game).')
+    parser.add_argument('-s', '--seed', type=int, default=0,
+                        help='Random seed of the sampled game.')
+    parser.add_argument('-t', '--time', type=float, default=0.5,
+                        help='Time limit per move of the MCTS benchmarks, in seconds.')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='Number of runs of each measurement (the fastest one is reported).')
+    args = parser.parse_args()
+
+    BENCHMARKS[args.benchmark](args)
@@ -0,0 +1,40 @@
+"""
+Reproducible othello positions from random games, shared by the tests and benchmark.py
+"""
+import random
+
+from advsearch.othello.board import Board
+from advsearch.othello.bitboard import BitBoard
+from advsearch.othello.gamestate import GameState
+
+
+def random_game(rng: random.Random, board=BitBoard) -> list:
+    """
+    Returns the states of a game played with random legal moves, from the initial state to the terminal one
+    :param rng: random number generator choosing the moves
+    :param board: board class of the states (Board or BitBoard)
+    """
+    states = [GameState(board(), 'B')]
+    while not states[-1].is_terminal():
+        states.append(states[-1].next_state(rng.choice(sorted(states[-1].legal_moves()))))
+    return states
+
+
+def sample_states(n: int, seed: int, board=BitBoard, empties: int = None) -> list:
+    """
+    Returns n non-terminal states, each one from a different random game: the first state with at most
+    'empties' empty squares, or (without empties) the state after a random number of moves, below 50
+    :param n: number of states
+    :param seed: seed of the random games
+    :param board: board class of the states (Board or BitBoard)
+    :param empties: number of empty squares of the states (games that end before it are skipped)
+    """
+    rng = random.Random(seed)
+    states = []
+    while len(states) < n:
+        game = random_game(rng, board)[:-1]
+        if empties is None:
+            states.append(game[min(rng.randrange(0, 50), len(game) - 1)])
+        else:
+            states.extend([state for state in game if state.board.piece_count[Board.EMPTY] <= empties][:1])
+    return states
@@ -22,7 +22,7 @@ class Server(object):
 
     """
 
-    def __init__(self, game_type, p1_agent, p2_agent, delay, history, output, pace=0):
+    def __init__(self, game_type, p1_agent, p2_agent, delay, history, output, pace=0, bitboard=False):
         """
         Initializes the Game server
         :param game_type: type of game to play (othello, tttm for tic-tac-toe misere)
@@ -32,6 +32,7 @@ class Server(object):
         :param history: file that will contain the match history (plain text)
         :param output: file to save game details (includes history)
         :param pace: time to wait to display a move, if a player returns before timeout
+        :param bitboard: whether to use the bitboard-based othello board (same API, faster)
         """
 
         if game_type not in {'othello', 'tttm'}:
@@ -40,6 +41,8 @@ class Server(object):
         if game_type == 'othello':
             from advsearch.othello.board import Board 
             from advsearch.othello.gamestate import GameState
+            if bitboard:
+                from advsearch.othello.bitboard import BitBoard as Board
         else:
             from advsearch.tttm.board import Board
             from advsearch.tttm.gamestate import GameState
@@ -274,9 +277,12 @@ if __name__ == '__main__':
                         default='results.xml', metavar='output-file',
                         help='File to save game details (includes history)')
 
+    parser.add_argument('-b', '--bitboard', action='store_true',
+                        help='Use the bitboard-based Othello board (same API, faster move generation).')
+
     args = parser.parse_args()
     p1, p2 = args.players
 
-    s = Server(args.game_type, p1, p2, args.delay, args.history, args.output, args.pace)
+    s = Server(args.game_type, p1, p2, args.delay, args.history, args.output, args.pace, args.bitboard)
     s.run()
     s.write_output()
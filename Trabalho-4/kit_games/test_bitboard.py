@@ -0,0 +1,152 @@
+import random
+import unittest
+
+from advsearch.othello.board import Board
+from advsearch.othello.bitboard import BitBoard, stable_mask, LINES, EDGES, SQUARE_MOVES
+from advsearch.othello.gamestate import GameState
+from samples import random_game
+
+
+class TestBitBoard(unittest.TestCase):
+    """
+    Testa se o BitBoard se comporta exatamente como o Board original
+    """
+
+    def test_initial_board(self):
+        """
+        O tabuleiro inicial deve ser igual ao do Board
+        """
+        self.assertEqual(str(BitBoard()), str(Board()))
+        self.assertEqual(BitBoard().piece_count, Board().piece_count)
+        self.assertEqual(BitBoard().legal_moves('B'), Board().legal_moves('B'))
+
+    def test_from_string(self):
+        """
+        A conversao de/para string deve preservar o tabuleiro e a contagem de pecas
+        """
+        board_str = ('BBBBBBB.\n'
+                     'BBWWWWBB\n'
+                     'BWBWWBBB\n'
+                     'BWWWBBBB\n'
+                     'BWBBBBBB\n'
+                     'BWBWBBBB\n'
+                     'BBWWBBBB\n'
+                     'BBBWBBBB\n')
+        bitboard = BitBoard.from_string(board_str)
+        board = Board.from_string(board_str)
+        self.assertEqual(str(bitboard), str(board))
+        self.assertEqual(bitboard.piece_count, board.piece_count)
+        self.assertEqual(bitboard.tiles, board.tiles)
+        self.assertEqual(str(BitBoard.from_board(board)), board_str)
+
+        copy = BitBoard.from_bitboards(*bitboard.bitboards())
+        self.assertEqual(str(copy), board_str)
+        self.assertEqual((copy.piece_count, copy.zobrist), (bitboard.piece_count, bitboard.zobrist))
+
+    def test_random_games(self):
+        """
+        Partidas aleatorias devem produzir as mesmas jogadas legais, pecas e vencedor
+        """
+        rng = random.Random(42)
+        for _ in range(20):
+            state = GameState(Board(), 'B')
+            bit_state = GameState(BitBoard(), 'B')
+            while not state.is_terminal():
+                self.assertFalse(bit_state.is_terminal())
+                self.assertEqual(state.legal_moves(), bit_state.legal_moves())
+                self.assertEqual(state.board.piece_count, bit_state.board.piece_count)
+                move = rng.choice(sorted(state.legal_moves()))
+                state, bit_state = state.next_state(move), bit_state.next_state(move)
+                self.assertEqual(str(state.board), str(bit_state.board))
+                self.assertEqual(state.player, bit_state.player)
+            self.assertTrue(bit_state.is_terminal())
+            self.assertEqual(state.winner(), bit_state.winner())
+
+    def test_illegal_move(self):
+        """
+        Jogadas ilegais nao alteram o tabuleiro
+        """
+        board = BitBoard()
+        self.assertFalse(board.process_move((0, 0), 'B'))
+        self.assertFalse(board.is_legal((8, 3), 'B'))
+        self.assertEqual(str(board), str(Board()))
+        with self.assertRaises(ValueError):
+            GameState(board, 'B').next_state((0, 0))
+
+    def test_flip_tiles(self):
+        """
+        flip_tiles deve inverter as mesmas pecas que no Board
+        """
+        board, bitboard = Board(), BitBoard()
+        for b in (board, bitboard):
+            b.flip_tiles((2, 3), 'B', Board.DOWN_RIGHT)  # no bracket: nothing happens
+            b.flip_tiles((2, 3), 'B', Board.RIGHT)  # flips the white disc at row 3, col 3
+        self.assertEqual(str(board), str(bitboard))
+        self.assertEqual(bitboard.tiles[3][3], 'B')
+        self.assertEqual(board.piece_count, bitboard.piece_count)
+
+
+class TestDiscFeatures(unittest.TestCase):
+    """
+    Testa as caracteristicas (mobilidade, fronteira, pecas estaveis) calculadas com operacoes de bits
+    """
+
+    @staticmethod
+    def adjacent(board, x, y, piece):
+        return any(0 <= x + dx < 8 and 0 <= y + dy < 8 and board.tiles[y + dy][x + dx] == piece
+                   for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy)
+
+    @staticmethod
+    def stable_discs(board):
+        """
+        Pecas estaveis do tabuleiro, como (x, y, cor)
+        """
+        black, white = board.bitboards()
+        safe = [edge | sum(line for line in lines if (black | white) & line == line)
+                for lines, edge in zip(LINES, EDGES)]
+        return {SQUARE_MOVES[sq] + (color,) for color, own in (('B', black), ('W', white))
+                for sq in range(64) if stable_mask(own, safe) >> sq & 1}
+
+    def test_counts(self):
+        """
+        Mobilidade, mobilidade potencial e fronteira conferem com a contagem casa a casa, nos dois tabuleiros
+        """
+        rng = random.Random(8)
+        squares = [(x, y) for y in range(8) for x in range(8)]
+        for _ in range(5):
+            for state in random_game(rng, Board):
+                board = state.board
+                features = board.features()
+                self.assertEqual(BitBoard.from_board(board).features(), features)
+                for color in ('B', 'W'):
+                    self.assertEqual(features.mobility[color], len(board.legal_moves(color)))
+                    self.assertEqual(features.potential_mobility[color], sum(
+                        board.tiles[y][x] == '.' and self.adjacent(board, x, y, Board.opponent(color))
+                        for x, y in squares))
+                    self.assertEqual(features.frontier[color], sum(
+                        board.tiles[y][x] == color and self.adjacent(board, x, y, '.') for x, y in squares))
+
+    def test_stable_discs(self):
+        """
+        Uma peca estavel nunca e' virada ate o fim da partida; num tabuleiro cheio todas sao estaveis
+        """
+        rng = random.Random(9)
+        for _ in range(10):
+            stable = set()
+            for state in random_game(rng):
+                discs = self.stable_discs(state.board)
+                self.assertTrue(stable <= discs)  # still in place (and still stable)
+                for color in ('B', 'W'):
+                    self.assertEqual(state.board.features().stable[color], sum(d[2] == color for d in discs))
+                stable = discs
+
+        board = BitBoard.from_string('BBBBBBBB\n' * 4 + 'WWWWWWWW\n' * 4)
+        self.assertEqual(board.features().stable, {'B': 32, 'W': 32})
+
+        # the corner and its edge neighbors are stable; the diagonal neighbor can still be flipped from (0, 2)
+        board = BitBoard.from_string('BBW.....\nBB......\n' + '........\n' * 6)
+        self.assertEqual(self.stable_discs(board), {(0, 0, 'B'), (1, 0, 'B'), (0, 1, 'B')})
+
+
+if __name__ == '__main__':
+    unittest.main()
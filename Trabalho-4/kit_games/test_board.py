@@ -0,0 +1,291 @@
+import random
+import unittest
+
+from advsearch.othello.board import Board
+from advsearch.othello.bitboard import BitBoard
+from advsearch.othello.gamestate import GameState
+from advsearch.othello.position import Position
+from advsearch.othello import zobrist
+from samples import random_game
+
+
+class TestBoardCopy(unittest.TestCase):
+    """
+    Testa a copia estrutural do Board
+    """
+
+    def test_copy_is_equal(self):
+        """
+        A copia deve ter as mesmas pecas, contagens e jogadas legais
+        """
+        board = GameState(Board(), 'B').next_state((4, 5)).board
+        board.legal_moves('W')  # fills the cache
+        copy = board.copy()
+        self.assertEqual(str(copy), str(board))
+        self.assertEqual(copy.piece_count, board.piece_count)
+        self.assertEqual(copy.legal_moves('W'), board.legal_moves('W'))
+        self.assertEqual(copy.legal_moves('B'), board.legal_moves('B'))
+
+    def test_copy_is_independent(self):
+        """
+        Jogar na copia nao pode alterar o tabuleiro original
+        """
+        board = Board()
+        moves = set(board.legal_moves('B'))
+        copy = board.copy()
+        copy.process_move((4, 5), 'B')
+        self.assertEqual(str(board), str(Board()))
+        self.assertEqual(board.piece_count, Board().piece_count)
+        self.assertEqual(board.legal_moves('B'), moves)
+        self.assertNotEqual(copy.legal_moves('B'), moves)
+
+    def test_shared_legal_moves_are_immutable(self):
+        """
+        As jogadas legais em cache sao compartilhadas com as copias, entao nao podem ser alteradas
+        """
+        for board_class in (Board, BitBoard):
+            board = board_class()
+            moves = board.legal_moves('B')
+            copy = board.copy()
+            with self.assertRaises(AttributeError):
+                moves.pop()
+            mutable = set(copy.legal_moves('B'))
+            mutable.discard((4, 5))
+            self.assertEqual(len(board.legal_moves('B')), 4)
+            self.assertEqual(copy.legal_moves('B'), moves)
+
+
+class TestMakeUnmake(unittest.TestCase):
+    """
+    Testa as jogadas in-place (make_move/unmake_move) do Board e do BitBoard
+    """
+
+    def test_make_move_matches_next_state(self):
+        """
+        make_move deve produzir o mesmo estado que next_state, e unmake_move deve desfaze-lo
+        """
+        rng = random.Random(7)
+        for board_class in (Board, BitBoard):
+            for _ in range(10):
+                state = GameState(board_class(), 'B')
+                mutable = state.copy()
+                history = []
+                while not state.is_terminal():
+                    move = rng.choice(sorted(state.legal_moves()))
+                    state = state.next_state(move)
+                    history.append((mutable.make_move(move), str(state.board), state.player))
+                    self.assertEqual(str(mutable.board), str(state.board))
+                    self.assertEqual(mutable.board.piece_count, state.board.piece_count)
+                    self.assertEqual(mutable.player, state.player)
+                    if state.player is not None:
+                        self.assertEqual(mutable.legal_moves(), state.legal_moves())
+
+                # undoes everything, checking every intermediate position
+                for undo, board_str, player in reversed(history):
+                    self.assertEqual((str(mutable.board), mutable.player), (board_str, player))
+                    mutable.unmake_move(undo)
+                initial = GameState(board_class(), 'B')
+                self.assertEqual(str(mutable.board), str(initial.board))
+                self.assertEqual(mutable.board.piece_count, initial.board.piece_count)
+                self.assertEqual(mutable.legal_moves(), initial.legal_moves())
+                self.assertEqual(mutable.player, 'B')
+
+    def test_illegal_make_move(self):
+        """
+        make_move deve recusar jogadas ilegais sem alterar o tabuleiro
+        """
+        for board_class in (Board, BitBoard):
+            board = board_class()
+            with self.assertRaises(ValueError):
+                board.make_move((0, 0), 'B')
+            self.assertEqual(str(board), str(Board()))
+
+
+class TestZobrist(unittest.TestCase):
+    """
+    Testa a atualizacao incremental da chave zobrist
+    """
+
+    def test_incremental_key(self):
+        """
+        A chave incremental deve ser igual a calculada do zero, nos dois tipos de tabuleiro
+        """
+        rng = random.Random(11)
+        for _ in range(10):
+            state, bit_state = GameState(Board(), 'B'), GameState(BitBoard(), 'B')
+            mutable = GameState(Board(), 'B')
+            while not state.is_terminal():
+                self.assertEqual(state.board.zobrist, zobrist.tiles_hash(state.board.tiles))
+                self.assertEqual(state.zobrist, bit_state.zobrist)
+                self.assertEqual(state.zobrist, mutable.zobrist)
+                move = rng.choice(sorted(state.legal_moves()))
+                state, bit_state = state.next_state(move), bit_state.next_state(move)
+                undo = mutable.make_move(move)
+                self.assertEqual(mutable.board.zobrist, zobrist.tiles_hash(mutable.board.tiles))
+                mutable.unmake_move(undo)
+                self.assertEqual(mutable.board.zobrist, zobrist.tiles_hash(mutable.board.tiles))
+                mutable.make_move(move)
+
+    def test_side_to_move(self):
+        """
+        O mesmo tabuleiro com jogadores diferentes deve ter chaves diferentes
+        """
+        board = Board()
+        self.assertNotEqual(GameState(board, 'B').zobrist, GameState(board, 'W').zobrist)
+        self.assertEqual(GameState(board, 'B').zobrist, board.zobrist)
+
+    def test_flip_tiles(self):
+        """
+        flip_tiles tambem deve atualizar a chave
+        """
+        for board in (Board(), BitBoard()):
+            board.flip_tiles((2, 3), 'B', Board.RIGHT)
+            self.assertEqual(board.zobrist, zobrist.tiles_hash(board.tiles))
+
+
+class TestRays(unittest.TestCase):
+    """
+    Testa a geracao de jogadas com as tabelas de raios pre-computadas
+    """
+
+    def test_ray_tables(self):
+        """
+        Cada raio vai ate a borda, e so os raios com pelo menos duas casas sao guardados
+        """
+        from advsearch.othello.board import DIRECTION_RAYS, SQUARE_RAYS
+        first, rest = DIRECTION_RAYS[0][0][Board.DOWN_RIGHT]
+        self.assertEqual((first,) + rest, tuple((i, i) for i in range(1, 8)))
+        self.assertIsNone(DIRECTION_RAYS[0][0][Board.UP])
+        self.assertIsNone(DIRECTION_RAYS[1][3][Board.LEFT])  # so uma casa ate a borda
+        self.assertEqual(len(SQUARE_RAYS[0][0]), 3)
+        self.assertEqual(len(SQUARE_RAYS[3][3]), 8)
+
+    def test_dense_and_sparse_agree(self):
+        """
+        As buscas densa e esparsa e has_legal_move concordam com as jogadas do BitBoard ao longo de partidas
+        """
+        rng = random.Random(9)
+        for _ in range(5):
+            for state in random_game(rng, Board):
+                bit_board = BitBoard.from_board(state.board)
+                for color in (Board.BLACK, Board.WHITE):
+                    expected = bit_board.legal_moves(color)
+                    for find in (Board.find_legal_moves_dense, Board.find_legal_moves_sparse):
+                        board = state.board.copy()
+                        board._legal_moves[color] = set()
+                        find(board, color)
+                        self.assertEqual(board._legal_moves[color], expected)
+                    self.assertEqual(state.board.has_legal_move(color), bool(expected))
+
+    def test_has_legal_move_cache(self):
+        """
+        has_legal_move usa as jogadas em cache e guarda o conjunto vazio quando nao ha jogada
+        """
+        board = Board.from_string('BW......\n' + '........\n' * 7)
+        self.assertFalse(board.has_legal_move(Board.WHITE))
+        self.assertEqual(board._legal_moves[Board.WHITE], set())
+        self.assertIsNone(board._legal_moves[Board.BLACK])
+        self.assertTrue(board.has_legal_move(Board.BLACK))
+        self.assertIsNone(board._legal_moves[Board.BLACK])  # parou na primeira jogada, sem guardar
+        self.assertEqual(board.legal_moves(Board.BLACK), {(2, 0)})
+
+        board._legal_moves[Board.BLACK] = set()  # a resposta vem do cache, sem varrer o tabuleiro
+        self.assertFalse(board.has_legal_move(Board.BLACK))
+
+
+class TestSymmetry(unittest.TestCase):
+    """
+    Testa a forma canonica das 8 simetrias do tabuleiro
+    """
+
+    @staticmethod
+    def transformed(board, sym):
+        """
+        Retorna o tabuleiro com cada peca levada para a casa transformada pela simetria
+        """
+        tiles = [['.'] * 8 for _ in range(8)]
+        for y, row in enumerate(board.tiles):
+            for x, piece in enumerate(row):
+                tx, ty = Board.transform_move((x, y), sym)
+                tiles[ty][tx] = piece
+        return Board.from_string('\n'.join(''.join(row) for row in tiles))
+
+    def test_symmetric_boards_share_the_key(self):
+        """
+        As 8 versoes simetricas de um tabuleiro tem a mesma chave canonica, nos dois tipos de tabuleiro,
+        e as jogadas legais sao levadas as jogadas legais da forma canonica e de volta
+        """
+        from advsearch.othello import symmetry
+
+        for state in random_game(random.Random(5), Board)[1:21]:
+            board = state.board
+            key = board.canonical_key()
+            canonical_board = BitBoard.from_bitboards(*key[:2])
+            for move in board.legal_moves(state.player):
+                canonical_move = Board.transform_move(move, key[2])
+                self.assertTrue(canonical_board.is_legal(canonical_move, state.player))
+                self.assertEqual(Board.inverse_transform_move(canonical_move, key[2]), move)
+            for sym in symmetry.SYMMETRIES:
+                other = self.transformed(board, sym)
+                self.assertEqual(other.canonical_key()[:2], key[:2])
+                self.assertEqual(BitBoard.from_board(other).canonical_key(), other.canonical_key())
+                black, white = BitBoard.from_board(board).bitboards()
+                self.assertEqual(symmetry.transform(black, sym), BitBoard.from_board(other).black)
+                self.assertEqual(symmetry.inverse_transform(symmetry.transform(white, sym), sym), white)
+
+    def test_initial_board(self):
+        """
+        As 4 primeiras jogadas levam a mesma posicao canonica
+        """
+        state = GameState(BitBoard(), 'B')
+        keys = {state.next_state(move).board.canonical_key()[:2] for move in state.legal_moves()}
+        self.assertEqual(len(keys), 1)
+
+
+class TestPosition(unittest.TestCase):
+    """
+    Testa a posicao compacta (bitboards e jogador da vez)
+    """
+
+    def test_conversions(self):
+        """
+        Board, BitBoard e Position representam a mesma posicao ao longo de uma partida
+        """
+        game = random_game(random.Random(3), Board)
+        for state in game[:-1]:
+            position = Position.from_state(state)
+            self.assertEqual(position, Position.from_state(GameState(BitBoard.from_board(state.board), state.player)))
+            self.assertEqual(position.player, state.player)
+            for board_class in (Board, BitBoard):
+                board = position.to_board(board_class)
+                self.assertIsInstance(board, board_class)
+                self.assertEqual(str(board), str(state.board))
+                self.assertEqual(board.piece_count, state.board.piece_count)
+                self.assertEqual(board.zobrist, state.board.zobrist)
+                self.assertEqual(position.to_state(board_class).legal_moves(), state.legal_moves())
+        self.assertIsNone(Position.from_state(game[-1]).player)
+
+    def test_hash_and_pickle(self):
+        """
+        A posicao e imutavel, pode ser chave de dicionario e e serializada de forma compacta
+        """
+        import pickle
+        state = GameState(Board(), 'B')
+        position = Position.from_state(state)
+        self.assertEqual(hash(position), hash(Position.from_state(GameState(BitBoard(), 'B'))))
+        self.assertNotEqual(position, Position.from_state(GameState(Board(), 'W')))
+        self.assertEqual(len({position, Position.from_state(state.copy())}), 1)
+        with self.assertRaises(AttributeError):
+            position.player = 'W'
+
+        data = pickle.dumps(position, pickle.HIGHEST_PROTOCOL)
+        self.assertEqual(pickle.loads(data), position)
+        self.assertLess(len(data), len(pickle.dumps(state, pickle.HIGHEST_PROTOCOL)) // 4)
+
+        # ordenadas como tuplas (black, white, player)
+        positions = [Position(2, 1, 'W'), Position(1, 2, 'B'), Position(1, 2, 'W')]
+        self.assertEqual(sorted(positions), [Position(1, 2, 'B'), Position(1, 2, 'W'), Position(2, 1, 'W')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -43,6 +43,283 @@ class TestMCTSVerySimpleGame(unittest.TestCase):
         self.assertEqual(self.move,(0, 1))
 
 
+class TestParallelMCTS(unittest.TestCase):
+    """
+    Testa o MCTS paralelo (paralelismo na raiz e nas folhas)
+    """
+
+    def test_correct_move_very_simple_game(self):
+        """
+        Os dois modos devem encontrar a jogada vencedora no jogo muito simples
+        """
+        from advsearch.your_agent.parallel_mcts import ParallelMCTS, ROOT, LEAF
+        for mode in (ROOT, LEAF):
+            with self.subTest(mode), ParallelMCTS(2, mode) as search:
+                self.assertEqual(search.move(GameState(Board(), 'B'), 0.5), (0, 1))
+                self.assertGreater(search.playouts, 0)
+
+    def test_othello(self):
+        """
+        Em othello o estado e' enviado aos processos como bitboards e a jogada retornada e' legal
+        """
+        from advsearch.othello.board import Board as OthelloBoard
+        from advsearch.othello.gamestate import GameState as OthelloGameState
+        from advsearch.your_agent.parallel_mcts import ParallelMCTS, LEAF
+        state = OthelloGameState(OthelloBoard(), 'B')
+        with ParallelMCTS(2, LEAF, leaf_batch=2) as search:
+            self.assertIn(search.move(state, 0.3), state.legal_moves())
+
+    def test_parallel_mode_of_make_move(self):
+        """
+        Com PARALLEL, make_move usa a busca paralela, e os processos sao mantidos entre as jogadas
+        """
+        from advsearch.othello.board import Board as OthelloBoard
+        from advsearch.othello.gamestate import GameState as OthelloGameState
+        from advsearch.your_agent.parallel_mcts import ROOT, LEAF
+        from advsearch.your_agent.shared_tree_mcts import SharedTreeMCTS, TREE
+        parallel, workers, time_limit = mcts.PARALLEL, mcts.WORKERS, mcts.TIME_LIMIT
+        mcts.PARALLEL, mcts.WORKERS, mcts.TIME_LIMIT = ROOT, 2, 0.3
+        try:
+            self.assertEqual(mcts.make_move(GameState(Board(), 'B')), (0, 1))
+            search = mcts.parallel_search()
+            self.assertEqual(mcts.make_move(GameState(Board(), 'B')), (0, 1))
+            self.assertIs(mcts.parallel_search(), search)
+            mcts.PARALLEL = LEAF
+            self.assertEqual(mcts.make_move(GameState(Board(), 'B')), (0, 1))
+            self.assertIsNot(mcts.parallel_search(), search)
+            mcts.PARALLEL = TREE  # so' no othello
+            state = OthelloGameState(OthelloBoard(), 'B')
+            self.assertIn(mcts.make_move(state), state.legal_moves())
+            self.assertIsInstance(mcts.parallel_search(), SharedTreeMCTS)
+        finally:
+            mcts.parallel_search().close()
+            mcts.PARALLEL, mcts.WORKERS, mcts.TIME_LIMIT = parallel, workers, time_limit
+            mcts._parallel = None
+
+
+class TestSharedTreeMCTS(unittest.TestCase):
+    """
+    Testa o MCTS com arvore compartilhada entre processos (virtual loss)
+    """
+
+    def test_shared_tree(self):
+        """
+        A jogada e' legal, todas as perdas virtuais sao removidas e as visitas sao consistentes
+        """
+        from advsearch.othello.board import Board as OthelloBoard
+        from advsearch.othello.gamestate import GameState as OthelloGameState
+        from advsearch.your_agent.shared_tree_mcts import SharedTreeMCTS
+
+        state = OthelloGameState(OthelloBoard(), 'B')
+        with SharedTreeMCTS(2, capacity=1 << 14) as search:
+            self.assertIn(search.move(state, 0.5), state.legal_moves())
+            tree = search.tree
+            size = tree.size.value
+            self.assertEqual(tree.visits[0], search.playouts)
+            self.assertEqual(sum(tree.virtual[:size]), 0)
+            first = tree.first_child[0]
+            self.assertEqual(sum(tree.visits[first:first + tree.n_children[0]]), tree.visits[0])
+
+    def test_random_playout(self):
+        """
+        Uma partida sem jogadas possiveis retorna o vencedor pela contagem de pecas
+        """
+        from advsearch.your_agent.shared_tree_mcts import random_playout, BLACK, WHITE, NOBODY
+        self.assertEqual(random_playout(0b111, 1 << 63, NOBODY), BLACK)
+        self.assertEqual(random_playout(1, (1 << 63) | (1 << 62), NOBODY), WHITE)
+        self.assertIn(random_playout(0x0000000810000000, 0x0000001008000000, BLACK), (BLACK, WHITE, NOBODY))
+
+
+class TestPlayout(unittest.TestCase):
+    """
+    Testa as simulacoes aleatorias rapidas em bitboards
+    """
+
+    def test_playout_ends_the_game(self):
+        """
+        A simulacao termina numa posicao sem jogadas para nenhum jogador, a partir de tabuleiros de ambos os tipos
+        """
+        import random
+        from advsearch.othello.board import Board as OthelloBoard
+        from advsearch.othello.bitboard import BitBoard, move_mask
+        from advsearch.othello.gamestate import GameState as OthelloGameState
+        from advsearch.your_agent.playout import random_playout, state_playout
+
+        black, white = BitBoard().bitboards()
+        for seed in range(20):
+            final_black, final_white = random_playout(black, white, True, random.Random(seed).random)
+            self.assertEqual(final_black & final_white, 0)
+            self.assertEqual(move_mask(final_black, final_white) | move_mask(final_white, final_black), 0)
+        for board in (OthelloBoard, BitBoard):
+            self.assertIn(state_playout(OthelloGameState(board(), 'W')), ('B', 'W', None))
+
+    def test_batch_playouts_end_the_game(self):
+        """
+        Cada jogo do lote termina numa posicao sem jogadas, e os vencedores somam o tamanho do lote
+        """
+        import random
+        from advsearch.othello.board import Board as OthelloBoard
+        from advsearch.othello.bitboard import BitBoard, move_mask
+        from advsearch.othello.gamestate import GameState as OthelloGameState
+        from advsearch.your_agent.batch_playout import BatchSimulator, batch_winners
+
+        black, white = BitBoard().bitboards()
+        positions = [(black, white, True), (black, white, False), (0b111, 1 << 63, True)]
+        finals = BatchSimulator(3).play(positions, random.Random(0))
+        self.assertEqual(finals[2], (0b111, 1 << 63))  # ja terminado
+        for final_black, final_white in finals:
+            self.assertEqual(final_black & final_white, 0)
+            self.assertEqual(move_mask(final_black, final_white) | move_mask(final_white, final_black), 0)
+        winners = batch_winners(OthelloGameState(OthelloBoard(), 'W'), 32)
+        self.assertEqual(sum(winners.values()), 32)
+        self.assertTrue(set(winners) <= {'B', 'W', None})
+
+
+class TestMCTSTreeReuse(unittest.TestCase):
+    """
+    Testa o reaproveitamento da arvore do MCTS entre as jogadas
+    """
+
+    def setUp(self):
+        self.time_limit, self.node_pool = mcts.TIME_LIMIT, mcts.NODE_POOL
+        mcts.TIME_LIMIT, mcts.NODE_POOL = 0.3, False
+        mcts._tree = mcts._pool_search = None
+
+    def tearDown(self):
+        mcts.TIME_LIMIT, mcts.NODE_POOL = self.time_limit, self.node_pool
+        mcts._tree = mcts._pool_search = None
+
+    def test_reuses_subtree(self):
+        """
+        Depois da nossa jogada e da resposta do adversario, a busca continua da subarvore da nova posicao
+        """
+        from advsearch.othello.board import Board as OthelloBoard
+        from advsearch.othello.gamestate import GameState as OthelloGameState
+
+        state = OthelloGameState(OthelloBoard(), 'B')
+        state = state.next_state(mcts.make_move(state))
+        reply = max(mcts._tree.children, key=lambda child: child.visits)
+        reply = max(reply.children, key=lambda child: child.visits)  # the most explored answer
+        visits = reply.visits
+
+        state = state.next_state(reply.last_move)
+        mcts.make_move(state)
+        self.assertIs(mcts._tree, reply)
+        self.assertIsNone(reply.parent)
+        self.assertGreater(reply.visits, visits)
+
+    def test_unknown_position(self):
+        """
+        Uma posicao fora da arvore anterior comeca uma arvore nova
+        """
+        mcts.make_move(GameState(Board(), 'B'))
+        old_tree = mcts._tree
+        mcts.make_move(GameState(Board(), 'W'))
+        self.assertIsNot(mcts._tree, old_tree)
+
+    def test_reuses_pool_subtree(self):
+        """
+        O mesmo com a arvore em arrays: a subarvore da nova posicao e' copiada para um novo NodePool
+        """
+        from advsearch.othello.board import Board as OthelloBoard
+        from advsearch.othello.gamestate import GameState as OthelloGameState
+        from advsearch.your_agent.node_pool import decode_move
+        mcts.NODE_POOL = True
+
+        state = OthelloGameState(OthelloBoard(), 'B')
+        move = mcts.make_move(state)
+        pool = mcts._pool_search.pool
+        ours = pool.best_child(0)
+        self.assertEqual(decode_move(pool.move[ours]), move)
+        reply = pool.best_child(ours)
+        visits, n_children = pool.visits[reply], pool.n_children[reply]
+
+        state = state.next_state(move).next_state(decode_move(pool.move[reply]))
+        mcts.make_move(state)
+        new_pool = mcts._pool_search.pool
+        self.assertIsNot(new_pool, pool)
+        self.assertGreater(new_pool.visits[0], visits)
+        self.assertGreaterEqual(new_pool.n_children[0], n_children)
+
+
+class TestNodePool(unittest.TestCase):
+    """
+    Testa a arvore do MCTS guardada em arrays
+    """
+
+    def test_backpropagate_and_subtree(self):
+        """
+        Os resultados sao contados do ponto de vista de quem jogou, e a subarvore preserva as estatisticas
+        """
+        from advsearch.your_agent.node_pool import NodePool, decode_move
+        pool = NodePool()
+        first = pool.add_children(0, [(0, 1), (2, 3)], 'B')
+        grandchild = pool.add_children(first + 1, [(4, 5)], 'W')
+        pool.backpropagate(grandchild, 'W')
+        pool.backpropagate(first, None)
+        self.assertEqual(list(pool.visits), [2, 1, 1, 1])
+        self.assertEqual(list(pool.value), [0, 0.5, 0, 1])
+        self.assertEqual(pool.select_child(0), first)  # the draw is better than the loss
+
+        subtree = pool.subtree(first + 1)
+        self.assertEqual(len(subtree), 2)
+        self.assertEqual((subtree.visits[1], subtree.value[1], decode_move(subtree.move[1])), (1, 1, (4, 5)))
+        self.assertEqual(subtree.parent[1], 0)
+
+
+class TestEnhancedMCTS(unittest.TestCase):
+    """
+    Testa o MCTS com MCTS-Solver, vies progressivo e RAVE
+    """
+
+    def test_solves_very_simple_game(self):
+        """
+        A raiz e' provada vencedora (a busca termina antes do tempo) e a jogada vencedora e' escolhida
+        """
+        import time
+        from advsearch.your_agent.enhanced_mcts import EnhancedMCTS
+
+        search = EnhancedMCTS()
+        start = time.time()
+        self.assertEqual(search.move(GameState(Board(), 'B'), 5), (0, 1))
+        self.assertLess(time.time() - start, 1)
+        self.assertGreaterEqual(search.stats.proven, 2)  # a folha vencedora e a raiz
+        self.assertEqual(search.stats.tree_size, 4)
+
+    def test_proves_othello_endgame(self):
+        """
+        Em finais com poucas casas vazias, o resultado provado da raiz e' o do resolvedor exato
+        """
+        from advsearch.your_agent.endgame import EndgameSolver
+        from advsearch.your_agent.enhanced_mcts import EnhancedMCTS, SolverNode, UNPROVEN
+        from samples import sample_states
+
+        for state in sample_states(5, seed=0, empties=6):
+            black, white = state.board.bitboards()
+            own, opp = (black, white) if state.player == 'B' else (white, black)
+            _, score = EndgameSolver().solve_move(own, opp)
+            expected = state.player if score > 0 else None if score == 0 else ('W' if state.player == 'B' else 'B')
+
+            search, root = EnhancedMCTS(), SolverNode(state)
+            while root.proven == UNPROVEN:
+                search.iterate(root)
+            self.assertEqual(root.proven, expected)
+            if score > 0:
+                self.assertEqual(search.best_child(root).proven, state.player)
+
+    def test_enhanced_mode_of_make_move(self):
+        """
+        Com ENHANCED, make_move usa a busca aprimorada e guarda as suas estatisticas
+        """
+        enhanced, time_limit = mcts.ENHANCED, mcts.TIME_LIMIT
+        mcts.ENHANCED, mcts.TIME_LIMIT = True, 0.5
+        try:
+            self.assertEqual(mcts.make_move(GameState(Board(), 'B')), (0, 1))
+            self.assertGreater(mcts.last_stats.playouts, 0)
+        finally:
+            mcts.ENHANCED, mcts.TIME_LIMIT = enhanced, time_limit
+
+
 
 # *********************************************
 # Voce nao precisa se preocupar com o codigo daqui pra baixo
@@ -169,7 +169,148 @@ WWWWWWW."""), 'B')
         score_W = evaluate_mask(state3, 'W')
         self.assertEqual(score_W, expected_score_W, "Caso de teste 3W: Pontuação incorreta para o estado (Jogador W).")
 
+    def test_evaluate_mask_bitwise(self):
+        """
+        A versao com mascaras de bits deve dar os mesmos valores, nos dois tipos de tabuleiro
+        """
+        import random
+        from advsearch.othello.bitboard import BitBoard
+        from advsearch.your_agent.othello_minimax_mask import evaluate_mask_bitwise
+        from samples import random_game
+
+        rng = random.Random(3)
+        for _ in range(5):
+            for state in random_game(rng, Board)[:-1]:
+                bit_state = GameState(BitBoard.from_board(state.board), state.player)
+                for player in ('B', 'W'):
+                    expected = evaluate_mask(state, player)
+                    self.assertEqual(evaluate_mask_bitwise(state, player), expected)
+                    self.assertEqual(evaluate_mask_bitwise(bit_state, player), expected)
+
+
+class TestEvaluateCustom(unittest.TestCase):
+    """
+    Testa a avaliacao customizada (mobilidade, fronteira e pecas estaveis)
+    """
+
+    def test_evaluate_custom(self):
+        """
+        O valor e' oposto para o outro jogador, igual nos dois tabuleiros, e nos estados terminais e' a utilidade
+        """
+        from advsearch.othello.bitboard import BitBoard
+        from advsearch.your_agent import othello_minimax_custom as custom
+        from advsearch.your_agent.othello_minimax_custom import evaluate_custom, WIN_SCORE
+
+        # initial board: same mobility, potential mobility and frontier for both players
+        self.assertEqual(evaluate_custom(GameState(Board(), 'B'), 'B'), 0)
+
+        state = GameState(Board(), 'B').next_state((4, 5))
+        for player in ('B', 'W'):
+            value = evaluate_custom(state, player)
+            self.assertEqual(evaluate_custom(state, Board.opponent(player)), -value)
+            self.assertEqual(evaluate_custom(GameState(BitBoard.from_board(state.board), 'W'), player), value)
+
+        # B: 1 move, 7 empty squares next to W and a stable corner; W: no moves, 2 empty squares next to B
+        corner = GameState(Board.from_string('B.......\n.W......\n' + '........\n' * 6), 'W')
+        expected = custom.MOBILITY_WEIGHT + 5 * custom.POTENTIAL_MOBILITY_WEIGHT + custom.STABLE_WEIGHT
+        self.assertEqual(evaluate_custom(corner, 'B'), expected)
+
+        state = GameState(Board.from_string('BBBBBBBB\n' * 5 + 'WWWWWWWW\n' * 3), None)
+        self.assertEqual(evaluate_custom(state, 'B'), WIN_SCORE)
+        self.assertEqual(evaluate_custom(state, 'W'), -WIN_SCORE)
+
+
+class TestEvaluatePattern(unittest.TestCase):
+    """
+    Testa a avaliacao por padroes (tabelas indexadas em base 3)
+    """
+
+    @staticmethod
+    def random_positions(n, seed):
+        import random
+        from samples import random_game
+        rng = random.Random(seed)
+        positions = []
+        while len(positions) < n:
+            positions.extend(random_game(rng)[:-1])
+        return positions[:n]
+
+    def test_features(self):
+        """
+        O indice de cada instancia e' o numero em base 3 das casas que ela cobre no tabuleiro original
+        """
+        from advsearch.othello.symmetry import inverse_transform_move
+        from advsearch.your_agent import pattern_eval
+
+        for state in self.random_positions(100, 1):
+            own, opp = state.board.bitboards() if state.player == 'B' else state.board.bitboards()[::-1]
+            indexes = pattern_eval.features(own, opp)
+            base = indexes[0]
+            self.assertEqual(base, pattern_eval.STAGE_OF_DISCS[64 - state.board.piece_count['.']] * pattern_eval.STAGE_SIZE)
+            expected = []
+            for offset, (_, squares) in zip(pattern_eval._PATTERN_OFFSETS, pattern_eval.PATTERNS):
+                for sym in pattern_eval._instances(squares):
+                    index = 0
+                    for j, square in enumerate(squares):
+                        x, y = inverse_transform_move(square, sym)
+                        bit = 1 << (y * 8 + x)
+                        index += 3 ** j * (1 if own & bit else 2 if opp & bit else 0)
+                    expected.append(base + offset + index)
+            self.assertEqual(indexes[1:], expected)
+
+    def test_symmetric_and_terminal(self):
+        """
+        Posicoes simetricas tem o mesmo valor; o valor e' oposto para o outro jogador,
+        e nos estados terminais e' a diferenca de pecas
+        """
+        from advsearch.othello import symmetry
+        from advsearch.othello.bitboard import BitBoard
+        from advsearch.your_agent.pattern_eval import evaluate_pattern
+
+        for state in self.random_positions(60, 2):
+            black, white = state.board.bitboards()
+            value = evaluate_pattern(state, 'B')
+            self.assertAlmostEqual(evaluate_pattern(state, 'W'), -value)
+            for sym in symmetry.SYMMETRIES:
+                board = BitBoard.from_bitboards(symmetry.transform(black, sym), symmetry.transform(white, sym))
+                self.assertAlmostEqual(evaluate_pattern(GameState(board, state.player), 'B'), value, places=3)
+
+        state = GameState(Board.from_string('BBBBBBBB\n' * 5 + 'WWWWWWWW\n' * 3), None)
+        self.assertEqual(evaluate_pattern(state, 'B'), 16)
+        self.assertEqual(evaluate_pattern(state, 'W'), -16)
+
+    def test_training(self):
+        """
+        O treino por minimos quadrados reduz o erro nas partidas gravadas, e os pesos sobrevivem a gravacao
+        """
+        import os
+        import random
+        import tempfile
+        from advsearch.your_agent.pattern_eval import (
+            PatternTrainer, PatternWeights, record_games, read_game, game_files, replay
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            record_games(directory, 2, rng=random.Random(4))
+            files = game_files([directory])
+            self.assertEqual(len(files), 2)
+            trainer = PatternTrainer(learning_rate=0.005, rng=random.Random(4))
+            for path in files:
+                self.assertGreater(trainer.add_game(read_game(path)), 50)
+
+            def rms(weights):
+                errors = [weights.value(own, opp) - result for path in files for own, opp, result in replay(read_game(path))]
+                return (sum(error * error for error in errors) / len(errors)) ** 0.5
+
+            weights = trainer.fit(5)
+            self.assertLess(rms(weights), rms(PatternWeights()) / 2)
+
+            path = os.path.join(directory, 'weights.bin')
+            weights.save(path)
+            self.assertEqual(PatternWeights.load(path).weights, weights.weights)
 
+        # partidas nao terminadas (ex.: desclassificacao) sao ignoradas
+        self.assertEqual(replay([((2, 3), 'B'), ((-1, -1), 'W')]), [])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,374 @@
+import time
+import random
+import unittest
+
+from advsearch.othello.board import Board
+from advsearch.othello.bitboard import BitBoard
+from advsearch.othello.gamestate import GameState
+from advsearch.your_agent.minimax import minimax_move, SearchStats
+from advsearch.your_agent.move_ordering import MoveOrderer
+from advsearch.your_agent.parallel import ParallelSearch
+from advsearch.your_agent.endgame import EndgameSolver, endgame_move
+from advsearch.your_agent.othello_minimax_mask import evaluate_mask
+from advsearch.your_agent.positional import EVAL_TEMPLATE
+from advsearch.your_agent.transposition import TranspositionTable, EXACT, LOWER
+from samples import sample_states
+
+
+class TestTranspositionTable(unittest.TestCase):
+    """
+    Testa a tabela de transposicao e seu uso no minimax
+    """
+
+    def test_store_and_lookup(self):
+        """
+        Entradas armazenadas devem ser encontradas, e os contadores atualizados
+        """
+        tt = TranspositionTable(16)
+        self.assertIsNone(tt.lookup(1234))
+        tt.store(1234, 3, 10, EXACT, (2, 3))
+        entry = tt.lookup(1234)
+        self.assertEqual((entry.depth, entry.score, entry.flag, entry.move), (3, 10, EXACT, (2, 3)))
+        self.assertEqual((tt.hits, tt.misses, tt.stores), (1, 1, 1))
+
+    def test_bounded_memory(self):
+        """
+        A tabela nunca guarda mais entradas do que o limite
+        """
+        tt = TranspositionTable(64)
+        for key in range(1000):
+            tt.store(key * 7919, key % 5, 0, EXACT, None)
+        self.assertLessEqual(len(tt), 64)
+
+    def test_depth_preferred_replacement(self):
+        """
+        Uma entrada profunda nao e' descartada por buscas mais rasas no mesmo bucket
+        """
+        tt = TranspositionTable(2)  # a single bucket
+        tt.store(1, 5, 0, EXACT, None)
+        tt.store(2, 1, 0, LOWER, None)
+        tt.store(3, 1, 0, LOWER, None)  # replaces key 2 (always-replace slot)
+        self.assertIsNotNone(tt.lookup(1))
+        self.assertIsNone(tt.lookup(2))
+        self.assertIsNotNone(tt.lookup(3))
+
+    def test_old_entries_are_replaced(self):
+        """
+        Depois de new_search, entradas profundas de buscas anteriores dao lugar as da busca atual
+        """
+        tt = TranspositionTable(2)  # a single bucket
+        tt.store(1, 5, 0, EXACT, None)
+        tt.new_search()
+        tt.store(2, 1, 0, EXACT, None)
+        tt.store(3, 1, 0, EXACT, None)
+        self.assertEqual((tt.deep[0].key, tt.recent[0].key), (3, 2))
+        self.assertIsNone(tt.lookup(1))
+
+    def test_same_move_with_table(self):
+        """
+        O minimax com tabela de transposicao deve escolher a mesma jogada que sem ela
+        """
+        for board in (Board, BitBoard):
+            for state in sample_states(4, seed=3, board=board):
+                expected = minimax_move(state, 2, evaluate_mask)
+                self.assertEqual(minimax_move(state, 2, evaluate_mask, TranspositionTable()), expected)
+
+    def test_table_requires_hash(self):
+        """
+        Estados sem chave zobrist (ex.: jogo da velha) nao podem usar a tabela
+        """
+        from advsearch.tttm.board import Board as TTTMBoard
+        from advsearch.tttm.gamestate import GameState as TTTMGameState
+        with self.assertRaises(ValueError):
+            minimax_move(TTTMGameState(TTTMBoard(), 'B'), 1, lambda s, p: 0, TranspositionTable())
+
+
+class TestMoveOrdering(unittest.TestCase):
+    """
+    Testa a ordenacao de jogadas do minimax
+    """
+
+    def test_order(self):
+        """
+        Ordem: jogada da tabela, killers, e o resto por historico + prioridade estatica
+        """
+        orderer = MoveOrderer(EVAL_TEMPLATE)
+        moves = [(1, 1), (0, 0), (2, 0), (3, 2)]
+        self.assertEqual(orderer.order(moves, 3, 'B'), [(0, 0), (2, 0), (3, 2), (1, 1)])
+        orderer.cutoff((3, 2), 3, 'B', 2)
+        self.assertEqual(orderer.order(moves, 3, 'B', (1, 1)), [(1, 1), (3, 2), (0, 0), (2, 0)])
+        self.assertEqual(orderer.order(moves, 4, 'W')[0], (0, 0))  # killers are per ply
+
+    def test_same_move_with_ordering(self):
+        """
+        A ordenacao so' muda o numero de nos visitados, nao a jogada escolhida
+        (a menos de empates, que os estados sorteados nao tem)
+        """
+        for state in sample_states(4, seed=3):
+            expected = minimax_move(state, 2, evaluate_mask)
+            ordered = minimax_move(state, 2, evaluate_mask, ordering=MoveOrderer(EVAL_TEMPLATE))
+            self.assertEqual(ordered, expected)
+
+
+class TestNegamax(unittest.TestCase):
+    """
+    Testa o nucleo negamax com busca de variacao principal (PVS) e janelas de aspiracao
+    """
+
+    def test_same_move_as_minimax(self):
+        """
+        O negamax deve escolher a mesma jogada que o minimax, com e sem tabela de transposicao
+        """
+        for board in (Board, BitBoard):
+            for state in sample_states(4, seed=7, board=board):
+                expected = minimax_move(state, 2, evaluate_mask)
+                self.assertEqual(minimax_move(state, 2, evaluate_mask, negamax=True), expected)
+                self.assertEqual(minimax_move(state, 2, evaluate_mask, TranspositionTable(), negamax=True), expected)
+
+    def test_aspiration_windows(self):
+        """
+        O aprofundamento iterativo com janelas de aspiracao chega na mesma jogada da busca de profundidade fixa
+        """
+        for state in sample_states(4, seed=11):
+            expected = minimax_move(state, 2, evaluate_mask)
+            move = minimax_move(state, 2, evaluate_mask, deadline=time.time() + 60, negamax=True, aspiration=5)
+            self.assertEqual(move, expected)
+
+    def test_tttm(self):
+        """
+        O negamax resolve o jogo da velha, onde as jogadas de ambos os jogadores sao avaliadas pela raiz
+        """
+        from advsearch.tttm.board import Board as TTTMBoard
+        from advsearch.tttm.gamestate import GameState as TTTMGameState
+        from advsearch.your_agent.tttm_minimax import utility
+        state = TTTMGameState(TTTMBoard.from_string("..B\n...\n..."), 'W')
+        self.assertIn(minimax_move(state, -1, utility, negamax=True), {(0, 1), (1, 0), (1, 2), (2, 1)})
+
+    def test_stats(self):
+        """
+        As estatisticas da busca sao preenchidas
+        """
+        stats = SearchStats()
+        minimax_move(GameState(BitBoard(), 'B'), 3, evaluate_mask, stats=stats, negamax=True)
+        self.assertGreater(stats.nodes, stats.cutoffs)
+        self.assertGreater(stats.cutoffs, 0)
+        self.assertEqual(stats.max_ply, 4)
+        self.assertGreater(stats.elapsed, 0)
+        self.assertLessEqual(stats.first_cutoff_rate, 1)
+
+
+class TestParallelSearch(unittest.TestCase):
+    """
+    Testa a busca paralela dividida na raiz
+    """
+
+    def test_same_move_as_sequential(self):
+        """
+        A busca paralela deve escolher a mesma jogada que a sequencial na mesma profundidade
+        """
+        with ParallelSearch(2) as search:
+            for board in (Board, BitBoard):
+                for state in sample_states(4, seed=13, board=board):
+                    self.assertEqual(search.move(state, 2, evaluate_mask), minimax_move(state, 2, evaluate_mask))
+
+    def test_deadline(self):
+        """
+        Com prazo, a busca paralela aprofunda ate o prazo; com tempo de sobra, chega na mesma jogada
+        da busca de profundidade fixa
+        """
+        with ParallelSearch(2) as search:
+            state = GameState(BitBoard(), 'B')
+            start = time.time()
+            move = search.move(state, -1, evaluate_mask, deadline=start + 0.5)
+            self.assertLess(time.time() - start, 1.0)
+            self.assertIn(move, state.legal_moves())
+            for state in sample_states(3, seed=19):
+                move = search.move(state, 2, evaluate_mask, deadline=time.time() + 60)
+                self.assertEqual(move, minimax_move(state, 2, evaluate_mask))
+
+    def test_restricted_root(self):
+        """
+        A busca restrita a algumas jogadas da raiz so' retorna uma delas
+        """
+        state = sample_states(1, seed=17)[0]
+        moves = sorted(state.legal_moves())[:2]
+        stats = SearchStats()
+        self.assertIn(minimax_move(state, 1, evaluate_mask, moves=moves, stats=stats), moves)
+        self.assertIsNotNone(stats.score)
+
+
+class TestEndgame(unittest.TestCase):
+    """
+    Testa o solver exato de final de jogo
+    """
+
+    @staticmethod
+    def disc_difference(state, player):
+        return state.board.num_pieces(player) - state.board.num_pieces(Board.opponent(player))
+
+    def test_same_score_as_minimax(self):
+        """
+        O placar final do solver deve ser o da busca minimax completa, para a jogada que ele escolhe
+        """
+        for empties in (1, 2, 3, 6):
+            for state in sample_states(8, seed=empties, empties=empties):
+                stats = SearchStats()
+                minimax_move(state, -1, self.disc_difference, stats=stats)
+                black, white = state.board.bitboards()
+                own, opp = (black, white) if state.player == Board.BLACK else (white, black)
+                _, score = EndgameSolver().solve_move(own, opp)
+                self.assertEqual(score, stats.score)
+
+                move = endgame_move(state)
+                move_stats = SearchStats()
+                minimax_move(state, -1, self.disc_difference, stats=move_stats, moves=[move])
+                self.assertEqual(move_stats.score, stats.score)
+
+    def test_board_and_deadline(self):
+        """
+        O solver aceita tabuleiros matriciais e desiste (retorna None) se o prazo passar
+        """
+        state = sample_states(1, seed=0, empties=14)[0]
+        board_state = GameState(Board.from_string(str(state.board)), state.player)
+        self.assertIsNone(endgame_move(board_state, deadline=time.time()))
+
+
+class TestIterativeDeepening(unittest.TestCase):
+    """
+    Testa o aprofundamento iterativo com prazo (deadline) do minimax
+    """
+
+    def test_expired_deadline_returns_legal_move(self):
+        """
+        Mesmo sem tempo nenhum, a busca deve retornar uma jogada legal
+        """
+        for state in sample_states(3, seed=5):
+            move = minimax_move(state, -1, evaluate_mask, deadline=time.time())
+            self.assertIn(move, state.legal_moves())
+
+    def test_respects_deadline(self):
+        """
+        A busca ilimitada deve parar logo apos o prazo
+        """
+        state = GameState(BitBoard(), 'B')
+        start = time.time()
+        move = minimax_move(state, -1, evaluate_mask, deadline=start + 0.5)
+        self.assertLess(time.time() - start, 1.0)
+        self.assertIn(move, state.legal_moves())
+
+    def test_reused_table(self):
+        """
+        Com a mesma tabela de transposicao em duas buscas com prazo, a segunda nao para na profundidade 1
+        por causa dos cortes com entradas de buscas limitadas; num final de jogo resolvido, para logo
+        """
+        for negamax in (False, True):
+            tt = TranspositionTable()
+            state = GameState(BitBoard(), 'B')
+            for _ in range(2):
+                stats = SearchStats()
+                move = minimax_move(state, -1, evaluate_mask, tt, deadline=time.time() + 0.3, stats=stats,
+                                    negamax=negamax)
+                self.assertGreater(stats.max_ply, 2)
+                state = state.next_state(move)
+
+            state = sample_states(1, seed=6, empties=6)[0]
+            tt = TranspositionTable()
+            minimax_move(state, -1, evaluate_mask, tt, deadline=time.time() + 60, negamax=negamax)
+            start = time.time()
+            minimax_move(state, -1, evaluate_mask, tt, deadline=time.time() + 60, negamax=negamax)
+            self.assertLess(time.time() - start, 1.0)
+
+    def test_solved_tree(self):
+        """
+        Quando a arvore inteira cabe no tempo, o resultado deve ser o mesmo da busca completa
+        """
+        from advsearch.tttm.board import Board as TTTMBoard
+        from advsearch.tttm.gamestate import GameState as TTTMGameState
+        from advsearch.your_agent.tttm_minimax import utility
+        state = TTTMGameState(TTTMBoard.from_string("..B\n...\n..."), 'W')
+        move = minimax_move(state, -1, utility, deadline=time.time() + 60)
+        self.assertIn(move, {(0, 1), (1, 0), (1, 2), (2, 1)})
+
+
+class TestOpeningBook(unittest.TestCase):
+    """
+    Testa o livro de aberturas (construcao, arquivo ordenado e simetrias)
+    """
+
+    def setUp(self):
+        import tempfile
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name + '/book.bin'
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_symmetric_positions_share_entries(self):
+        """
+        Uma entrada vale para as 4 posicoes simetricas depois da primeira jogada, com a jogada transformada
+        """
+        from advsearch.your_agent.opening_book import BookBuilder, OpeningBook, _canonical_move
+
+        start = GameState(BitBoard(), 'B')
+        after = start.next_state((3, 2))
+        builder = BookBuilder()
+        builder.stats[_canonical_move(after, (2, 2))] = [3, 2.0]
+        builder.stats[_canonical_move(after, (4, 2))] = [3, 1.0]
+        builder.stats[_canonical_move(start, (3, 2))] = [1, 1.0]  # poucas partidas
+        self.assertEqual(builder.write(self.path, min_games=2), 1)
+
+        book = OpeningBook(self.path, min_games=2)
+        self.assertEqual(book.size, 1)
+        self.assertIsNone(book.lookup(start))
+        self.assertEqual(book.lookup(after), (2, 2))
+        replies = set()
+        for move in start.legal_moves():
+            state = start.next_state(move)
+            reply = book.lookup(state)
+            self.assertTrue(state.is_legal_move(reply))
+            replies.add(state.next_state(reply).board.canonical_key()[:2])
+        self.assertEqual(len(replies), 1)  # as 4 respostas levam a posicoes simetricas
+        book.close()
+
+    def test_builder_and_missing_file(self):
+        """
+        As partidas de auto-jogo registram as primeiras jogadas; sem arquivo, o livro e' vazio
+        """
+        from advsearch.your_agent.opening_book import BookBuilder, OpeningBook
+
+        builder = BookBuilder(plies=3, depth=1, epsilon=0, rng=random.Random(0))
+        builder.play_game()
+        self.assertEqual(len(builder.stats), 3)
+        self.assertTrue(all(games == 1 for games, _ in builder.stats.values()))
+        self.assertEqual(builder.write(self.path, min_games=1, min_score=0), 3)
+        self.assertIsNotNone(OpeningBook(self.path, min_games=1, min_score=0).lookup(GameState(BitBoard(), 'B')))
+        self.assertIsNone(OpeningBook(self.path + '.missing').lookup(GameState(BitBoard(), 'B')))
+
+    def test_confidence_ranking(self):
+        """
+        A jogada do livro e' a de maior limite inferior de confianca, nao a de maior media; entradas com
+        poucas partidas nao sao jogadas, e as de resultado perdedor nem sao gravadas
+        """
+        from advsearch.your_agent.opening_book import BookBuilder, OpeningBook, _canonical_move, lower_bound
+
+        self.assertLess(lower_bound(2, 2), lower_bound(15, 20))
+        start = GameState(BitBoard(), 'B')
+        after = start.next_state((3, 2))
+        losing = after.next_state((2, 2))
+        builder = BookBuilder()
+        builder.stats[_canonical_move(after, (2, 2))] = [2, 2.0]  # media 1, mas so 2 partidas
+        builder.stats[_canonical_move(after, (4, 2))] = [20, 15.0]
+        builder.stats[_canonical_move(start, (3, 2))] = [4, 3.0]
+        builder.stats[_canonical_move(losing, (2, 3))] = [10, 3.0]
+        self.assertEqual(builder.write(self.path, min_games=2), 2)
+
+        book = OpeningBook(self.path, min_games=8)
+        self.assertEqual(book.lookup(after), (4, 2))
+        self.assertIsNone(book.lookup(start))  # poucas partidas
+        self.assertIsNone(OpeningBook(self.path, min_games=2, min_score=0).lookup(losing))  # media abaixo de 0.5
+        self.assertEqual(OpeningBook(self.path, min_games=2).lookup(start), (3, 2))
+        book.close()
+
+
+if __name__ == '__main__':
+    unittest.main()